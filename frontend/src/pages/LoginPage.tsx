@@ -1,6 +1,6 @@
 import React, { useState } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
-import { useAuthStore } from '../store/useStore';
+import { useAuthStore, useCartStore } from '../store/useStore';
 
 const LoginPage: React.FC = () => {
   const [formData, setFormData] = useState({
@@ -11,6 +11,7 @@ const LoginPage: React.FC = () => {
   const [error, setError] = useState('');
   
   const { login } = useAuthStore();
+  const { fetchCart } = useCartStore();
   const navigate = useNavigate();
 
   const handleChange = (e: React.ChangeEvent<HTMLInputElement>) => {
@@ -27,6 +28,8 @@ const LoginPage: React.FC = () => {
 
     try {
       await login(formData);
+      // The guest cart was moved into the account and its items renumbered
+      fetchCart().catch(() => {});
       navigate('/');
     } catch (error: any) {
       setError(error.response?.data?.non_field_errors?.[0] || 'Login failed');
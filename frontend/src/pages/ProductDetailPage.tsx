@@ -132,7 +132,15 @@ const ProductDetailPage: React.FC = () => {
             
             <div>
               <h3 className="text-gray-800 mb-4 text-xl">Description</h3>
-              <p className="text-gray-600 leading-relaxed m-0">{product.description}</p>
+              {product.description_html ? (
+                // Rendered from Markdown and sanitized by the API when the product is saved
+                <div
+                  className="text-gray-600 leading-relaxed"
+                  dangerouslySetInnerHTML={{ __html: product.description_html }}
+                />
+              ) : (
+                <p className="text-gray-600 leading-relaxed m-0">{product.description}</p>
+              )}
             </div>
             
             <div>
@@ -3,6 +3,7 @@ import {
   ShippingAddress, 
   Customer,
   BulkOperationRequest,
+  CartOperation,
   NotificationPreferences,
   ProfileUpdateData
 } from '../types';
@@ -151,6 +152,8 @@ export const cartAPI = {
     return api.delete(`/api/cart/remove/${itemId}/`);
   },
   clearCart: () => api.delete('/api/cart/clear/'),
+  // Applies the operations in order, all or none, and returns the resulting cart
+  batch: (operations: CartOperation[]) => api.post('/api/cart/batch/', { operations }),
 };
 
 // Orders API
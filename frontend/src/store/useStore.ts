@@ -1,6 +1,6 @@
 import { create } from 'zustand';
 import { persist } from 'zustand/middleware';
-import { User, Cart, Product, Order } from '../types';
+import { User, Cart, CartOperation, Product, Order } from '../types';
 import { cartAPI, authAPI, handleApiError, retryApiCall } from '../services/api';
 
 interface AuthState {
@@ -23,6 +23,7 @@ interface CartState {
   updateCartItem: (itemId: number, quantity: number) => Promise<void>;
   removeFromCart: (itemId: number) => Promise<void>;
   clearCart: () => Promise<void>;
+  applyCartOperations: (operations: CartOperation[]) => Promise<void>;
   clearError: () => void;
 }
 
@@ -111,82 +112,103 @@ export const useAuthStore = create<AuthState>()(
   )
 );
 
-export const useCartStore = create<CartState>((set, get) => ({
-  cart: null,
-  isLoading: false,
-  error: null,
-  lastUpdated: null,
-  
-  fetchCart: async () => {
-    set({ isLoading: true, error: null });
-    try {
-      const response = await retryApiCall(() => cartAPI.getCart(), 2);
-      set({ 
-        cart: response.data, 
-        isLoading: false, 
-        lastUpdated: Date.now(),
-        error: null 
-      });
-    } catch (error) {
-      const errorInfo = handleApiError(error);
-      set({ 
-        isLoading: false, 
-        error: errorInfo?.message || 'An unexpected error occurred' 
-      });
-      throw error;
-    }
-  },
-  
-  addToCart: async (productId, quantity) => {
-    set({ error: null });
-    try {
-      await cartAPI.addToCart(productId, quantity);
+export const useCartStore = create<CartState>((set, get) => {
+  // Cart mutations return the updated cart; refetch only if a response lacks it
+  const applyCart = async (response: { data?: { cart?: Cart } } | undefined) => {
+    const cart = response?.data?.cart;
+    if (cart) {
+      set({ cart, lastUpdated: Date.now() });
+    } else {
       await get().fetchCart();
-    } catch (error) {
-      const errorInfo = handleApiError(error);
-      set({ error: errorInfo?.message || 'An unexpected error occurred' });
-      throw error;
     }
-  },
+  };
+
+  return {
+    cart: null,
+    isLoading: false,
+    error: null,
+    lastUpdated: null,
   
-  updateCartItem: async (itemId, quantity) => {
-    set({ error: null });
-    try {
-      await cartAPI.updateCartItem(itemId, quantity);
-      await get().fetchCart();
-    } catch (error) {
-      const errorInfo = handleApiError(error);
-      set({ error: errorInfo?.message || 'An unexpected error occurred' });
-      throw error;
-    }
-  },
+    fetchCart: async () => {
+      set({ isLoading: true, error: null });
+      try {
+        const response = await retryApiCall(() => cartAPI.getCart(), 2);
+        set({ 
+          cart: response.data, 
+          isLoading: false, 
+          lastUpdated: Date.now(),
+          error: null 
+        });
+      } catch (error) {
+        const errorInfo = handleApiError(error);
+        set({ 
+          isLoading: false, 
+          error: errorInfo?.message || 'An unexpected error occurred' 
+        });
+        throw error;
+      }
+    },
   
-  removeFromCart: async (itemId) => {
-    set({ error: null });
-    try {
-      await cartAPI.removeFromCart(itemId);
-      await get().fetchCart();
-    } catch (error) {
-      const errorInfo = handleApiError(error);
-      set({ error: errorInfo?.message || 'An unexpected error occurred' });
-      throw error;
-    }
-  },
+    addToCart: async (productId, quantity) => {
+      set({ error: null });
+      try {
+        await applyCart(await cartAPI.addToCart(productId, quantity));
+      } catch (error) {
+        const errorInfo = handleApiError(error);
+        set({ error: errorInfo?.message || 'An unexpected error occurred' });
+        throw error;
+      }
+    },
   
-  clearCart: async () => {
-    set({ error: null });
-    try {
-      await cartAPI.clearCart();
-      set({ cart: null, lastUpdated: Date.now() });
-    } catch (error) {
-      const errorInfo = handleApiError(error);
-      set({ error: errorInfo?.message || 'An unexpected error occurred' });
-      throw error;
-    }
-  },
+    updateCartItem: async (itemId, quantity) => {
+      set({ error: null });
+      try {
+        await applyCart(await cartAPI.updateCartItem(itemId, quantity));
+      } catch (error) {
+        const errorInfo = handleApiError(error);
+        set({ error: errorInfo?.message || 'An unexpected error occurred' });
+        throw error;
+      }
+    },
   
-  clearError: () => set({ error: null }),
-}));
+    removeFromCart: async (itemId) => {
+      set({ error: null });
+      try {
+        await applyCart(await cartAPI.removeFromCart(itemId));
+      } catch (error) {
+        const errorInfo = handleApiError(error);
+        set({ error: errorInfo?.message || 'An unexpected error occurred' });
+        throw error;
+      }
+    },
+  
+    clearCart: async () => {
+      set({ error: null });
+      try {
+        await cartAPI.clearCart();
+        set({ cart: null, lastUpdated: Date.now() });
+      } catch (error) {
+        const errorInfo = handleApiError(error);
+        set({ error: errorInfo?.message || 'An unexpected error occurred' });
+        throw error;
+      }
+    },
+  
+    applyCartOperations: async (operations) => {
+      set({ error: null });
+      try {
+        const response = await cartAPI.batch(operations);
+        set({ cart: response.data, lastUpdated: Date.now() });
+      } catch (error) {
+        const errorInfo = handleApiError(error);
+        set({ error: errorInfo?.message || 'An unexpected error occurred' });
+        throw error;
+      }
+    },
+  
+    clearError: () => set({ error: null }),
+  };
+});
 
 export const useProductStore = create<ProductState>((set) => ({
   products: [],
@@ -10,6 +10,7 @@ export interface Product {
   id: number;
   name: string;
   description: string;
+  description_html?: string;
   price: string;
   stock_quantity: number;
   slug: string;
@@ -39,8 +40,16 @@ export interface CartItem {
   total_price: string;
 }
 
+// One edit in a /api/cart/batch/ request; set and remove take item_id or product_id
+export interface CartOperation {
+  op: 'add' | 'set' | 'remove';
+  product_id?: number;
+  item_id?: number;
+  quantity?: number;
+}
+
 export interface Cart {
-  id: number;
+  id: number | null;
   items: CartItem[];
   total_items: number;
   total_price: string;
@@ -6,9 +6,11 @@ and other production-ready features.
 """
 
 import logging
+import os
 from django.utils.deprecation import MiddlewareMixin
 from django.http import HttpResponseServerError
 from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
 
 logger = logging.getLogger(__name__)
 
@@ -55,13 +57,27 @@ class SecurityHeadersMiddleware(MiddlewareMixin):
         response['X-XSS-Protection'] = '1; mode=block'
         response['Referrer-Policy'] = 'strict-origin-when-cross-origin'
         
-        # Cache control for sensitive pages
-        if request.path.startswith('/admin/') or request.path.startswith('/api/'):
+        # Cache control: public catalog routes may be reused by browsers and
+        # shared caches, everything else sensitive is never stored
+        public_policy = self.get_public_cache_policy(request, response)
+        if public_policy:
+            response['Cache-Control'] = public_policy
+        elif request.path.startswith('/admin/') or request.path.startswith('/api/'):
             response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
             response['Pragma'] = 'no-cache'
             response['Expires'] = '0'
         
         return response
+    
+    def get_public_cache_policy(self, request, response):
+        """Return the Cache-Control value for a public route, or None."""
+        if request.method not in ('GET', 'HEAD') or response.status_code not in (200, 304):
+            return None
+        policies = getattr(settings, 'PUBLIC_CACHE_POLICIES', {})
+        for prefix, policy in policies.items():
+            if request.path.startswith(prefix):
+                return policy
+        return None
 
 
 class RequestLoggingMiddleware(MiddlewareMixin):
@@ -111,6 +127,45 @@ class HealthCheckMiddleware(MiddlewareMixin):
         return None
 
 
+class CatalogSnapshotMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise middleware that also serves the live catalog snapshot.
+    
+    Outside DEBUG, WhiteNoise indexes STATIC_ROOT once at startup, so
+    files written later would be missed or served with stale headers.
+    Snapshot and sitemap files (see store.snapshot and store.sitemaps)
+    are therefore looked up on each request, which costs a couple of
+    stat calls and no Django views.
+    """
+    
+    snapshot_dirs = ('catalog', 'sitemaps')
+    
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings=settings)
+        self.snapshot_roots = [
+            (f"{self.static_prefix}{name}/", os.path.join(self.static_root or '', name))
+            for name in self.snapshot_dirs
+        ]
+    
+    def __call__(self, request):
+        if self.static_root:
+            for prefix, snapshot_root in self.snapshot_roots:
+                if request.path_info.startswith(prefix):
+                    static_file = self.find_snapshot_file(request.path_info, prefix, snapshot_root)
+                    if static_file is not None:
+                        return self.serve(static_file, request)
+        return super().__call__(request)
+    
+    def find_snapshot_file(self, url, prefix, snapshot_root):
+        # Resolve the symlink once so the file and its compressed variants
+        # come from the same build even if a new one is swapped in
+        root = os.path.realpath(snapshot_root) + os.path.sep
+        path = os.path.normpath(os.path.join(root, url[len(prefix):]))
+        if not path.startswith(root) or self.is_compressed_variant(path) or not os.path.isfile(path):
+            return None
+        return self.get_static_file(path, url)
+
+
 class RateLimitMiddleware(MiddlewareMixin):
     """
     Basic rate limiting middleware.
@@ -76,7 +76,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'pasargadprints.middleware.CatalogSnapshotMiddleware',
     'pasargadprints.middleware.HealthCheckMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -203,13 +203,59 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
 }
 
+# Catalog response cache
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', '300'))  # 5 minutes default
+
+# Pre-encoded product list fragments, keyed by product id and updated_at
+PRODUCT_FRAGMENT_TIMEOUT = int(os.getenv('PRODUCT_FRAGMENT_TIMEOUT', '86400'))
+
+# Stock levels are written through on every change; each product's entry
+# expires on its own, bounding staleness from writes that bypass the model
+# (raw SQL, bulk_update)
+STOCK_CACHE_TIMEOUT = int(os.getenv('STOCK_CACHE_TIMEOUT', '3600'))
+
+# Anonymous carts live in the cache until login and expire this long after
+# their last change (see store.session_carts)
+ANONYMOUS_CART_TIMEOUT = int(os.getenv('ANONYMOUS_CART_TIMEOUT', '1209600'))  # 14 days
+
+# "Frequently bought together" (see build_recommendations)
+RECOMMENDATIONS_TOP_K = int(os.getenv('RECOMMENDATIONS_TOP_K', '6'))
+RECOMMENDATIONS_SETTLE_MINUTES = int(os.getenv('RECOMMENDATIONS_SETTLE_MINUTES', '60'))
+
+# Seconds between autocomplete index freshness checks against the catalog version
+AUTOCOMPLETE_VERSION_CHECK_INTERVAL = float(os.getenv('AUTOCOMPLETE_VERSION_CHECK_INTERVAL', '1.0'))
+
+# Cache-Control for public API routes (path prefix -> header value).
+# Other /api/ and /admin/ responses are sent with no-store.
+PUBLIC_CACHE_POLICIES = {
+    '/api/products/': 'public, max-age=60, s-maxage=300, stale-while-revalidate=60',
+    '/api/stock/': 'public, max-age=5',
+}
+
 # Media files (uploads)
 MEDIA_URL = os.getenv('MEDIA_URL', '/media/')
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Responsive product image renditions (see generate_image_variants)
+IMAGE_VARIANT_WIDTHS = [
+    int(width) for width in os.getenv('IMAGE_VARIANT_WIDTHS', '320,640,1024,1600').split(',') if width.strip()
+]
+IMAGE_VARIANT_QUALITY = int(os.getenv('IMAGE_VARIANT_QUALITY', '80'))
+
 # Static files
 STATIC_ROOT = os.getenv('STATIC_ROOT', str(BASE_DIR / 'staticfiles'))
 
+# Static catalog snapshot under STATIC_ROOT/catalog (see build_catalog_snapshot)
+CATALOG_SNAPSHOT_PAGE_SIZE = int(os.getenv('CATALOG_SNAPSHOT_PAGE_SIZE', '100'))
+# Rebuild from cron with build_catalog_snapshot --if-stale; in-process rebuilds
+# after catalog edits are opt-in and run in the web worker that saved the change
+CATALOG_SNAPSHOT_AUTO_REBUILD = os.getenv('CATALOG_SNAPSHOT_AUTO_REBUILD', 'False').lower() == 'true'
+CATALOG_SNAPSHOT_DELAY = float(os.getenv('CATALOG_SNAPSHOT_DELAY', '5'))  # seconds to coalesce changes
+
+# Static sitemaps under STATIC_ROOT/sitemaps (see build_sitemaps)
+SITEMAP_SITE_URL = os.getenv('SITEMAP_SITE_URL', os.getenv('FRONTEND_URL', 'http://localhost:3000'))
+SITEMAP_CHUNK_SIZE = int(os.getenv('SITEMAP_CHUNK_SIZE', '50000'))
+
 # CORS settings for frontend - Environment specific configuration
 CORS_ALLOWED_ORIGINS_ENV = os.getenv('CORS_ALLOWED_ORIGINS', '')
 if CORS_ALLOWED_ORIGINS_ENV:
@@ -2,7 +2,8 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
-from .models import (Product, ProductImage, Customer, Order, OrderItem, ShippingAddress, 
+from . import sales, search
+from .models import (Product, ProductImage, ProductReview, ProductTranslation, Customer, Order, OrderItem, ShippingAddress, 
                     Cart, CartItem, WebhookEvent, WebhookSecurityLog, UserActivity)
 
 
@@ -18,6 +19,11 @@ class ProductImageInline(admin.TabularInline):
     image_preview.short_description = "Preview"
 
 
+class ProductTranslationInline(admin.StackedInline):
+    model = ProductTranslation
+    extra = 0
+
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ['name', 'price', 'stock_quantity', 'is_active', 'created_at', 'primary_image_preview']
@@ -25,7 +31,7 @@ class ProductAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description']
     prepopulated_fields = {'slug': ('name',)}
     readonly_fields = ['created_at', 'updated_at']
-    inlines = [ProductImageInline]
+    inlines = [ProductImageInline, ProductTranslationInline]
     
     fieldsets = (
         ('Basic Information', {
@@ -40,8 +46,17 @@ class ProductAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_primary_image()
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of an icontains scan
+        if not search_term:
+            return queryset, False
+        return search.search_products(queryset, search_term), False
+    
     def primary_image_preview(self, obj):
-        primary_image = obj.images.filter(is_primary=True).first()
+        primary_image = obj.get_primary_image()
         if primary_image and primary_image.image:
             return format_html('<img src="{}" width="50" height="50" />', primary_image.image.url)
         return "No image"
@@ -110,16 +125,25 @@ class OrderAdmin(admin.ModelAdmin):
         return format_html('<a href="{}?order__id__exact={}">{} items</a>', url, obj.id, count)
     view_items.short_description = "Items"
     
+    def set_status(self, queryset, status):
+        # The ids are taken first: after the update the changelist filters
+        # (e.g. ?status=pending) may no longer match the selected orders
+        ids = list(queryset.values_list('pk', flat=True))
+        Order.objects.filter(pk__in=ids).update(status=status)
+        # update() bypasses the Order post_save signal
+        for order in Order.objects.filter(pk__in=ids).only('id'):
+            sales.sync_order(order)
+    
     def mark_as_processing(self, request, queryset):
-        queryset.update(status='processing')
+        self.set_status(queryset, 'processing')
     mark_as_processing.short_description = "Mark selected orders as processing"
     
     def mark_as_shipped(self, request, queryset):
-        queryset.update(status='shipped')
+        self.set_status(queryset, 'shipped')
     mark_as_shipped.short_description = "Mark selected orders as shipped"
     
     def mark_as_delivered(self, request, queryset):
-        queryset.update(status='delivered')
+        self.set_status(queryset, 'delivered')
     mark_as_delivered.short_description = "Mark selected orders as delivered"
 
 
@@ -131,6 +155,15 @@ class OrderItemAdmin(admin.ModelAdmin):
     readonly_fields = ['total_price']
 
 
+@admin.register(ProductReview)
+class ProductReviewAdmin(admin.ModelAdmin):
+    list_display = ['product', 'customer', 'rating', 'title', 'created_at']
+    list_filter = ['rating', 'created_at']
+    search_fields = ['product__name', 'title', 'body']
+    # Ties the review to a purchase; only the content is editable
+    readonly_fields = ['order_item', 'product', 'customer', 'created_at', 'updated_at']
+
+
 @admin.register(ShippingAddress)
 class ShippingAddressAdmin(admin.ModelAdmin):
     list_display = ['full_name', 'customer', 'city', 'state', 'country', 'is_default']
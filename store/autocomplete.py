@@ -0,0 +1,97 @@
+"""
+In-process prefix index for product autocomplete.
+
+Each worker keeps a sorted array of search keys (product name words, the
+full name and the slug) and answers prefix queries with bisect, so
+lookups never touch the database. The index is rebuilt lazily when the
+catalog version stored in the cache (see catalog_cache) changes.
+"""
+
+import heapq
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from django.conf import settings
+
+from . import catalog_cache
+from .models import Product
+
+
+class PrefixIndex:
+    def __init__(self, version, products):
+        """Build from (id, name, slug, popularity) tuples"""
+        self.version = version
+        self.products = products
+        pairs = []
+        for position, (product_id, name, slug, popularity) in enumerate(products):
+            for key in self.keys_for(name, slug):
+                pairs.append((key, position))
+        pairs.sort()
+        self.keys = [key for key, _ in pairs]
+        self.positions = array('I', (position for _, position in pairs))
+
+    @staticmethod
+    def normalize(text):
+        return ' '.join(text.lower().split())
+
+    @classmethod
+    def keys_for(cls, name, slug):
+        name = cls.normalize(name)
+        keys = {name, slug.lower()}
+        keys.update(name.split(' '))
+        keys.discard('')
+        return keys
+
+    def search(self, prefix, limit):
+        prefix = self.normalize(prefix)
+        if not prefix:
+            return []
+
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + '\uffff', lo=start)
+        matches = set(self.positions[start:end])
+        best = heapq.nsmallest(
+            limit, matches,
+            key=lambda position: (-self.products[position][3], self.products[position][1])
+        )
+        return [
+            {'id': product_id, 'name': name, 'slug': slug}
+            for product_id, name, slug, _ in (self.products[position] for position in best)
+        ]
+
+
+_index = None
+_last_checked = 0.0
+_lock = threading.Lock()
+
+
+def load_products():
+    """Active products with a popularity score (units sold, see sales)"""
+    return list(
+        Product.objects.filter(is_active=True)
+        .order_by()
+        .values_list('id', 'name', 'slug', 'units_sold')
+    )
+
+
+def get_index():
+    """Return the current index, rebuilding it if the catalog has changed"""
+    global _index, _last_checked
+
+    interval = getattr(settings, 'AUTOCOMPLETE_VERSION_CHECK_INTERVAL', 1.0)
+    now = time.monotonic()
+    if _index is not None and now - _last_checked < interval:
+        return _index
+
+    version = catalog_cache.get_catalog_version()
+    _last_checked = now
+    if _index is None or _index.version != version:
+        with _lock:
+            if _index is None or _index.version != version:
+                _index = PrefixIndex(version, load_products())
+    return _index
+
+
+def suggest(prefix, limit=10):
+    return get_index().search(prefix, limit)
@@ -0,0 +1,44 @@
+"""
+Debounced background jobs for work triggered by catalog changes.
+
+Used for rebuilds that are too slow to run inside the request that
+caused them but should follow it closely (see snapshot).
+"""
+
+import logging
+import threading
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class DebouncedJob:
+    """Run ``func`` in a daemon thread ``get_delay()`` seconds after a trigger.
+
+    Triggers arriving while a run is pending are coalesced into it, so a
+    burst of changes costs one run per process.
+    """
+
+    def __init__(self, func, get_delay):
+        self.func = func
+        self.get_delay = get_delay
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def trigger(self):
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.get_delay(), self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _run(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.func()
+        except Exception:
+            logger.exception(f"Background job {self.func.__name__} failed")
+        finally:
+            connections.close_all()
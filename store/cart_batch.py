@@ -0,0 +1,129 @@
+"""
+Batched cart edits for /api/cart/batch/.
+
+apply() runs an ordered list of add/set/remove operations against a
+cart. Stock for every touched product is read in one query, each
+operation is checked against it in order like the single-item
+endpoints would, and the resulting lines are written with bulk
+statements in one transaction. A rapid series of quantity changes in
+the SPA therefore costs one request, and a failing operation rejects
+the whole batch.
+
+Customer and anonymous carts give different guarantees. A customer
+Cart is locked with SELECT ... FOR UPDATE and its lines are written in
+the same database transaction as the checks. An anonymous SessionCart
+lives in the cache: batches on it are serialized by
+session_carts.lock() and re-read the cart under the lock, but the cache
+write is not part of the database transaction, and single-item edits
+(which do not take the lock) landing during a batch may be overwritten
+by it.
+"""
+
+from contextlib import contextmanager, nullcontext
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import session_carts
+from .models import Cart, CartItem, Product
+
+MAX_OPERATIONS = 100
+
+
+class CartBatchError(Exception):
+    """An operation that cannot be applied; ``index`` is its position in the batch,
+    or None when the batch as a whole was refused"""
+
+    def __init__(self, message, index, status_code=400):
+        super().__init__(message)
+        self.index = index
+        self.status_code = status_code
+
+
+def apply(cart, operations):
+    """Apply ``operations`` (validated CartOperationSerializer data) to ``cart``.
+
+    ``cart`` is a Cart or a SessionCart. Raises CartBatchError, leaving
+    the cart untouched, if any operation fails.
+    """
+    guard = nullcontext() if isinstance(cart, Cart) else _locked(cart)
+    with guard, transaction.atomic():
+        if isinstance(cart, Cart):
+            # Serializes concurrent batches on the same cart
+            Cart.objects.select_for_update().filter(pk=cart.pk).first()
+            lines = {
+                product_id: (item_id, quantity)
+                for item_id, product_id, quantity in cart.items.values_list('id', 'product_id', 'quantity')
+            }
+            item_products = {item_id: product_id for product_id, (item_id, _) in lines.items()}
+            current = {product_id: quantity for product_id, (_, quantity) in lines.items()}
+        else:
+            current = dict(cart.quantities)
+            item_products = None
+
+        targets = [_target(operation, index, item_products) for index, operation in enumerate(operations)]
+        stock = dict(
+            Product.objects.filter(pk__in=set(targets), is_active=True).values_list('id', 'stock_quantity')
+        )
+
+        quantities = dict(current)
+        for index, (operation, product_id) in enumerate(zip(operations, targets)):
+            if operation['op'] != 'add' and product_id not in quantities:
+                raise CartBatchError('Item not in cart', index, status_code=404)
+            if operation['op'] == 'remove':
+                del quantities[product_id]
+                continue
+            if product_id not in stock:
+                raise CartBatchError('Product not found or inactive', index, status_code=404)
+            quantity = operation['quantity']
+            if operation['op'] == 'add':
+                quantity += quantities.get(product_id, 0)
+            if quantity > stock[product_id]:
+                raise CartBatchError('Not enough stock available', index)
+            quantities[product_id] = quantity
+
+        if isinstance(cart, Cart):
+            _save_lines(cart, lines, quantities)
+        else:
+            cart.replace(quantities)
+
+
+@contextmanager
+def _locked(session_cart):
+    """Serialize batches on an anonymous cart, reading it afresh under the lock"""
+    try:
+        with session_carts.lock(session_cart.session_key):
+            session_cart.reload()
+            yield
+    except session_carts.CartLocked:
+        raise CartBatchError('Cart is being updated by another request', None, status_code=409)
+
+
+def _target(operation, index, item_products):
+    """The product an operation acts on"""
+    if 'item_id' not in operation:
+        return operation['product_id']
+    if item_products is None:
+        # Anonymous cart lines are identified by product id
+        return operation['item_id']
+    if operation['item_id'] not in item_products:
+        raise CartBatchError('Item not in cart', index, status_code=404)
+    return item_products[operation['item_id']]
+
+
+def _save_lines(cart, lines, quantities):
+    """Write the difference between ``lines`` and ``quantities`` in at most three queries"""
+    now = timezone.now()
+    removed = [product_id for product_id in lines if product_id not in quantities]
+    if removed:
+        CartItem.objects.filter(cart=cart, product_id__in=removed).delete()
+    CartItem.objects.bulk_create([
+        CartItem(cart=cart, product_id=product_id, quantity=quantity)
+        for product_id, quantity in quantities.items()
+        if product_id not in lines
+    ])
+    CartItem.objects.bulk_update([
+        CartItem(id=lines[product_id][0], quantity=quantity, updated_at=now)
+        for product_id, quantity in quantities.items()
+        if product_id in lines and quantity != lines[product_id][1]
+    ], ['quantity', 'updated_at'])
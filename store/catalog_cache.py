@@ -0,0 +1,144 @@
+"""
+Versioned cache for public catalog responses.
+
+Every cache key embeds a global catalog version. Changing a product or
+one of its images bumps the version, which invalidates every cached page
+at once without having to find and delete individual keys; entries
+written under an old version simply expire.
+"""
+
+import hashlib
+import logging
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_KEY = 'catalog:version'
+CATALOG_MODIFIED_KEY = 'catalog:modified'
+CATALOG_HITS_KEY = 'catalog:stats:hits'
+CATALOG_MISSES_KEY = 'catalog:stats:misses'
+
+
+def get_catalog_timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+
+
+def _initial_version():
+    # Seeded from the clock so a flushed cache never reuses old versions,
+    # which would make stale ETags and in-process indexes look current
+    return int(time.time() * 1000)
+
+
+def get_catalog_version():
+    """Return the current catalog version, initialising it if needed"""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, _initial_version(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate all cached catalog responses"""
+    cache.set(CATALOG_MODIFIED_KEY, int(time.time()), timeout=None)
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        # Key missing or evicted - start a fresh sequence
+        cache.add(CATALOG_VERSION_KEY, _initial_version(), timeout=None)
+        return cache.incr(CATALOG_VERSION_KEY)
+
+
+def get_last_modified():
+    """Return the epoch timestamp of the last catalog change, if known"""
+    return cache.get(CATALOG_MODIFIED_KEY)
+
+
+def make_key(kind, *parts, version=None):
+    """Build a cache key scoped to the current catalog version.
+
+    Pass ``version`` when building many keys at once to avoid reading the
+    version from the cache for each one.
+    """
+    if version is None:
+        version = get_catalog_version()
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'catalog:v{version}:{kind}:{digest}'
+
+
+def list_key(request, language=None):
+    """Cache key for a list page; pagination links depend on the host.
+
+    Pass ``language`` for payloads with translated content.
+    """
+    params = sorted(request.query_params.lists())
+    parts = [request.get_host(), request.path, params]
+    if language is not None:
+        parts.append(language)
+    return make_key('list', *parts)
+
+
+def detail_key(slug, language=None):
+    return make_key('detail', slug) if language is None else make_key('detail', slug, language)
+
+
+def etag(key):
+    """Strong ETag for the payload stored under a versioned cache key"""
+    _, version, kind, digest = key.split(':')
+    return f'"{version}-{kind}-{digest}"'
+
+
+def lookup(key):
+    """Fetch a cached payload and record a hit or miss"""
+    data = cache.get(key)
+    _incr(CATALOG_HITS_KEY if data is not None else CATALOG_MISSES_KEY)
+    return data
+
+
+def lookup_many(keys):
+    """Fetch several cached payloads at once, returning {key: data} for hits"""
+    found = cache.get_many(keys)
+    if found:
+        _incr(CATALOG_HITS_KEY, len(found))
+    if len(found) < len(keys):
+        _incr(CATALOG_MISSES_KEY, len(keys) - len(found))
+    return found
+
+
+def store(key, data):
+    cache.set(key, data, get_catalog_timeout())
+
+
+def store_many(mapping):
+    cache.set_many(mapping, get_catalog_timeout())
+
+
+def get_stats():
+    """Return hit/miss counters for the catalog cache"""
+    values = cache.get_many([CATALOG_HITS_KEY, CATALOG_MISSES_KEY, CATALOG_VERSION_KEY])
+    hits = values.get(CATALOG_HITS_KEY, 0)
+    misses = values.get(CATALOG_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'version': values.get(CATALOG_VERSION_KEY),
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+    }
+
+
+def reset_stats():
+    cache.delete_many([CATALOG_HITS_KEY, CATALOG_MISSES_KEY])
+
+
+def _incr(key, delta=1):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, timeout=None):
+            cache.incr(key, delta)
+    except Exception as e:
+        # Counters are informational; never fail a request over them
+        logger.warning(f"Failed to update catalog cache counter {key}: {e}")
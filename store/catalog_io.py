@@ -0,0 +1,76 @@
+"""
+Shared format for the import_catalog / export_catalog commands.
+
+A catalog file is CSV (with a header row) or JSON Lines, one product per
+row, keyed by slug. Columns are the fields in CATALOG_FIELDS plus an
+optional ``images`` column: a list of file names (``|``-separated in CSV),
+primary image first.
+"""
+
+import csv
+import json
+from django.utils.text import slugify
+
+CATALOG_FIELDS = [
+    'slug', 'name', 'description', 'price', 'stock_quantity',
+    'length', 'width', 'height', 'weight', 'is_active',
+]
+REQUIRED_FIELDS = ['name', 'price', 'length', 'width', 'height', 'weight']
+IMAGES_COLUMN = 'images'
+IMAGE_SEPARATOR = '|'
+FORMATS = ['csv', 'jsonl']
+
+
+def detect_format(path, requested=None):
+    if requested:
+        return requested
+    return 'jsonl' if str(path).endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def read_rows(handle, file_format):
+    """Yield (line number, row dict) from an open catalog file"""
+    if file_format == 'csv':
+        reader = csv.DictReader(handle)
+        for row in reader:
+            if IMAGES_COLUMN in row:
+                images = row[IMAGES_COLUMN] or ''
+                row[IMAGES_COLUMN] = [name for name in images.split(IMAGE_SEPARATOR) if name.strip()]
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(handle, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+            continue
+        yield line_number, row
+
+
+class SlugAllocator:
+    """Hand out unique slugs for rows that do not carry one.
+
+    Slugs are derived from the product name; repeats within one import get
+    a numeric suffix. Everything happens in memory, so no query is needed
+    per row.
+    """
+
+    max_length = 200
+
+    def __init__(self):
+        self.taken = set()
+
+    def claim(self, slug):
+        self.taken.add(slug)
+
+    def allocate(self, name):
+        base = slugify(name)[:self.max_length] or 'product'
+        slug, counter = base, 2
+        while slug in self.taken:
+            suffix = f'-{counter}'
+            slug = base[:self.max_length - len(suffix)] + suffix
+            counter += 1
+        self.taken.add(slug)
+        return slug
@@ -0,0 +1,155 @@
+"""
+Filtering, sorting and facet counts for the product catalog.
+
+Query parameters:
+    min_price, max_price            price range
+    min_length ... max_weight       dimension / weight ranges
+    in_stock=true|false             availability
+    ordering=newest|price|-price|stock|best_selling|top_rated
+
+Facet counts for every bucket are computed in a single query with
+conditional aggregates. Each facet's counts apply all the other active
+filters but not its own, so a shopper can see what widening that
+filter would return. Bucket bounds are inclusive like min_*/max_*, so
+passing a bucket's min and max back as filters selects exactly the
+products it counted.
+"""
+
+from decimal import Decimal, InvalidOperation
+from django.db.models import Count, Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+class ProductFilterBackend(BaseFilterBackend):
+    RANGE_FIELDS = ['price', 'length', 'width', 'height', 'weight']
+
+    # Each ordering ends in id so it is unique, as keyset pagination requires
+    ORDERINGS = {
+        'newest': ('-created_at', '-id'),
+        'price': ('price', 'id'),
+        '-price': ('-price', '-id'),
+        'stock': ('-stock_quantity', '-id'),
+        # Rolling 30-day sales, ties broken by all-time sales (see sales)
+        'best_selling': ('-units_sold_30d', '-units_sold', '-id'),
+        # Stored average, ties broken by number of ratings (see reviews)
+        'top_rated': ('-rating_average', '-rating_count', '-id'),
+    }
+    DEFAULT_ORDERING = 'newest'
+
+    # Facet buckets as (key, lower bound inclusive, upper bound exclusive)
+    FACET_BUCKETS = {
+        'price': [
+            ('0-10', None, 10), ('10-25', 10, 25), ('25-50', 25, 50),
+            ('50-100', 50, 100), ('100+', 100, None),
+        ],
+        'weight': [
+            ('0-100', None, 100), ('100-500', 100, 500),
+            ('500-1000', 500, 1000), ('1000+', 1000, None),
+        ],
+        'length': [('0-10', None, 10), ('10-25', 10, 25), ('25+', 25, None)],
+        'width': [('0-10', None, 10), ('10-25', 10, 25), ('25+', 25, None)],
+        'height': [('0-10', None, 10), ('10-25', 10, 25), ('25+', 25, None)],
+    }
+    # Range fields all have two decimal places, so "below 10" is "at most 9.99"
+    RANGE_STEP = Decimal('0.01')
+
+    def filter_queryset(self, request, queryset, view):
+        # Filters and sorts only apply to collection endpoints
+        if getattr(view, 'detail', False):
+            return queryset
+        for condition in self.get_filters(request).values():
+            queryset = queryset.filter(condition)
+        return queryset.order_by(*self.get_ordering(request))
+
+    def get_filters(self, request):
+        """Return the active filters as {facet name: Q}"""
+        params = request.query_params
+        filters = {}
+
+        for field in self.RANGE_FIELDS:
+            condition = self._range(
+                field,
+                self._decimal_param(params, f'min_{field}'),
+                self._decimal_param(params, f'max_{field}'),
+            )
+            if condition:
+                filters[field] = condition
+
+        in_stock = params.get('in_stock')
+        if in_stock is not None:
+            if in_stock.lower() not in ('true', 'false'):
+                raise ValidationError({'in_stock': 'Must be true or false.'})
+            filters['in_stock'] = (
+                Q(stock_quantity__gt=0) if in_stock.lower() == 'true' else Q(stock_quantity=0)
+            )
+
+        return filters
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get('ordering', self.DEFAULT_ORDERING)
+        if ordering not in self.ORDERINGS:
+            raise ValidationError({'ordering': f'Must be one of: {", ".join(self.ORDERINGS)}.'})
+        return self.ORDERINGS[ordering]
+
+    def get_facet_counts(self, request, queryset):
+        """Count products per facet bucket in one conditional-aggregate query"""
+        filters = self.get_filters(request)
+
+        def other_filters(facet):
+            condition = Q()
+            for name, active in filters.items():
+                if name != facet:
+                    condition &= active
+            return condition
+
+        aggregates = {'total': self._count(other_filters(None))}
+        labels = {}
+        for facet, buckets in self.FACET_BUCKETS.items():
+            for key, lower, upper in buckets:
+                alias = f'{facet}__{len(labels)}'
+                maximum = None if upper is None else Decimal(upper) - self.RANGE_STEP
+                labels[alias] = (facet, key, lower, maximum)
+                aggregates[alias] = self._count(self._range(facet, lower, maximum) & other_filters(facet))
+        for key, condition in (('true', Q(stock_quantity__gt=0)), ('false', Q(stock_quantity=0))):
+            alias = f'in_stock__{len(labels)}'
+            labels[alias] = ('in_stock', key, None, None)
+            aggregates[alias] = self._count(condition & other_filters('in_stock'))
+
+        counts = queryset.order_by().aggregate(**aggregates)
+
+        facets = {facet: [] for facet in list(self.FACET_BUCKETS) + ['in_stock']}
+        for alias, (facet, key, minimum, maximum) in labels.items():
+            bucket = {'key': key, 'count': counts[alias]}
+            if facet != 'in_stock':
+                bucket['min'] = minimum
+                bucket['max'] = maximum
+            facets[facet].append(bucket)
+        return {'count': counts['total'], 'facets': facets}
+
+    @staticmethod
+    def _range(field, minimum, maximum):
+        """Q for ``minimum <= field <= maximum``; either bound may be None"""
+        condition = Q()
+        if minimum is not None:
+            condition &= Q(**{f'{field}__gte': minimum})
+        if maximum is not None:
+            condition &= Q(**{f'{field}__lte': maximum})
+        return condition
+
+    @staticmethod
+    def _count(condition):
+        return Count('id', filter=condition) if condition else Count('id')
+
+    @staticmethod
+    def _decimal_param(params, name):
+        value = params.get(name)
+        if value in (None, ''):
+            return None
+        try:
+            number = Decimal(value)
+        except InvalidOperation:
+            number = None
+        if number is None or not number.is_finite():
+            raise ValidationError({name: 'Must be a number.'})
+        return number
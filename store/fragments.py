@@ -0,0 +1,102 @@
+"""
+Pre-encoded JSON fragments for product list pages.
+
+Each product's ProductListSerializer output is cached as encoded JSON
+bytes under a key built from its id, ``updated_at`` and language. List pages are
+assembled by splicing the cached fragments into the pagination envelope,
+so a page costs no per-field serializer work once its products have
+been seen. Saving a product, or changing one of its images or
+translations (which touches the product's ``updated_at``, see signals),
+moves it to a new key; old fragments simply expire.
+
+Fragments do not depend on the catalog version, so they survive the
+catalog cache invalidation that follows every product change.
+"""
+
+import json
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from . import translations
+from .models import primary_image_prefetch
+from .serializers import ProductListSerializer
+
+
+def get_fragment_timeout():
+    return getattr(settings, 'PRODUCT_FRAGMENT_TIMEOUT', 86400)
+
+
+def fragment_key(product, language=translations.DEFAULT_LANGUAGE):
+    version = int(product.updated_at.timestamp() * 1_000_000)
+    return f'product:fragment:{language}:{product.pk}:{version}'
+
+
+def get_fragments(products, language=translations.DEFAULT_LANGUAGE, prefetch=None):
+    """Return the encoded list representation of each product, in order.
+
+    ``products`` may be Product or ProductListing rows. Misses are
+    serialized together after a single primary image prefetch, given by
+    ``prefetch`` (the ordered images prefetch for products by default),
+    and one translation query for languages other than English.
+    """
+    products = list(products)
+    keys = [fragment_key(product, language) for product in products]
+    found = cache.get_many(keys)
+
+    missing = [product for product, key in zip(products, keys) if key not in found]
+    if missing:
+        prefetch_related_objects(missing, prefetch or primary_image_prefetch())
+        translations.attach(missing, language)
+        renderer = JSONRenderer()
+        fresh = {
+            fragment_key(product, language): renderer.render(data)
+            for product, data in zip(missing, ProductListSerializer(missing, many=True).data)
+        }
+        cache.set_many(fresh, get_fragment_timeout())
+        found.update(fresh)
+
+    return [found[key] for key in keys]
+
+
+def render_page(envelope, fragments):
+    """Encode a pagination envelope with the fragments as its results"""
+    head = JSONRenderer().render({name: value for name, value in envelope.items() if name != 'results'})
+    results = b'"results":[' + b','.join(fragments) + b']}'
+    # Re-open the encoded envelope object to append the results member
+    return head[:-1] + (b',' if len(head) > 2 else b'') + results
+
+
+class PreEncodedResponse(Response):
+    """A Response whose JSON body has already been encoded.
+
+    JSON requests get the bytes as they are. Other renderers (the
+    browsable API) and ``.data`` use the decoded payload.
+    """
+
+    def __init__(self, content, **kwargs):
+        self.encoded_content = content
+        self._decoded = None
+        super().__init__(None, **kwargs)
+
+    @property
+    def data(self):
+        if self._decoded is None:
+            self._decoded = json.loads(self.encoded_content)
+        return self._decoded
+
+    @data.setter
+    def data(self, value):
+        if value is not None:
+            self._decoded = value
+
+    @property
+    def rendered_content(self):
+        renderer = getattr(self, 'accepted_renderer', None)
+        if not isinstance(renderer, JSONRenderer):
+            return super().rendered_content
+        media_type = renderer.media_type
+        self['Content-Type'] = f'{media_type}; charset={renderer.charset}' if renderer.charset else media_type
+        return self.encoded_content
@@ -0,0 +1,69 @@
+"""
+Responsive derivatives for product images.
+
+Each ProductImage gets fixed-width WebP and JPEG renditions plus a tiny
+blurred placeholder, generated once by the ``generate_image_variants``
+management command in a process pool, outside the request cycle. The
+results are recorded on ``ProductImage.variants`` / ``placeholder``.
+
+render_variants() is deliberately free of Django so it can run in
+worker processes; the command does all storage and database work.
+"""
+
+import base64
+import io
+from PIL import Image, ImageFilter, ImageOps
+
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'jpeg': ('JPEG', 'jpg'),
+}
+PLACEHOLDER_WIDTH = 16
+
+
+def variant_path(image_id, width, extension):
+    return f'products/variants/{image_id}/{width}.{extension}'
+
+
+def render_variants(data, widths, quality=80):
+    """Render resized copies of an encoded image.
+
+    Returns ``(original_size, renditions, placeholder)`` where renditions
+    maps ``(format, width)`` to encoded bytes and placeholder is a data URI.
+    Widths larger than the original are skipped; the original width is
+    always included so small uploads still get converted copies.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        image = _to_rgb(image)
+
+    original_width, original_height = image.size
+    targets = sorted({width for width in widths if width < original_width} | {original_width})
+
+    renditions = {}
+    for width in targets:
+        height = max(1, round(original_height * width / original_width))
+        resized = image if width == original_width else image.resize((width, height), Image.LANCZOS)
+        for name, (pillow_format, _) in VARIANT_FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, pillow_format, quality=quality, optimize=True)
+            renditions[(name, width)] = buffer.getvalue()
+
+    return (original_width, original_height), renditions, _placeholder(image)
+
+
+def _to_rgb(image):
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _placeholder(image):
+    height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+    tiny = image.resize((PLACEHOLDER_WIDTH, height), Image.BILINEAR).filter(ImageFilter.GaussianBlur(1))
+    buffer = io.BytesIO()
+    tiny.save(buffer, 'JPEG', quality=40)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
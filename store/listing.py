@@ -0,0 +1,80 @@
+"""
+Maintenance of the ProductListing read model.
+
+The storefront list reads one denormalized row per active product
+(price, stock, in_stock, dimensions, primary image and sort keys)
+instead of evaluating Product and ProductImage on every request.
+
+``store_productlisting`` is a plain table on every database. Its rows
+are rewritten from LISTING_SELECT inside the transaction that changed
+the product (see signals), so the list is never stale and a change,
+including a stock deduction at checkout, costs one row upsert rather
+than a rebuild of the whole read model. refresh_all() rebuilds it after
+bulk writes that skip signals.
+"""
+
+from django.db import connection, transaction
+
+# Keep in sync with migration 0021_product_listing_table
+LISTING_SELECT = """
+    SELECT p.id, p.name, p.slug, p.price, p.stock_quantity,
+           p.stock_quantity > 0 AS in_stock,
+           p.length, p.width, p.height, p.weight,
+           p.units_sold, p.units_sold_30d,
+           p.rating_count, p.rating_average,
+           (SELECT i.id FROM store_productimage i
+             WHERE i.product_id = p.id
+             ORDER BY i.is_primary DESC, i."order", i.id
+             LIMIT 1) AS primary_image_id,
+           p.created_at, p.updated_at
+      FROM store_product p
+     WHERE p.is_active
+"""
+
+LISTING_COLUMNS = (
+    'id', 'name', 'slug', 'price', 'stock_quantity', 'in_stock',
+    'length', 'width', 'height', 'weight',
+    'units_sold', 'units_sold_30d', 'rating_count', 'rating_average',
+    'primary_image_id', 'created_at', 'updated_at',
+)
+
+# {placeholders} is the list of product ids; a product's row is replaced
+# in place so concurrent refreshes of the same product cannot collide
+UPSERT_SQL = f"""
+    INSERT INTO store_productlisting ({', '.join(LISTING_COLUMNS)})
+    {LISTING_SELECT} AND p.id IN ({{placeholders}})
+    ON CONFLICT (id) DO UPDATE
+    SET {', '.join(f'{column} = excluded.{column}' for column in LISTING_COLUMNS[1:])}
+"""
+
+DELETE_SQL = """
+    DELETE FROM store_productlisting
+     WHERE id IN ({placeholders})
+       AND NOT EXISTS (SELECT 1 FROM store_product p WHERE p.id = store_productlisting.id AND p.is_active)
+"""
+
+
+def product_changed(product_id):
+    """Bring the read model up to date after a product or image change"""
+    refresh_rows([product_id])
+
+
+def products_changed(product_ids):
+    refresh_rows(list(product_ids))
+
+
+def refresh_rows(product_ids):
+    """Rewrite the listing rows for ``product_ids``, dropping inactive or deleted products"""
+    if not product_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(product_ids))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(DELETE_SQL.format(placeholders=placeholders), product_ids)
+        cursor.execute(UPSERT_SQL.format(placeholders=placeholders), product_ids)
+
+
+def refresh_all():
+    """Rebuild the whole read model, e.g. after bulk writes that skip signals"""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("DELETE FROM store_productlisting")
+        cursor.execute(f"INSERT INTO store_productlisting ({', '.join(LISTING_COLUMNS)}) {LISTING_SELECT}")
@@ -0,0 +1,42 @@
+"""
+Management command to build the static catalog snapshot.
+Renders list pages and per-product detail JSON for the active catalog
+into STATIC_ROOT/catalog with pre-compressed copies, then swaps the new
+build in atomically. Schedule it with --if-stale (e.g. every minute):
+that only builds when something the snapshot renders has changed since
+the live build (stock and sales counters do not count), and only one
+process builds at a time.
+"""
+from django.core.management.base import BaseCommand
+from store import snapshot
+
+
+class Command(BaseCommand):
+    help = 'Render the active catalog into pre-compressed static JSON files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--if-stale',
+            action='store_true',
+            help='Only build if the live snapshot is older than the catalog'
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=None,
+            help='Products per list page (default: CATALOG_SNAPSHOT_PAGE_SIZE)'
+        )
+
+    def handle(self, *args, **options):
+        if options['if_stale']:
+            summary = snapshot.rebuild_if_stale(page_size=options['page_size'])
+            if summary is None:
+                self.stdout.write('Catalog snapshot is current (or another build is running).')
+                return
+        else:
+            summary = snapshot.build_snapshot(page_size=options['page_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Built catalog snapshot v{summary['version']}: "
+            f"{summary['products']} products in {summary['pages']} pages"
+        ))
@@ -0,0 +1,40 @@
+"""
+Management command to update "frequently bought together" data.
+Adds co-purchase counts for orders paid since the previous run (see
+store.recommendations), so a nightly cron run only reads new orders.
+Run it with --full after refresh_sales_counters --backfill, which
+rewrites when orders were counted.
+"""
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from store import catalog_cache, recommendations, snapshot
+
+
+class Command(BaseCommand):
+    help = 'Update product co-purchase counts from new completed orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Discard existing counts and recount every order'
+        )
+        parser.add_argument(
+            '--settle-minutes',
+            type=int,
+            default=None,
+            help='Leave orders younger than this for the next run (default: RECOMMENDATIONS_SETTLE_MINUTES)'
+        )
+
+    def handle(self, *args, **options):
+        settle = None
+        if options['settle_minutes'] is not None:
+            settle = timedelta(minutes=options['settle_minutes'])
+
+        orders, pairs = recommendations.update_associations(full=options['full'], settle=settle)
+        if pairs or options['full']:
+            # Product detail responses embed the recommendations
+            catalog_cache.bump_catalog_version()
+            snapshot.mark_stale()
+
+        self.stdout.write(self.style.SUCCESS(f'Counted {orders} orders, updated {pairs} product pairs'))
@@ -0,0 +1,26 @@
+"""
+Management command to build the static sitemaps.
+Streams the active catalog's slugs into a sitemap index and chunked
+sub-sitemaps under STATIC_ROOT/sitemaps with pre-compressed copies, then
+swaps the new build in atomically. Intended to run from cron.
+"""
+from django.core.management.base import BaseCommand
+from store import sitemaps
+
+
+class Command(BaseCommand):
+    help = 'Write the sitemap index and product sitemaps as pre-compressed static files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Product URLs per sitemap file (default: SITEMAP_CHUNK_SIZE, at most 50000)'
+        )
+
+    def handle(self, *args, **options):
+        summary = sitemaps.build_sitemaps(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Built sitemaps: {summary['products']} products in {summary['sitemaps']} files"
+        ))
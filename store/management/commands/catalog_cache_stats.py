@@ -0,0 +1,39 @@
+"""
+Management command to report catalog cache effectiveness.
+Shows the current catalog version and hit/miss counters.
+"""
+from django.core.management.base import BaseCommand
+from store import catalog_cache
+
+
+class Command(BaseCommand):
+    help = 'Show catalog cache hit/miss counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Reset the hit/miss counters after reporting them'
+        )
+        parser.add_argument(
+            '--invalidate',
+            action='store_true',
+            help='Bump the catalog version, invalidating every cached response'
+        )
+
+    def handle(self, *args, **options):
+        stats = catalog_cache.get_stats()
+        hit_rate = f"{stats['hit_rate']:.1%}" if stats['hit_rate'] is not None else 'n/a'
+
+        self.stdout.write(f"Catalog version: {stats['version']}")
+        self.stdout.write(f"Hits: {stats['hits']}")
+        self.stdout.write(f"Misses: {stats['misses']}")
+        self.stdout.write(f"Hit rate: {hit_rate}")
+
+        if options['invalidate']:
+            version = catalog_cache.bump_catalog_version()
+            self.stdout.write(self.style.SUCCESS(f'Catalog cache invalidated (now version {version})'))
+
+        if options['reset']:
+            catalog_cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Catalog cache counters reset'))
@@ -0,0 +1,84 @@
+"""
+Management command to export the product catalog as CSV or JSON Lines.
+Products are streamed from the database in chunks, so memory use stays
+flat regardless of catalog size. The output can be fed back into
+import_catalog.
+"""
+import csv
+import json
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from store.catalog_io import CATALOG_FIELDS, FORMATS, IMAGE_SEPARATOR, IMAGES_COLUMN, detect_format
+from store.models import Product, primary_image_prefetch
+
+
+class Command(BaseCommand):
+    help = 'Export products to a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default='-',
+            help='Output file (default: standard output)'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='File format (default: from the file extension, csv for standard output)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Rows fetched from the database at a time (default: 2000)'
+        )
+        parser.add_argument(
+            '--active-only',
+            action='store_true',
+            help='Only export active products'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = detect_format('' if path == '-' else path, options['format'])
+
+        products = Product.objects.order_by('id').only(*CATALOG_FIELDS)
+        if options['active_only']:
+            products = products.filter(is_active=True)
+        products = products.prefetch_related(primary_image_prefetch()).iterator(
+            chunk_size=max(options['chunk_size'], 1)
+        )
+
+        if path == '-':
+            count = self.write(sys.stdout, file_format, products)
+        else:
+            try:
+                with open(path, 'w', newline='', encoding='utf-8') as handle:
+                    count = self.write(handle, file_format, products)
+            except OSError as e:
+                raise CommandError(f'Cannot write {path}: {e}')
+            self.stdout.write(self.style.SUCCESS(f'Exported {count} products to {path}'))
+
+    def write(self, handle, file_format, products):
+        count = 0
+        if file_format == 'csv':
+            writer = csv.DictWriter(handle, fieldnames=CATALOG_FIELDS + [IMAGES_COLUMN])
+            writer.writeheader()
+            for product in products:
+                row = self.serialize(product)
+                row[IMAGES_COLUMN] = IMAGE_SEPARATOR.join(row[IMAGES_COLUMN])
+                writer.writerow(row)
+                count += 1
+        else:
+            for product in products:
+                handle.write(json.dumps(self.serialize(product), cls=DjangoJSONEncoder) + '\n')
+                count += 1
+        return count
+
+    @staticmethod
+    def serialize(product):
+        row = {name: getattr(product, name) for name in CATALOG_FIELDS}
+        row[IMAGES_COLUMN] = [image.image.name for image in product.ordered_images]
+        return row
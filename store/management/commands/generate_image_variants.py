@@ -0,0 +1,111 @@
+"""
+Management command to generate responsive renditions of product images.
+Resizes originals into fixed-width WebP and JPEG copies plus a blurred
+placeholder using a pool of worker processes, then records them on each
+ProductImage. Safe to run repeatedly (e.g. from cron): only images
+without current variants are processed unless --force is given.
+"""
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from store import catalog_cache, listing, snapshot
+from store.images import VARIANT_FORMATS, render_variants, variant_path
+from store.models import Product, ProductImage
+
+
+class Command(BaseCommand):
+    help = 'Generate WebP/JPEG renditions and placeholders for product images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Number of worker processes (default: number of CPUs)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate variants even if they are up to date'
+        )
+
+    def handle(self, *args, **options):
+        widths = settings.IMAGE_VARIANT_WIDTHS
+        quality = settings.IMAGE_VARIANT_QUALITY
+
+        pending = [
+            image for image in ProductImage.objects.only('id', 'product_id', 'image', 'variants').iterator(chunk_size=500)
+            if image.image and (options['force'] or not image.has_current_variants())
+        ]
+        if not pending:
+            self.stdout.write(self.style.SUCCESS('All product images have current variants.'))
+            return
+
+        self.stdout.write(f'Generating variants for {len(pending)} images...')
+        generated = failed = 0
+
+        workers = options['workers'] or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Bound the originals held in memory to a few per worker
+            max_in_flight = workers * 2
+            in_flight = {}
+            for image in pending:
+                try:
+                    with image.image.open('rb') as source:
+                        data = source.read()
+                except (OSError, ValueError) as e:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'  Skipping image {image.id}: {e}'))
+                    continue
+                in_flight[pool.submit(render_variants, data, widths, quality)] = image
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if self.collect(future, in_flight.pop(future)):
+                            generated += 1
+                        else:
+                            failed += 1
+
+            for future in as_completed(list(in_flight)):
+                if self.collect(future, in_flight.pop(future)):
+                    generated += 1
+                else:
+                    failed += 1
+
+        if generated:
+            # Variants are written with update(), which bypasses model signals
+            listing.refresh_all()
+            catalog_cache.bump_catalog_version()
+            snapshot.mark_stale()
+
+        self.stdout.write(self.style.SUCCESS(f'Generated variants for {generated} images ({failed} failed)'))
+
+    def collect(self, future, image):
+        """Store a finished rendition job; returns True on success"""
+        try:
+            size, renditions, placeholder = future.result()
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f'  Failed image {image.id}: {e}'))
+            return False
+        self.save_variants(image, size, renditions, placeholder)
+        return True
+
+    def save_variants(self, image, size, renditions, placeholder):
+        storage = image.image.storage
+        variants = {
+            'source': image.image.name,
+            'width': size[0],
+            'height': size[1],
+        }
+        for (image_format, width), content in renditions.items():
+            path = variant_path(image.id, width, VARIANT_FORMATS[image_format][1])
+            if storage.exists(path):
+                storage.delete(path)
+            variants.setdefault(image_format, {})[str(width)] = storage.save(path, ContentFile(content))
+
+        ProductImage.objects.filter(pk=image.pk).update(variants=variants, placeholder=placeholder)
+        # List fragments embed the srcset and are keyed by updated_at
+        Product.objects.filter(pk=image.product_id).update(updated_at=timezone.now())
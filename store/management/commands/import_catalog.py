@@ -0,0 +1,270 @@
+"""
+Management command to bulk import products from a CSV or JSON Lines file.
+Rows are streamed and upserted by slug in chunks: new products are
+inserted with bulk_create and existing ones updated with bulk_update,
+touching only the columns present in each row. Images are attached from
+a local directory; names must stay inside it, and a stored file is only
+reused when its content matches. Model signals are bypassed, so stock levels are
+written through per chunk and the search index, listing read model and
+catalog cache are refreshed once at the end.
+"""
+import hashlib
+import os
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from store import catalog_cache, listing, search, snapshot, stock
+from store.catalog_io import (
+    CATALOG_FIELDS, FORMATS, IMAGES_COLUMN, REQUIRED_FIELDS, SlugAllocator, detect_format, read_rows,
+)
+from store.models import Product, ProductImage
+
+DEFAULTS = {'description': '', 'stock_quantity': 0, 'is_active': True}
+# Written with the description, since bulk writes skip Product.save()
+RENDERED_FIELDS = ['description_html', 'description_renderer']
+
+
+class Command(BaseCommand):
+    help = 'Import or update products in bulk from a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Catalog file to import')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='File format (default: from the file extension)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Rows written per transaction (default: 1000)'
+        )
+        parser.add_argument(
+            '--images-dir',
+            help='Directory containing the image files named in the images column'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = detect_format(path, options['format'])
+        self.chunk_size = max(options['chunk_size'], 1)
+        self.images_dir = options['images_dir']
+        if self.images_dir and not os.path.isdir(self.images_dir):
+            raise CommandError(f'Images directory not found: {self.images_dir}')
+
+        self.slugs = SlugAllocator()
+        self.created = self.updated = self.images_attached = 0
+        self.errors = []
+
+        try:
+            handle = open(path, newline='', encoding='utf-8-sig')
+        except OSError as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+
+        with handle:
+            chunk = []
+            for line_number, row in read_rows(handle, file_format):
+                parsed = self.parse_row(line_number, row)
+                if parsed is not None:
+                    chunk.append(parsed)
+                if len(chunk) >= self.chunk_size:
+                    self.write_chunk(chunk)
+                    chunk = []
+            if chunk:
+                self.write_chunk(chunk)
+
+        if self.created or self.updated:
+            indexed = search.rebuild_index()
+            if indexed is not None:
+                self.stdout.write(f'Rebuilt search index ({indexed} products)')
+            listing.refresh_all()
+            catalog_cache.bump_catalog_version()
+            snapshot.mark_stale()
+
+        for line_number, message in self.errors[:20]:
+            self.stdout.write(self.style.WARNING(f'  Line {line_number}: {message}'))
+        if len(self.errors) > 20:
+            self.stdout.write(self.style.WARNING(f'  ... and {len(self.errors) - 20} more errors'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported catalog: {self.created} created, {self.updated} updated, '
+            f'{self.images_attached} images attached, {len(self.errors)} rows skipped'
+        ))
+
+    def parse_row(self, line_number, row):
+        """Validate a raw row, returning (line number, values, images) or None"""
+        if not isinstance(row, dict):
+            self.errors.append((line_number, f'Invalid row: {row}'))
+            return None
+
+        values = {}
+        try:
+            for name in CATALOG_FIELDS:
+                if name not in row or name == 'slug':
+                    continue
+                raw = row[name]
+                if raw in (None, ''):
+                    if name in REQUIRED_FIELDS:
+                        raise ValidationError({name: ['This field is required.']})
+                    values[name] = DEFAULTS[name]
+                    continue
+                if isinstance(raw, float):
+                    # Avoid binary float artefacts in decimal columns
+                    raw = str(raw)
+                values[name] = Product._meta.get_field(name).clean(raw, None)
+
+            slug = row.get('slug') or ''
+            if slug:
+                slug = Product._meta.get_field('slug').clean(slug, None)
+                self.slugs.claim(slug)
+            elif 'name' in values:
+                slug = self.slugs.allocate(values['name'])
+            else:
+                raise ValidationError({'slug': ['Either slug or name is required.']})
+        except ValidationError as e:
+            messages = e.message_dict if hasattr(e, 'error_dict') else {'row': e.messages}
+            self.errors.append((line_number, '; '.join(
+                f'{field}: {" ".join(errors)}' for field, errors in messages.items()
+            )))
+            return None
+
+        images = row.get(IMAGES_COLUMN)
+        if images is not None and not isinstance(images, list):
+            self.errors.append((line_number, 'images: Must be a list of file names.'))
+            return None
+        return line_number, slug, values, images
+
+    def write_chunk(self, chunk):
+        # Later rows for the same slug win
+        rows = {slug: (line_number, values, images) for line_number, slug, values, images in chunk}
+        now = timezone.now()
+
+        with transaction.atomic():
+            existing = dict(Product.objects.filter(slug__in=list(rows)).values_list('slug', 'id'))
+
+            new_products = []
+            updates = {}
+            for slug, (line_number, values, images) in rows.items():
+                if slug in existing:
+                    product = Product(id=existing[slug], slug=slug, updated_at=now, **values)
+                    fields = sorted(values)
+                    if 'description' in values:
+                        product.render_description()
+                        fields += RENDERED_FIELDS
+                    updates.setdefault(tuple(fields), []).append(product)
+                    continue
+                missing = [name for name in REQUIRED_FIELDS if name not in values]
+                if missing:
+                    self.errors.append((line_number, f'New product is missing: {", ".join(missing)}'))
+                    continue
+                product = Product(slug=slug, **{**DEFAULTS, **values})
+                product.render_description()
+                new_products.append(product)
+
+            if new_products:
+                # update_conflicts covers rows created concurrently since the lookup above
+                Product.objects.bulk_create(
+                    new_products,
+                    batch_size=500,
+                    update_conflicts=True,
+                    unique_fields=['slug'],
+                    update_fields=[name for name in CATALOG_FIELDS if name != 'slug'] + RENDERED_FIELDS + ['updated_at'],
+                )
+                self.created += len(new_products)
+
+            # Rows only overwrite the columns they provide
+            for fields, products in updates.items():
+                Product.objects.bulk_update(products, list(fields) + ['updated_at'], batch_size=500)
+                self.updated += len(products)
+
+            # Bulk writes skip the save signals that keep stock levels current
+            transaction.on_commit(lambda: stock.refresh(Product.objects.filter(slug__in=list(rows))))
+
+            if self.images_dir:
+                with_images = {slug: images for slug, (_, _, images) in rows.items() if images is not None}
+                if with_images:
+                    self.attach_images(with_images)
+
+    def attach_images(self, images_by_slug):
+        """Replace product images where the listed files differ from the current ones"""
+        product_ids = dict(Product.objects.filter(slug__in=list(images_by_slug)).values_list('slug', 'id'))
+        current = {}
+        for product_id, name in (
+            ProductImage.objects.filter(product_id__in=product_ids.values())
+            .order_by('product_id', '-is_primary', 'order', 'id')
+            .values_list('product_id', 'image')
+        ):
+            current.setdefault(product_id, []).append(name)
+
+        storage = ProductImage._meta.get_field('image').storage
+        replaced, new_images = [], []
+        for slug, names in images_by_slug.items():
+            product_id = product_ids.get(slug)
+            if product_id is None:
+                continue
+            names = [name.strip() for name in names]
+            sources = [self.source_path(name) for name in names]
+            if self.same_images(storage, current.get(product_id, []), sources):
+                continue
+
+            stored = [self.store_image(storage, name, source) for name, source in zip(names, sources) if source]
+            replaced.append(product_id)
+            new_images.extend(
+                ProductImage(product_id=product_id, image=path, is_primary=(order == 0), order=order)
+                for order, path in enumerate(path for path in stored if path)
+            )
+
+        if replaced:
+            ProductImage.objects.filter(product_id__in=replaced).delete()
+            ProductImage.objects.bulk_create(new_images, batch_size=500)
+            self.images_attached += len(new_images)
+
+    def source_path(self, name):
+        """``name`` resolved inside --images-dir, or None if it points outside it"""
+        root = os.path.realpath(self.images_dir)
+        path = os.path.realpath(os.path.join(root, name))
+        if os.path.commonpath([root, path]) != root:
+            self.errors.append(('-', f'Image {name}: outside the images directory'))
+            return None
+        return path
+
+    def same_images(self, storage, stored, sources):
+        """Whether the stored files hold exactly the source files, in order"""
+        if len(stored) != len(sources) or None in sources:
+            return False
+        return all(self.same_file(storage, name, source) for name, source in zip(stored, sources))
+
+    def same_file(self, storage, name, source):
+        try:
+            if storage.size(name) != os.path.getsize(source):
+                return False
+            with storage.open(name, 'rb') as stored, open(source, 'rb') as handle:
+                return file_digest(stored) == file_digest(handle)
+        except OSError:
+            return False
+
+    def store_image(self, storage, name, source):
+        """Copy an image into media storage, reusing an identical existing copy.
+
+        A different file already stored under the same name is left alone;
+        storage.save() picks a free name for the new one.
+        """
+        target = f'products/{os.path.basename(source)}'
+        try:
+            if storage.exists(target) and self.same_file(storage, target, source):
+                return target
+            with open(source, 'rb') as handle:
+                return storage.save(target, File(handle))
+        except OSError as e:
+            self.errors.append(('-', f'Image {name}: {e}'))
+            return None
+
+
+def file_digest(handle):
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: handle.read(64 * 1024), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,102 @@
+"""
+Management command to delete abandoned anonymous carts and expired sessions.
+Anonymous Cart rows untouched for --days (by the cart or any of its items)
+and django_session rows past their expiry are deleted in primary-key
+batches of --batch-size, each in its own short transaction, sleeping
+--sleep seconds in between so locks are held briefly and replicas keep
+up. Schedule it daily; --dry-run only reports what would be deleted.
+"""
+import datetime
+import time
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Exists, Min, OuterRef
+from django.utils import timezone
+from store.models import Cart, CartItem
+
+
+class Command(BaseCommand):
+    help = 'Delete anonymous carts untouched for N days and expired sessions, in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Delete anonymous carts not updated for this many days (default: 30)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows deleted per transaction (default: 1000)'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.1,
+            help='Seconds to pause between batches (default: 0.1)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be deleted without deleting anything'
+        )
+
+    def handle(self, *args, **options):
+        for option in ('days', 'batch_size'):
+            if options[option] <= 0:
+                raise CommandError(f"--{option.replace('_', '-')} must be greater than 0")
+        if options['sleep'] < 0:
+            raise CommandError('--sleep must not be negative')
+
+        now = timezone.now()
+        cutoff = now - datetime.timedelta(days=options['days'])
+        carts = stale_carts(cutoff)
+        sessions = Session.objects.filter(expire_date__lt=now)
+
+        if options['dry_run']:
+            oldest = carts.aggregate(oldest=Min('updated_at'))['oldest']
+            self.stdout.write(self.style.WARNING(
+                f'DRY RUN: Would delete {carts.count()} anonymous carts not updated since '
+                f'{cutoff:%Y-%m-%d %H:%M:%S}'
+                + (f' (oldest {oldest:%Y-%m-%d})' if oldest else '')
+            ))
+            self.stdout.write(self.style.WARNING(f'DRY RUN: Would delete {sessions.count()} expired sessions'))
+            return
+
+        batch_size, pause = options['batch_size'], options['sleep']
+        deleted_carts = delete_in_batches(carts, batch_size, pause)
+        deleted_sessions = delete_in_batches(sessions, batch_size, pause)
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted_carts} anonymous carts and {deleted_sessions} expired sessions'
+        ))
+
+
+def stale_carts(cutoff):
+    """Anonymous carts whose row and items were all last changed before ``cutoff``"""
+    recent_items = CartItem.objects.filter(cart=OuterRef('pk'), updated_at__gte=cutoff)
+    return Cart.objects.filter(customer__isnull=True, updated_at__lt=cutoff).exclude(Exists(recent_items))
+
+
+def delete_in_batches(queryset, batch_size, pause):
+    """Delete ``queryset`` walking its primary key; returns the number of rows deleted"""
+    model = queryset.model
+    total, last = 0, None
+    while True:
+        batch = queryset.order_by('pk')
+        if last is not None:
+            batch = batch.filter(pk__gt=last)
+        ids = list(batch.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return total
+        with transaction.atomic():
+            # The filter is applied again, skipping rows touched since they were read;
+            # a cart's items go in the same transaction
+            deleted = queryset.filter(pk__in=ids).delete()[1]
+        total += deleted.get(model._meta.label, 0)
+        last = ids[-1]
+        if len(ids) < batch_size:
+            return total
+        time.sleep(pause)
@@ -0,0 +1,18 @@
+"""
+Management command to rebuild the product search index.
+Only needed on SQLite after bulk writes that bypass model signals;
+PostgreSQL maintains its search column automatically.
+"""
+from django.core.management.base import BaseCommand
+from store import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the SQLite full-text product search index'
+
+    def handle(self, *args, **options):
+        count = search.rebuild_index()
+        if count is None:
+            self.stdout.write('Search index is maintained by the database; nothing to rebuild.')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Indexed {count} products'))
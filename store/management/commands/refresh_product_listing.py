@@ -0,0 +1,16 @@
+"""
+Management command to refresh the storefront list read model.
+Rows are kept current by model signals; this rebuilds the whole table,
+e.g. after writes made with update() or raw SQL.
+"""
+from django.core.management.base import BaseCommand
+from store import listing
+from store.models import ProductListing
+
+
+class Command(BaseCommand):
+    help = 'Refresh the ProductListing read model used by the product list'
+
+    def handle(self, *args, **options):
+        listing.refresh_all()
+        self.stdout.write(self.style.SUCCESS(f'Product listing refreshed ({ProductListing.objects.count()} products)'))
@@ -0,0 +1,28 @@
+"""
+Management command to maintain the product sales counters.
+By default it expires orders that have left the rolling 30-day window
+from units_sold_30d, reading only orders counted since the last run;
+schedule it daily. --backfill recomputes both counters from the full
+order history, e.g. after deploying them or repairing data.
+"""
+from django.core.management.base import BaseCommand
+from store import sales
+
+
+class Command(BaseCommand):
+    help = 'Expire the rolling 30-day sales counters, or backfill all counters from order history'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='Recompute units_sold and units_sold_30d from all orders'
+        )
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            updated = sales.backfill()
+            self.stdout.write(self.style.SUCCESS(f'Backfilled sales counters for {updated} products'))
+        else:
+            updated = sales.expire_recent()
+            self.stdout.write(self.style.SUCCESS(f'Expired 30-day sales for {updated} products'))
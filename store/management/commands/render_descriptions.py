@@ -0,0 +1,61 @@
+"""
+Management command to re-render product descriptions to HTML.
+Renders the Markdown description of every product and translation whose
+stored rendering came from a different renderer version (see
+store.markup), or of all rows with --all. Run it after deploying a
+Markdown/nh3 upgrade or a change to the allowed tags. Rows are updated
+in batches with bulk_update, so model signals are skipped and the
+catalog cache is invalidated once at the end.
+"""
+from django.core.management.base import BaseCommand
+from store import catalog_cache, snapshot
+from store.markup import RENDERER_VERSION
+from store.models import Product, ProductTranslation
+
+RENDERED_FIELDS = ['description_html', 'description_renderer']
+
+
+class Command(BaseCommand):
+    help = 'Re-render stale Markdown product descriptions to sanitized HTML'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Re-render every description, not only stale ones'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows rendered and written per batch (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for model in (Product, ProductTranslation):
+            rendered = self.render(model, options['all'], options['batch_size'])
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {rendered} rendered')
+            total += rendered
+
+        if total:
+            catalog_cache.bump_catalog_version()
+            snapshot.mark_stale()
+        self.stdout.write(self.style.SUCCESS(f'Rendered {total} descriptions with renderer {RENDERER_VERSION}'))
+
+    def render(self, model, render_all, batch_size):
+        queryset = model.objects.only('id', 'description').order_by('id')
+        if not render_all:
+            queryset = queryset.exclude(description_renderer=RENDERER_VERSION)
+
+        # Keyset batches, so rows already rendered drop out of the stale filter safely
+        rendered, last_id = 0, 0
+        while True:
+            batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                return rendered
+            for row in batch:
+                row.render_description()
+            model.objects.bulk_update(batch, RENDERED_FIELDS)
+            rendered += len(batch)
+            last_id = batch[-1].id
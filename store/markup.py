@@ -0,0 +1,45 @@
+"""
+Markdown rendering for product descriptions.
+
+Descriptions are authored in Markdown and rendered to sanitized HTML
+once, when the product is saved, so API responses carry ready-to-insert
+HTML and no request or browser renders Markdown. RENDERER_VERSION is
+stored next to each rendering; after upgrading Markdown, nh3 or the
+settings below, run render_descriptions to refresh stale rows.
+"""
+
+import markdown
+import nh3
+
+# Bump when the extensions or allow-lists below change
+RENDERER_REVISION = 1
+RENDERER_VERSION = f'{RENDERER_REVISION}-md{markdown.__version__}-nh3{nh3.__version__}'
+
+MARKDOWN_EXTENSIONS = ['extra', 'sane_lists']
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'blockquote', 'br', 'code', 'dd', 'del', 'dl', 'dt', 'em',
+    'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'li', 'ol', 'p', 'pre', 'strong',
+    'sub', 'sup', 'table', 'tbody', 'td', 'th', 'thead', 'tr', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'abbr': {'title'},
+    'td': {'align'},
+    'th': {'align'},
+}
+URL_SCHEMES = {'http', 'https', 'mailto'}
+
+
+def render_markdown(text):
+    """Render Markdown to HTML that is safe to insert into the storefront"""
+    if not text:
+        return ''
+    html = markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS, output_format='html')
+    return nh3.clean(
+        html,
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        url_schemes=URL_SCHEMES,
+        link_rel='noopener noreferrer nofollow',
+    )
@@ -0,0 +1,35 @@
+"""
+Migration operations shared by store migrations.
+
+Kept out of the migrations package so migrations never import each
+other, and free of django.contrib.postgres imports so SQLite
+environments without psycopg2 can still migrate.
+"""
+
+from django.db import migrations
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    """AddIndex that uses CREATE INDEX CONCURRENTLY on PostgreSQL.
+
+    Building the index does not block writes to the table there; other
+    databases get a plain AddIndex. Migrations using it must set
+    ``atomic = False``, as concurrent builds cannot run in a transaction.
+    """
+
+    def describe(self):
+        return f'{super().describe()} (concurrently on PostgreSQL)'
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
@@ -0,0 +1,60 @@
+# Generated manually to add full-text product search
+
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE store_product ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX store_product_search_gin ON store_product USING gin (search_vector)",
+    "CREATE INDEX store_product_name_trgm ON store_product USING gin (name gin_trgm_ops)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS store_product_name_trgm",
+    "DROP INDEX IF EXISTS store_product_search_gin",
+    "ALTER TABLE store_product DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE store_product_fts USING fts5(name, description)",
+    """
+    INSERT INTO store_product_fts (rowid, name, description)
+    SELECT id, name, description FROM store_product
+    """,
+]
+
+SQLITE_REVERSE = [
+    "DROP TABLE IF EXISTS store_product_fts",
+]
+
+
+def run_for_vendor(postgres, sqlite):
+    def run(apps, schema_editor):
+        statements = {
+            'postgresql': postgres,
+            'sqlite': sqlite,
+        }.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0010_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARD, SQLITE_FORWARD),
+            run_for_vendor(POSTGRES_REVERSE, SQLITE_REVERSE),
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:19, with the read model SQL added manually
+
+from django.db import migrations, models
+
+
+# Keep in sync with store.listing.LISTING_SELECT
+LISTING_SELECT = """
+    SELECT p.id, p.name, p.slug, p.price, p.stock_quantity,
+           p.stock_quantity > 0 AS in_stock,
+           p.length, p.width, p.height, p.weight,
+           (SELECT i.id FROM store_productimage i
+             WHERE i.product_id = p.id
+             ORDER BY i.is_primary DESC, i."order", i.id
+             LIMIT 1) AS primary_image_id,
+           p.created_at, p.updated_at
+      FROM store_product p
+     WHERE p.is_active
+"""
+
+LISTING_INDEXES = [
+    "CREATE INDEX store_productlisting_newest ON store_productlisting (created_at DESC, id DESC)",
+    "CREATE INDEX store_productlisting_price ON store_productlisting (price, id)",
+    "CREATE INDEX store_productlisting_stock ON store_productlisting (stock_quantity DESC, id DESC)",
+]
+
+POSTGRES_FORWARD = [
+    f"CREATE MATERIALIZED VIEW store_productlisting AS {LISTING_SELECT}",
+    # REFRESH ... CONCURRENTLY requires a unique index
+    "CREATE UNIQUE INDEX store_productlisting_id ON store_productlisting (id)",
+    *LISTING_INDEXES,
+]
+
+POSTGRES_REVERSE = [
+    "DROP MATERIALIZED VIEW IF EXISTS store_productlisting",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE TABLE store_productlisting (
+        id integer NOT NULL PRIMARY KEY,
+        name varchar(200) NOT NULL,
+        slug varchar(200) NOT NULL,
+        price decimal NOT NULL,
+        stock_quantity integer unsigned NOT NULL,
+        in_stock bool NOT NULL,
+        length decimal NOT NULL,
+        width decimal NOT NULL,
+        height decimal NOT NULL,
+        weight decimal NOT NULL,
+        primary_image_id bigint NULL,
+        created_at datetime NOT NULL,
+        updated_at datetime NOT NULL
+    )
+    """,
+    f"INSERT INTO store_productlisting {LISTING_SELECT}",
+    *LISTING_INDEXES,
+]
+
+SQLITE_REVERSE = [
+    "DROP TABLE IF EXISTS store_productlisting",
+]
+
+
+def run_for_vendor(postgres, sqlite):
+    def run(apps, schema_editor):
+        statements = {
+            'postgresql': postgres,
+            'sqlite': sqlite,
+        }.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0014_product_associations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductListing',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('slug', models.SlugField(max_length=200)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('stock_quantity', models.PositiveIntegerField()),
+                ('in_stock', models.BooleanField()),
+                ('length', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('width', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('height', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('weight', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('primary_image', models.ForeignKey(db_constraint=False, null=True, on_delete=models.deletion.DO_NOTHING, related_name='+', to='store.productimage')),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'store_productlisting',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARD, SQLITE_FORWARD),
+            run_for_vendor(POSTGRES_REVERSE, SQLITE_REVERSE),
+        ),
+    ]
@@ -0,0 +1,160 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:24, with the read model SQL added manually
+
+from django.db import migrations, models
+
+
+# Keep in sync with store.listing.LISTING_SELECT
+LISTING_SELECT = """
+    SELECT p.id, p.name, p.slug, p.price, p.stock_quantity,
+           p.stock_quantity > 0 AS in_stock,
+           p.length, p.width, p.height, p.weight,
+           p.units_sold, p.units_sold_30d,
+           (SELECT i.id FROM store_productimage i
+             WHERE i.product_id = p.id
+             ORDER BY i.is_primary DESC, i."order", i.id
+             LIMIT 1) AS primary_image_id,
+           p.created_at, p.updated_at
+      FROM store_product p
+     WHERE p.is_active
+"""
+
+LISTING_INDEXES = [
+    "CREATE INDEX store_productlisting_newest ON store_productlisting (created_at DESC, id DESC)",
+    "CREATE INDEX store_productlisting_price ON store_productlisting (price, id)",
+    "CREATE INDEX store_productlisting_stock ON store_productlisting (stock_quantity DESC, id DESC)",
+    "CREATE INDEX store_productlisting_best_selling "
+    "ON store_productlisting (units_sold_30d DESC, units_sold DESC, id DESC)",
+]
+
+POSTGRES_FORWARD = [
+    "DROP MATERIALIZED VIEW IF EXISTS store_productlisting",
+    f"CREATE MATERIALIZED VIEW store_productlisting AS {LISTING_SELECT}",
+    "CREATE UNIQUE INDEX store_productlisting_id ON store_productlisting (id)",
+    *LISTING_INDEXES,
+]
+
+SQLITE_FORWARD = [
+    "DROP TABLE IF EXISTS store_productlisting",
+    """
+    CREATE TABLE store_productlisting (
+        id integer NOT NULL PRIMARY KEY,
+        name varchar(200) NOT NULL,
+        slug varchar(200) NOT NULL,
+        price decimal NOT NULL,
+        stock_quantity integer unsigned NOT NULL,
+        in_stock bool NOT NULL,
+        length decimal NOT NULL,
+        width decimal NOT NULL,
+        height decimal NOT NULL,
+        weight decimal NOT NULL,
+        units_sold integer unsigned NOT NULL,
+        units_sold_30d integer unsigned NOT NULL,
+        primary_image_id bigint NULL,
+        created_at datetime NOT NULL,
+        updated_at datetime NOT NULL
+    )
+    """,
+    f"INSERT INTO store_productlisting {LISTING_SELECT}",
+    *LISTING_INDEXES,
+]
+
+# Going back restores the 0015 read model, without the counter columns;
+# its SQL is frozen here rather than imported from that migration
+LISTING_SELECT_0015 = """
+    SELECT p.id, p.name, p.slug, p.price, p.stock_quantity,
+           p.stock_quantity > 0 AS in_stock,
+           p.length, p.width, p.height, p.weight,
+           (SELECT i.id FROM store_productimage i
+             WHERE i.product_id = p.id
+             ORDER BY i.is_primary DESC, i."order", i.id
+             LIMIT 1) AS primary_image_id,
+           p.created_at, p.updated_at
+      FROM store_product p
+     WHERE p.is_active
+"""
+
+LISTING_INDEXES_0015 = LISTING_INDEXES[:3]
+
+POSTGRES_REVERSE = [
+    "DROP MATERIALIZED VIEW IF EXISTS store_productlisting",
+    f"CREATE MATERIALIZED VIEW store_productlisting AS {LISTING_SELECT_0015}",
+    "CREATE UNIQUE INDEX store_productlisting_id ON store_productlisting (id)",
+    *LISTING_INDEXES_0015,
+]
+
+SQLITE_REVERSE = [
+    "DROP TABLE IF EXISTS store_productlisting",
+    """
+    CREATE TABLE store_productlisting (
+        id integer NOT NULL PRIMARY KEY,
+        name varchar(200) NOT NULL,
+        slug varchar(200) NOT NULL,
+        price decimal NOT NULL,
+        stock_quantity integer unsigned NOT NULL,
+        in_stock bool NOT NULL,
+        length decimal NOT NULL,
+        width decimal NOT NULL,
+        height decimal NOT NULL,
+        weight decimal NOT NULL,
+        primary_image_id bigint NULL,
+        created_at datetime NOT NULL,
+        updated_at datetime NOT NULL
+    )
+    """,
+    f"INSERT INTO store_productlisting {LISTING_SELECT_0015}",
+    *LISTING_INDEXES_0015,
+]
+
+
+def run_for_vendor(postgres, sqlite):
+    def run(apps, schema_editor):
+        statements = {
+            'postgresql': postgres,
+            'sqlite': sqlite,
+        }.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0015_product_listing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='sales_counted_at',
+            field=models.DateTimeField(blank=True, help_text="When this order's items were added to the product sales counters", null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='units_sold',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='units_sold_30d',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-units_sold_30d', '-units_sold', '-id'], name='store_product_best_selling'),
+        ),
+        migrations.AddField(
+            model_name='productlisting',
+            name='units_sold',
+            field=models.PositiveIntegerField(),
+        ),
+        migrations.AddField(
+            model_name='productlisting',
+            name='units_sold_30d',
+            field=models.PositiveIntegerField(),
+        ),
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARD, SQLITE_FORWARD),
+            run_for_vendor(POSTGRES_REVERSE, SQLITE_REVERSE),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0016_sales_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductTranslation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(choices=[('es', 'Spanish'), ('fr', 'French'), ('de', 'German'), ('it', 'Italian')], max_length=5)),
+                ('name', models.CharField(blank=True, max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='translations', to='store.product')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='producttranslation',
+            constraint=models.UniqueConstraint(fields=('product', 'language'), name='store_producttranslation_language'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0017_product_translations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='description_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='description_renderer',
+            field=models.CharField(blank=True, editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='producttranslation',
+            name='description_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='producttranslation',
+            name='description_renderer',
+            field=models.CharField(blank=True, editable=False, max_length=50),
+        ),
+    ]
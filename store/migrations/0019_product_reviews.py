@@ -0,0 +1,211 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:31, with the read model SQL added manually
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Keep in sync with store.listing.LISTING_SELECT
+LISTING_SELECT = """
+    SELECT p.id, p.name, p.slug, p.price, p.stock_quantity,
+           p.stock_quantity > 0 AS in_stock,
+           p.length, p.width, p.height, p.weight,
+           p.units_sold, p.units_sold_30d,
+           p.rating_count, p.rating_average,
+           (SELECT i.id FROM store_productimage i
+             WHERE i.product_id = p.id
+             ORDER BY i.is_primary DESC, i."order", i.id
+             LIMIT 1) AS primary_image_id,
+           p.created_at, p.updated_at
+      FROM store_product p
+     WHERE p.is_active
+"""
+
+LISTING_INDEXES = [
+    "CREATE INDEX store_productlisting_newest ON store_productlisting (created_at DESC, id DESC)",
+    "CREATE INDEX store_productlisting_price ON store_productlisting (price, id)",
+    "CREATE INDEX store_productlisting_stock ON store_productlisting (stock_quantity DESC, id DESC)",
+    "CREATE INDEX store_productlisting_best_selling "
+    "ON store_productlisting (units_sold_30d DESC, units_sold DESC, id DESC)",
+    "CREATE INDEX store_productlisting_top_rated "
+    "ON store_productlisting (rating_average DESC, rating_count DESC, id DESC)",
+]
+
+POSTGRES_FORWARD = [
+    "DROP MATERIALIZED VIEW IF EXISTS store_productlisting",
+    f"CREATE MATERIALIZED VIEW store_productlisting AS {LISTING_SELECT}",
+    "CREATE UNIQUE INDEX store_productlisting_id ON store_productlisting (id)",
+    *LISTING_INDEXES,
+]
+
+SQLITE_FORWARD = [
+    "DROP TABLE IF EXISTS store_productlisting",
+    """
+    CREATE TABLE store_productlisting (
+        id integer NOT NULL PRIMARY KEY,
+        name varchar(200) NOT NULL,
+        slug varchar(200) NOT NULL,
+        price decimal NOT NULL,
+        stock_quantity integer unsigned NOT NULL,
+        in_stock bool NOT NULL,
+        length decimal NOT NULL,
+        width decimal NOT NULL,
+        height decimal NOT NULL,
+        weight decimal NOT NULL,
+        units_sold integer unsigned NOT NULL,
+        units_sold_30d integer unsigned NOT NULL,
+        rating_count integer unsigned NOT NULL,
+        rating_average decimal NOT NULL,
+        primary_image_id bigint NULL,
+        created_at datetime NOT NULL,
+        updated_at datetime NOT NULL
+    )
+    """,
+    f"INSERT INTO store_productlisting {LISTING_SELECT}",
+    *LISTING_INDEXES,
+]
+
+# Going back restores the 0016 read model, without the rating columns;
+# its SQL is frozen here rather than imported from that migration
+LISTING_SELECT_0016 = """
+    SELECT p.id, p.name, p.slug, p.price, p.stock_quantity,
+           p.stock_quantity > 0 AS in_stock,
+           p.length, p.width, p.height, p.weight,
+           p.units_sold, p.units_sold_30d,
+           (SELECT i.id FROM store_productimage i
+             WHERE i.product_id = p.id
+             ORDER BY i.is_primary DESC, i."order", i.id
+             LIMIT 1) AS primary_image_id,
+           p.created_at, p.updated_at
+      FROM store_product p
+     WHERE p.is_active
+"""
+
+LISTING_INDEXES_0016 = LISTING_INDEXES[:4]
+
+POSTGRES_REVERSE = [
+    "DROP MATERIALIZED VIEW IF EXISTS store_productlisting",
+    f"CREATE MATERIALIZED VIEW store_productlisting AS {LISTING_SELECT_0016}",
+    "CREATE UNIQUE INDEX store_productlisting_id ON store_productlisting (id)",
+    *LISTING_INDEXES_0016,
+]
+
+SQLITE_REVERSE = [
+    "DROP TABLE IF EXISTS store_productlisting",
+    """
+    CREATE TABLE store_productlisting (
+        id integer NOT NULL PRIMARY KEY,
+        name varchar(200) NOT NULL,
+        slug varchar(200) NOT NULL,
+        price decimal NOT NULL,
+        stock_quantity integer unsigned NOT NULL,
+        in_stock bool NOT NULL,
+        length decimal NOT NULL,
+        width decimal NOT NULL,
+        height decimal NOT NULL,
+        weight decimal NOT NULL,
+        units_sold integer unsigned NOT NULL,
+        units_sold_30d integer unsigned NOT NULL,
+        primary_image_id bigint NULL,
+        created_at datetime NOT NULL,
+        updated_at datetime NOT NULL
+    )
+    """,
+    f"INSERT INTO store_productlisting {LISTING_SELECT_0016}",
+    *LISTING_INDEXES_0016,
+]
+
+
+def run_for_vendor(postgres, sqlite):
+    def run(apps, schema_editor):
+        statements = {
+            'postgresql': postgres,
+            'sqlite': sqlite,
+        }.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0018_description_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductReview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)])),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('body', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_average',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-rating_average', '-rating_count', '-id'], name='store_product_top_rated'),
+        ),
+        migrations.AddField(
+            model_name='productreview',
+            name='customer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='store.customer'),
+        ),
+        migrations.AddField(
+            model_name='productreview',
+            name='order_item',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='review', to='store.orderitem'),
+        ),
+        migrations.AddField(
+            model_name='productreview',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='store.product'),
+        ),
+        migrations.AddIndex(
+            model_name='productreview',
+            index=models.Index(fields=['product', '-created_at', '-id'], name='store_review_product_recent'),
+        ),
+        migrations.AddConstraint(
+            model_name='productreview',
+            constraint=models.UniqueConstraint(fields=('customer', 'product'), name='store_productreview_once'),
+        ),
+        migrations.AddConstraint(
+            model_name='productreview',
+            constraint=models.CheckConstraint(check=models.Q(('rating__gte', 1), ('rating__lte', 5)), name='store_productreview_rating'),
+        ),
+        migrations.AddField(
+            model_name='productlisting',
+            name='rating_count',
+            field=models.PositiveIntegerField(),
+        ),
+        migrations.AddField(
+            model_name='productlisting',
+            name='rating_average',
+            field=models.DecimalField(decimal_places=2, max_digits=3),
+        ),
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARD, SQLITE_FORWARD),
+            run_for_vendor(POSTGRES_REVERSE, SQLITE_REVERSE),
+        ),
+    ]
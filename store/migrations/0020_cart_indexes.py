@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:42
+
+from django.db import migrations, models
+
+from store.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # Concurrent index builds cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('store', '0019_product_reviews'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='cart',
+            index=models.Index(condition=models.Q(('session_key__isnull', False)), fields=['session_key'], name='store_cart_session_key'),
+        ),
+        AddIndexConcurrently(
+            model_name='cart',
+            index=models.Index(condition=models.Q(('customer__isnull', True)), fields=['updated_at', 'id'], name='store_cart_anonymous_updated'),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:05, with the read model SQL added manually
+
+from django.db import migrations
+
+
+# Keep in sync with store.listing.LISTING_SELECT
+LISTING_SELECT = """
+    SELECT p.id, p.name, p.slug, p.price, p.stock_quantity,
+           p.stock_quantity > 0 AS in_stock,
+           p.length, p.width, p.height, p.weight,
+           p.units_sold, p.units_sold_30d,
+           p.rating_count, p.rating_average,
+           (SELECT i.id FROM store_productimage i
+             WHERE i.product_id = p.id
+             ORDER BY i.is_primary DESC, i."order", i.id
+             LIMIT 1) AS primary_image_id,
+           p.created_at, p.updated_at
+      FROM store_product p
+     WHERE p.is_active
+"""
+
+LISTING_INDEXES = [
+    "CREATE INDEX store_productlisting_newest ON store_productlisting (created_at DESC, id DESC)",
+    "CREATE INDEX store_productlisting_price ON store_productlisting (price, id)",
+    "CREATE INDEX store_productlisting_stock ON store_productlisting (stock_quantity DESC, id DESC)",
+    "CREATE INDEX store_productlisting_best_selling "
+    "ON store_productlisting (units_sold_30d DESC, units_sold DESC, id DESC)",
+    "CREATE INDEX store_productlisting_top_rated "
+    "ON store_productlisting (rating_average DESC, rating_count DESC, id DESC)",
+]
+
+# The materialized view is replaced by the table SQLite already uses, so
+# product changes upsert their own row instead of refreshing the view
+POSTGRES_FORWARD = [
+    "DROP MATERIALIZED VIEW IF EXISTS store_productlisting",
+    """
+    CREATE TABLE store_productlisting (
+        id bigint NOT NULL PRIMARY KEY,
+        name varchar(200) NOT NULL,
+        slug varchar(200) NOT NULL,
+        price numeric(10, 2) NOT NULL,
+        stock_quantity integer NOT NULL CHECK (stock_quantity >= 0),
+        in_stock boolean NOT NULL,
+        length numeric(8, 2) NOT NULL,
+        width numeric(8, 2) NOT NULL,
+        height numeric(8, 2) NOT NULL,
+        weight numeric(8, 2) NOT NULL,
+        units_sold integer NOT NULL CHECK (units_sold >= 0),
+        units_sold_30d integer NOT NULL CHECK (units_sold_30d >= 0),
+        rating_count integer NOT NULL CHECK (rating_count >= 0),
+        rating_average numeric(3, 2) NOT NULL,
+        primary_image_id bigint NULL,
+        created_at timestamp with time zone NOT NULL,
+        updated_at timestamp with time zone NOT NULL
+    )
+    """,
+    f"INSERT INTO store_productlisting {LISTING_SELECT}",
+    *LISTING_INDEXES,
+]
+
+# Going back restores the 0019 materialized view
+POSTGRES_REVERSE = [
+    "DROP TABLE IF EXISTS store_productlisting",
+    f"CREATE MATERIALIZED VIEW store_productlisting AS {LISTING_SELECT}",
+    "CREATE UNIQUE INDEX store_productlisting_id ON store_productlisting (id)",
+    *LISTING_INDEXES,
+]
+
+
+def run_for_vendor(postgres, sqlite):
+    def run(apps, schema_editor):
+        statements = {
+            'postgresql': postgres,
+            'sqlite': sqlite,
+        }.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0020_cart_indexes'),
+    ]
+
+    operations = [
+        # SQLite has used a table since 0015
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARD, []),
+            run_for_vendor(POSTGRES_REVERSE, []),
+        ),
+    ]
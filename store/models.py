@@ -1,5 +1,10 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
 from django.db import models
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from django.utils.functional import cached_property
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator, FileExtensionValidator
 from django.core.exceptions import ValidationError
@@ -7,6 +12,18 @@ import uuid
 import os
 import re
 
+from .markup import RENDERER_VERSION, render_markdown
+
+
+# Languages offered to customers; product content defaults to English
+LANGUAGE_CHOICES = [
+    ('en', 'English'),
+    ('es', 'Spanish'),
+    ('fr', 'French'),
+    ('de', 'German'),
+    ('it', 'Italian'),
+]
+
 
 def validate_file_size(value):
     """Validate file size is less than 5MB"""
@@ -47,7 +64,49 @@ def validate_us_phone(value):
         raise ValidationError('Invalid US phone number format. Use (123) 456-7890 or similar format.')
 
 
-class Product(models.Model):
+def primary_image_prefetch(to_attr='ordered_images', lookup='images'):
+    """Prefetch product images with the primary image first.
+
+    Products fetched with this prefetch carry their images on ``to_attr``
+    ordered the same way the serializers pick a primary image, so the
+    first element is the one to display. Pass ``lookup`` to prefetch
+    through a relation, e.g. ``'related__images'``.
+    """
+    return models.Prefetch(
+        lookup,
+        queryset=ProductImage.objects.order_by('-is_primary', 'order', 'id'),
+        to_attr=to_attr,
+    )
+
+
+class RenderedDescriptionModel(models.Model):
+    """A Markdown ``description`` with its sanitized HTML stored alongside (see store.markup)"""
+    description_html = models.TextField(blank=True, editable=False)
+    description_renderer = models.CharField(max_length=50, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def render_description(self):
+        self.description_html = render_markdown(self.description)
+        self.description_renderer = RENDERER_VERSION
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'description' in update_fields:
+            self.render_description()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'description_html', 'description_renderer'}
+        super().save(*args, **kwargs)
+
+
+class ProductQuerySet(models.QuerySet):
+    def with_primary_image(self):
+        """Load primary images for the whole queryset in one extra query"""
+        return self.prefetch_related(primary_image_prefetch())
+
+
+class Product(RenderedDescriptionModel):
     name = models.CharField(max_length=200)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
@@ -60,9 +119,45 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    # Sales counters maintained by store.sales
+    units_sold = models.PositiveIntegerField(default=0)
+    units_sold_30d = models.PositiveIntegerField(default=0)
+    # Review aggregates maintained by store.reviews
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_average = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+
+    objects = ProductQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of the storefront listing
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(is_active=True),
+                name='store_product_active_keyset',
+            ),
+            # Storefront filters and sorts
+            models.Index(
+                fields=['price', 'id'],
+                condition=models.Q(is_active=True, stock_quantity__gt=0),
+                name='store_product_instock_price',
+            ),
+            models.Index(fields=['is_active', 'price', 'id'], name='store_product_active_price'),
+            models.Index(fields=['is_active', '-stock_quantity', '-id'], name='store_product_active_stock'),
+            models.Index(fields=['is_active', 'weight'], name='store_product_active_weight'),
+            models.Index(
+                fields=['-units_sold_30d', '-units_sold', '-id'],
+                condition=models.Q(is_active=True),
+                name='store_product_best_selling',
+            ),
+            models.Index(
+                fields=['-rating_average', '-rating_count', '-id'],
+                condition=models.Q(is_active=True),
+                name='store_product_top_rated',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -75,6 +170,15 @@ class Product(models.Model):
     def in_stock(self):
         return self.stock_quantity > 0
 
+    def get_primary_image(self):
+        """Return the image to display for this product, or None"""
+        images = getattr(self, 'ordered_images', None)
+        if images is not None:
+            return images[0] if images else None
+        if not hasattr(self, '_primary_image'):
+            self._primary_image = self.images.filter(is_primary=True).first() or self.images.first()
+        return self._primary_image
+
 
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, related_name='images', on_delete=models.CASCADE)
@@ -82,6 +186,8 @@ class ProductImage(models.Model):
     alt_text = models.CharField(max_length=200, blank=True)
     is_primary = models.BooleanField(default=False)
     order = models.PositiveIntegerField(default=0)
+    variants = models.JSONField(default=dict, blank=True, help_text="Generated responsive renditions")
+    placeholder = models.TextField(blank=True, help_text="Blurred low-resolution preview as a data URI")
 
     class Meta:
         ordering = ['order', 'id']
@@ -89,6 +195,119 @@ class ProductImage(models.Model):
     def __str__(self):
         return f"Image for {self.product.name}"
 
+    def has_current_variants(self):
+        """Variants exist and were generated from the current image file"""
+        return bool(self.variants) and self.variants.get('source') == self.image.name
+
+    def get_srcset(self):
+        """Return srcset strings per format, or None until variants are generated"""
+        if not self.has_current_variants():
+            return None
+        storage = self.image.storage
+        srcset = {}
+        for image_format in ('webp', 'jpeg'):
+            renditions = sorted(self.variants.get(image_format, {}).items(), key=lambda item: int(item[0]))
+            srcset[image_format] = ', '.join(f'{storage.url(path)} {width}w' for width, path in renditions)
+        return srcset
+
+
+class ProductTranslation(RenderedDescriptionModel):
+    """Product name and description in a language other than English.
+
+    Blank fields, like missing rows, fall back to the Product's English
+    content (see store.translations).
+    """
+    product = models.ForeignKey(Product, related_name='translations', on_delete=models.CASCADE)
+    language = models.CharField(max_length=5, choices=LANGUAGE_CHOICES[1:])
+    name = models.CharField(max_length=200, blank=True)
+    description = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'language'], name='store_producttranslation_language'),
+        ]
+
+    def __str__(self):
+        return f"{self.product.name} ({self.language})"
+
+
+class ProductListing(models.Model):
+    """Denormalized read model for the storefront list, one row per active product.
+
+    A signal-maintained table; see store.listing and migration
+    0021_product_listing_table.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    name = models.CharField(max_length=200)
+    slug = models.SlugField(max_length=200)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    stock_quantity = models.PositiveIntegerField()
+    in_stock = models.BooleanField()
+    length = models.DecimalField(max_digits=8, decimal_places=2)
+    width = models.DecimalField(max_digits=8, decimal_places=2)
+    height = models.DecimalField(max_digits=8, decimal_places=2)
+    weight = models.DecimalField(max_digits=8, decimal_places=2)
+    units_sold = models.PositiveIntegerField()
+    units_sold_30d = models.PositiveIntegerField()
+    rating_count = models.PositiveIntegerField()
+    rating_average = models.DecimalField(max_digits=3, decimal_places=2)
+    primary_image = models.ForeignKey(
+        ProductImage, null=True, related_name='+', on_delete=models.DO_NOTHING, db_constraint=False
+    )
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'store_productlisting'
+
+    def __str__(self):
+        return self.name
+
+    def get_primary_image(self):
+        """Same contract as Product.get_primary_image, for the list serializer"""
+        return self.primary_image
+
+
+class ProductAssociation(models.Model):
+    """Number of completed orders containing both products (see store.recommendations)"""
+    product = models.ForeignKey(Product, related_name='associations', on_delete=models.CASCADE)
+    related = models.ForeignKey(Product, related_name='+', on_delete=models.CASCADE)
+    score = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'related'], name='store_productassociation_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['product', '-score', 'related'], name='store_assoc_product_score'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.related_id} ({self.score})"
+
+
+class JobWatermark(models.Model):
+    """Progress marker for incremental batch jobs.
+
+    Jobs that advance by time store microseconds since the epoch in
+    ``position``; see position_for() and moment_at().
+    """
+    name = models.CharField(max_length=100, unique=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @staticmethod
+    def position_for(moment):
+        return int(moment.timestamp() * 1_000_000)
+
+    @staticmethod
+    def moment_at(position):
+        return datetime.fromtimestamp(0, dt_timezone.utc) + timedelta(microseconds=position)
+
+    def __str__(self):
+        return f"{self.name}: {self.position}"
+
 
 class Customer(models.Model):
     """Enhanced Customer model with comprehensive profile fields"""
@@ -134,13 +353,7 @@ class Customer(models.Model):
     preferred_language = models.CharField(
         max_length=5,
         default='en',
-        choices=[
-            ('en', 'English'),
-            ('es', 'Spanish'),
-            ('fr', 'French'),
-            ('de', 'German'),
-            ('it', 'Italian'),
-        ]
+        choices=LANGUAGE_CHOICES
     )
     timezone = models.CharField(
         max_length=50,
@@ -263,6 +476,7 @@ class UserActivity(models.Model):
         indexes = [
             models.Index(fields=['user', 'activity_type']),
             models.Index(fields=['timestamp']),
+            models.Index(fields=['user', '-timestamp', '-id']),
         ]
     
     def __str__(self):
@@ -351,6 +565,9 @@ class Order(models.Model):
     
     # Stock management
     stock_deducted = models.BooleanField(default=False, help_text="Indicates if stock has been deducted for this order")
+    sales_counted_at = models.DateTimeField(
+        null=True, blank=True, help_text="When this order's items were added to the product sales counters"
+    )
     
     # Archive functionality
     is_archived = models.BooleanField(default=False)
@@ -365,6 +582,7 @@ class Order(models.Model):
             models.Index(fields=['customer', 'status']),
             models.Index(fields=['order_date']),
             models.Index(fields=['is_archived']),
+            models.Index(fields=['customer', 'is_archived', '-order_date', '-id']),
         ]
 
     def __str__(self):
@@ -430,24 +648,95 @@ class OrderItem(models.Model):
         return self.quantity * self.price
 
 
+class ProductReview(models.Model):
+    """A buyer's rating of a product, tied to the order item they bought it in"""
+    order_item = models.OneToOneField(OrderItem, related_name='review', on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, related_name='reviews', on_delete=models.CASCADE)
+    customer = models.ForeignKey(Customer, related_name='reviews', on_delete=models.CASCADE)
+    rating = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
+    title = models.CharField(max_length=200, blank=True)
+    body = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['customer', 'product'], name='store_productreview_once'),
+            models.CheckConstraint(check=models.Q(rating__gte=1, rating__lte=5), name='store_productreview_rating'),
+        ]
+        indexes = [
+            # Keyset pagination of a product's reviews
+            models.Index(fields=['product', '-created_at', '-id'], name='store_review_product_recent'),
+        ]
+
+    def __str__(self):
+        return f"{self.rating}/5 for {self.product_id} by {self.customer_id}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Rating as stored, so signals can adjust the product aggregates by the difference
+        instance._stored_rating = instance.__dict__.get('rating')
+        return instance
+
+
+def cart_totals():
+    """Aggregates over cart items: units and price at current product prices"""
+    money = models.DecimalField(max_digits=12, decimal_places=2)
+    return {
+        'total_items': Coalesce(Sum('quantity'), 0),
+        'total_price': Coalesce(
+            Sum(F('quantity') * F('product__price'), output_field=money),
+            Value(Decimal('0.00')),
+            output_field=money,
+        ),
+    }
+
+
 class Cart(models.Model):
     customer = models.OneToOneField(Customer, on_delete=models.CASCADE, null=True, blank=True)
     session_key = models.CharField(max_length=40, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Session cart lookups on login (see session_carts.materialize)
+            models.Index(fields=['session_key'], name='store_cart_session_key',
+                         condition=models.Q(session_key__isnull=False)),
+            # Stale anonymous carts for purge_stale_carts
+            models.Index(fields=['updated_at', 'id'], name='store_cart_anonymous_updated',
+                         condition=models.Q(customer__isnull=True)),
+        ]
+
     def __str__(self):
         if self.customer:
             return f"Cart for {self.customer.user.username}"
         return f"Anonymous Cart {self.session_key}"
 
+    @cached_property
+    def totals(self):
+        """Item and price totals, summed in one query"""
+        return self.items.aggregate(**cart_totals())
+
     @property
     def total_items(self):
-        return sum(item.quantity for item in self.items.all())
+        return self.totals['total_items']
 
     @property
     def total_price(self):
-        return sum(item.total_price for item in self.items.all())
+        return self.totals['total_price']
+
+
+class CartItemQuerySet(models.QuerySet):
+    def for_display(self):
+        """Items with their product and its images loaded, for the cart serializers"""
+        return (
+            self.select_related('product')
+            .prefetch_related(primary_image_prefetch(lookup='product__images'))
+            .order_by('id')
+        )
 
 
 class CartItem(models.Model):
@@ -457,6 +746,8 @@ class CartItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CartItemQuerySet.as_manager()
+
     class Meta:
         unique_together = ['cart', 'product']
 
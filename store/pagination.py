@@ -0,0 +1,186 @@
+"""
+Pagination classes for the store API.
+
+KeysetPagination keeps the regular page-number behaviour for existing
+clients and adds an opt-in keyset (cursor) mode: passing ``cursor`` (empty
+for the first page) pages by the position of the last row seen instead of
+OFFSET, so deep pages cost the same as the first one. The ordering used
+for the keyset must end in a unique column such as ``id``.
+"""
+
+import base64
+import json
+from collections import OrderedDict
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    keyset_ordering = ('-id',)
+    invalid_cursor_message = 'Invalid cursor'
+    # New endpoints can page by cursor only, with no page-number mode
+    keyset_only = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_keyset = self.keyset_only or self.cursor_query_param in request.query_params
+        if not self.use_keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_keyset_ordering(view)
+        position, reverse = self.decode_cursor(request, queryset.model)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, 'true').lower() != 'false':
+            self.count = queryset.count()
+
+        ordering = [self._flip(field) for field in self.ordering] if reverse else list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.build_keyset_filter(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.results = results
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.use_keyset:
+            return super().get_paginated_response(data)
+
+        payload = OrderedDict()
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['next'] = self.get_next_link()
+        payload['previous'] = self.get_previous_link()
+        payload['results'] = data
+        return Response(payload)
+
+    def get_next_link(self):
+        if not self.use_keyset:
+            return super().get_next_link()
+        if not (self.has_next and self.results):
+            return None
+        return self._build_link(self.results[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.use_keyset:
+            return super().get_previous_link()
+        if not (self.has_previous and self.results):
+            return None
+        return self._build_link(self.results[0], reverse=True)
+
+    def get_keyset_ordering(self, view):
+        """Views may override the ordering, e.g. for user-selected sorts"""
+        if view is not None and hasattr(view, 'get_keyset_ordering'):
+            return tuple(view.get_keyset_ordering())
+        return self.keyset_ordering
+
+    def build_keyset_filter(self, ordering, position):
+        """Rows strictly after ``position`` in ``ordering``.
+
+        Expands the tuple comparison (a, b) > (x, y) into
+        a > x OR (a = x AND b > y), honouring each column's direction.
+        """
+        condition = Q()
+        equal_so_far = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal_so_far & Q(**{f'{name}__{lookup}': value})
+            equal_so_far &= Q(**{name: value})
+        return condition
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            cursor = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+            values = cursor['v']
+            if len(values) != len(self.ordering):
+                raise ValueError('cursor does not match ordering')
+            position = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(cursor.get('r'))
+
+    def encode_cursor(self, instance, reverse):
+        values = [
+            self._serialize_value(getattr(instance, field.lstrip('-')))
+            for field in self.ordering
+        ]
+        cursor = {'v': values}
+        if reverse:
+            cursor['r'] = 1
+        raw = json.dumps(cursor, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def _build_link(self, instance, reverse):
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(instance, reverse))
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _serialize_value(value):
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        if isinstance(value, (int, float, str)) or value is None:
+            return value
+        return str(value)
+
+
+class ProductPagination(KeysetPagination):
+    page_size = 12
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    keyset_ordering = ('-created_at', '-id')
+
+
+class OrderPagination(KeysetPagination):
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    keyset_ordering = ('-order_date', '-id')
+
+
+class ActivityPagination(KeysetPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    keyset_ordering = ('-timestamp', '-id')
+
+
+class ReviewPagination(KeysetPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+    keyset_ordering = ('-created_at', '-id')
+    keyset_only = True
+
+
+class SearchPagination(PageNumberPagination):
+    """Search results are ranked by relevance, so they page by number only"""
+    page_size = 12
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,129 @@
+"""
+"Frequently bought together" recommendations.
+
+ProductAssociation holds a sparse co-occurrence matrix: for each ordered
+pair of products, the number of paid orders containing both. The matrix
+is updated incrementally by update_associations(): a single INSERT ...
+SELECT ... ON CONFLICT statement aggregates a self-join of OrderItem
+over the orders counted since the stored watermark and adds the counts
+to the existing rows, so the database does the counting and only new
+orders are read.
+
+The watermark follows Order.sales_counted_at, the moment an order
+became paid (see sales), rather than its id, so an order paid long
+after it was placed is still counted. When sales uncounts a cancelled
+order that was already included, order_uncounted() takes its pairs back
+off. Orders whose sales_counted_at is rewritten by the sales backfill
+are only picked up by a full rebuild (build_recommendations --full).
+
+Product detail responses read the top-K rows per product through the
+(product, -score) index.
+"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import JobWatermark, Order, OrderItem, ProductAssociation, primary_image_prefetch
+
+# Positions are sales_counted_at timestamps. The earlier watermark, kept
+# under another name, counted order ids.
+WATERMARK_NAME = 'product_associations_paid'
+
+# Paid orders; pending and cancelled orders are not counted
+COMPLETED_STATUSES = ['processing', 'shipped', 'delivered', 'archived']
+
+
+def update_associations(full=False, settle=None):
+    """Add co-purchase counts for orders paid since the last run.
+
+    Orders paid within ``settle`` (default RECOMMENDATIONS_SETTLE_MINUTES)
+    are left for the next run, so transactions still committing around
+    the cutoff are not skipped. ``full`` discards the matrix and recounts
+    all history, as does the first run under this watermark. Returns
+    (orders counted, pairs updated).
+    """
+    if settle is None:
+        settle = timedelta(minutes=getattr(settings, 'RECOMMENDATIONS_SETTLE_MINUTES', 60))
+
+    with transaction.atomic():
+        watermark, created = JobWatermark.objects.select_for_update().get_or_create(name=WATERMARK_NAME)
+        if full or created:
+            ProductAssociation.objects.all().delete()
+            watermark.position = 0
+
+        low = JobWatermark.moment_at(watermark.position)
+        high = timezone.now() - settle
+        if high <= low:
+            return 0, 0
+
+        orders = Order.objects.filter(sales_counted_at__gt=low, sales_counted_at__lte=high).count()
+        pairs = _count_pairs(low, high) if orders else 0
+
+        watermark.position = JobWatermark.position_for(high)
+        watermark.save(update_fields=['position', 'updated_at'])
+    return orders, pairs
+
+
+def order_uncounted(order):
+    """Take a cancelled order's pairs back off if update_associations counted it.
+
+    Called by sales.sync_order, in its transaction, before it clears
+    ``order.sales_counted_at``.
+    """
+    # Waits for a running update_associations, so the order is either in its counts or not
+    watermark = JobWatermark.objects.select_for_update().filter(name=WATERMARK_NAME).first()
+    if watermark is None or order.sales_counted_at > JobWatermark.moment_at(watermark.position):
+        return 0
+
+    association = ProductAssociation._meta.db_table
+    item = OrderItem._meta.db_table
+    products = f"SELECT product_id FROM {item} WHERE order_id = %s"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {association} SET score = score - 1
+            WHERE product_id IN ({products}) AND related_id IN ({products})
+            """,
+            [order.pk, order.pk],
+        )
+        updated = cursor.rowcount
+    ProductAssociation.objects.filter(score=0).delete()
+    return updated
+
+
+def _count_pairs(low, high):
+    association = ProductAssociation._meta.db_table
+    item = OrderItem._meta.db_table
+    order = Order._meta.db_table
+    adapt = connection.ops.adapt_datetimefield_value
+
+    # COUNT(DISTINCT) so an order listing a product twice counts once
+    sql = f"""
+        INSERT INTO {association} (product_id, related_id, score)
+        SELECT a.product_id, b.product_id, COUNT(DISTINCT a.order_id)
+        FROM {item} a
+        JOIN {item} b ON b.order_id = a.order_id AND b.product_id <> a.product_id
+        JOIN {order} o ON o.id = a.order_id
+        WHERE o.sales_counted_at > %s AND o.sales_counted_at <= %s
+        GROUP BY a.product_id, b.product_id
+        ON CONFLICT (product_id, related_id)
+        DO UPDATE SET score = {association}.score + excluded.score
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [adapt(low), adapt(high)])
+        return cursor.rowcount
+
+
+def frequently_bought_together(product, limit=None):
+    """Active products most often ordered with ``product``, best first"""
+    if limit is None:
+        limit = getattr(settings, 'RECOMMENDATIONS_TOP_K', 6)
+    associations = (
+        ProductAssociation.objects.filter(product=product, related__is_active=True)
+        .select_related('related')
+        .prefetch_related(primary_image_prefetch(lookup='related__images'))
+        .order_by('-score', 'related_id')[:limit]
+    )
+    return [association.related for association in associations]
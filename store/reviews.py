@@ -0,0 +1,71 @@
+"""
+Product reviews and their aggregate scores.
+
+Only buyers can review: a review belongs to an OrderItem from one of the
+customer's paid orders, and each customer reviews a product once.
+
+Product.rating_count and rating_sum are adjusted from the ProductReview
+save/delete signals, in the same transaction as the review and under a
+row lock on the product, and rating_average is stored alongside them.
+Lists, details and the top-rated sort (an index on rating_average) read
+these columns instead of running AVG() over reviews.
+"""
+
+from decimal import Decimal
+from django.db import transaction
+from django.utils import timezone
+
+from . import catalog_cache, listing, snapshot
+from .models import OrderItem, Product
+from .recommendations import COMPLETED_STATUSES
+
+
+def find_reviewable_item(customer, product):
+    """The customer's most recent paid order item for ``product``, or None"""
+    return (
+        OrderItem.objects.filter(order__customer=customer, order__status__in=COMPLETED_STATUSES, product=product)
+        .order_by('-order__order_date', '-id')
+        .first()
+    )
+
+
+def apply_rating(product_id, count_delta, sum_delta):
+    """Adjust a product's rating aggregates by the given deltas"""
+    with transaction.atomic():
+        product = Product.objects.select_for_update().only('rating_count', 'rating_sum').filter(pk=product_id).first()
+        if product is None:
+            # The product itself is being deleted
+            return
+        count = max(product.rating_count + count_delta, 0)
+        total = max(product.rating_sum + sum_delta, 0) if count else 0
+        # updated_at moves the product's list fragments on (see fragments)
+        Product.objects.filter(pk=product_id).update(
+            rating_count=count,
+            rating_sum=total,
+            rating_average=average(count, total),
+            updated_at=timezone.now(),
+        )
+    listing.product_changed(product_id)
+    transaction.on_commit(catalog_cache.bump_catalog_version)
+    # Snapshot pages and details show the rating aggregates
+    transaction.on_commit(snapshot.mark_stale)
+
+
+def average(count, total):
+    if not count:
+        return Decimal('0.00')
+    return (Decimal(total) / count).quantize(Decimal('0.01'))
+
+
+def review_saved(review, created):
+    previous = 0 if created else getattr(review, '_stored_rating', review.rating)
+    if created or review.rating != previous:
+        apply_rating(review.product_id, 1 if created else 0, review.rating - previous)
+    else:
+        # Title and body edits still change the cached review listings
+        transaction.on_commit(catalog_cache.bump_catalog_version)
+    review._stored_rating = review.rating
+
+
+def review_deleted(review):
+    apply_rating(review.product_id, -1, -getattr(review, '_stored_rating', review.rating))
@@ -0,0 +1,148 @@
+"""
+Per-product sales counters behind the best-selling sort.
+
+Product.units_sold counts units in paid orders and units_sold_30d those
+counted in the last 30 days. Both are maintained incrementally with F()
+updates rather than aggregating OrderItem per request:
+
+* sync_order() adds an order's quantities when it reaches a paid status
+  and takes them back off if it is later cancelled. Order.sales_counted_at
+  records that (and when) an order was counted, so repeated saves and
+  webhook retries never count it twice.
+* expire_recent() subtracts orders that have aged out of the 30-day
+  window since its last run, tracked by a JobWatermark.
+* backfill() recomputes everything from order history.
+
+The refresh_sales_counters command runs the last two from cron.
+"""
+
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from . import catalog_cache, listing, recommendations
+from .models import JobWatermark, Order, OrderItem, Product
+from .recommendations import COMPLETED_STATUSES
+
+WATERMARK_NAME = 'sales_30d_expiry'
+RECENT_WINDOW = timedelta(days=30)
+
+
+def needs_sync(order):
+    """Whether ``order``'s status and sales_counted_at disagree"""
+    counted = order.sales_counted_at is not None
+    return (order.status in COMPLETED_STATUSES and not counted) or (order.status == 'cancelled' and counted)
+
+
+def sync_order(order):
+    """Count or uncount an order's items to match its current status.
+
+    The row is re-read under a lock; ``order`` gets the new
+    sales_counted_at so a later save() of it does not undo the change.
+    """
+    with transaction.atomic():
+        locked = Order.objects.select_for_update().only('status', 'sales_counted_at').get(pk=order.pk)
+        counted = locked.sales_counted_at is not None
+
+        if locked.status in COMPLETED_STATUSES and not counted:
+            _apply(locked, 1, recent=True)
+            locked.sales_counted_at = timezone.now()
+        elif locked.status == 'cancelled' and counted:
+            recommendations.order_uncounted(locked)
+            watermark = JobWatermark.objects.select_for_update().filter(name=WATERMARK_NAME).first()
+            expired_before = JobWatermark.moment_at(watermark.position if watermark else 0)
+            _apply(locked, -1, recent=locked.sales_counted_at > expired_before)
+            locked.sales_counted_at = None
+        else:
+            order.sales_counted_at = locked.sales_counted_at
+            return False
+
+        locked.save(update_fields=['sales_counted_at'])
+    order.sales_counted_at = locked.sales_counted_at
+    return True
+
+
+def expire_recent(now=None):
+    """Drop orders older than the 30-day window from units_sold_30d.
+
+    Only orders counted between the previous cutoff and the new one are
+    read. Returns the number of products updated.
+    """
+    cutoff = (now or timezone.now()) - RECENT_WINDOW
+    with transaction.atomic():
+        watermark, _ = JobWatermark.objects.select_for_update().get_or_create(name=WATERMARK_NAME)
+        expired = (
+            OrderItem.objects.filter(
+                order__sales_counted_at__gt=JobWatermark.moment_at(watermark.position),
+                order__sales_counted_at__lte=cutoff,
+            )
+            .values('product_id')
+            .annotate(quantity=Sum('quantity'))
+            .order_by()
+        )
+        updated = _update_counters({row['product_id']: -row['quantity'] for row in expired}, total=False)
+
+        watermark.position = JobWatermark.position_for(cutoff)
+        watermark.save(update_fields=['position', 'updated_at'])
+    return updated
+
+
+def backfill(now=None):
+    """Recompute both counters from order history; returns products updated"""
+    cutoff = (now or timezone.now()) - RECENT_WINDOW
+    with transaction.atomic():
+        watermark, _ = JobWatermark.objects.select_for_update().get_or_create(name=WATERMARK_NAME)
+
+        Order.objects.filter(status__in=COMPLETED_STATUSES, sales_counted_at__isnull=True).update(
+            sales_counted_at=F('order_date')
+        )
+        Order.objects.exclude(status__in=COMPLETED_STATUSES).update(sales_counted_at=None)
+
+        def units(**conditions):
+            totals = (
+                OrderItem.objects.filter(product=OuterRef('pk'), order__sales_counted_at__isnull=False, **conditions)
+                .values('product')
+                .annotate(total=Sum('quantity'))
+                .values('total')
+            )
+            return Coalesce(Subquery(totals), 0)
+
+        updated = Product.objects.update(
+            units_sold=units(),
+            units_sold_30d=units(order__sales_counted_at__gt=cutoff),
+        )
+
+        watermark.position = JobWatermark.position_for(cutoff)
+        watermark.save(update_fields=['position', 'updated_at'])
+
+    listing.refresh_all()
+    transaction.on_commit(catalog_cache.bump_catalog_version)
+    return updated
+
+
+def _apply(order, sign, recent):
+    quantities = (
+        OrderItem.objects.filter(order=order)
+        .values('product_id')
+        .annotate(quantity=Sum('quantity'))
+        .order_by()
+    )
+    _update_counters({row['product_id']: sign * row['quantity'] for row in quantities}, recent=recent)
+
+
+def _update_counters(deltas, total=True, recent=True):
+    """Add ``deltas`` ({product id: units}) to the selected counters"""
+    for product_id, delta in deltas.items():
+        changes = {}
+        if total:
+            changes['units_sold'] = Greatest(F('units_sold') + delta, Value(0))
+        if recent:
+            changes['units_sold_30d'] = Greatest(F('units_sold_30d') + delta, Value(0))
+        Product.objects.filter(pk=product_id).update(**changes)
+    if deltas:
+        # update() skips Product signals, so refresh what reads the counters here
+        listing.products_changed(deltas)
+        transaction.on_commit(catalog_cache.bump_catalog_version)
+    return len(deltas)
@@ -0,0 +1,118 @@
+"""
+Full-text product search.
+
+On PostgreSQL, products carry a generated ``search_vector`` column
+(name weighted above description) with a GIN index, plus a trigram index
+on ``name`` so misspelled queries still find close matches. Both are kept
+up to date by the database itself.
+
+On SQLite (local development), an FTS5 table ``store_product_fts`` mirrors
+product names and descriptions and is updated from the Product save and
+delete signals.
+
+See migration 0011_product_search_index for the schema.
+"""
+
+import re
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+# Relative weight of a name match over a description match (SQLite bm25)
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+
+def search_products(queryset, query):
+    """Filter ``queryset`` to products matching ``query``, best match first.
+
+    The queryset is annotated with ``search_rank`` (higher is better).
+    """
+    if connection.vendor == 'postgresql':
+        return _search_postgres(queryset, query)
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(queryset, query)
+    return queryset.filter(name__icontains=query)
+
+
+def _search_postgres(queryset, query):
+    # "name % query" is the pg_trgm similarity operator (threshold set by
+    # pg_trgm.similarity_threshold, 0.3 by default) and can use the GIN index
+    match = RawSQL(
+        "(store_product.search_vector @@ websearch_to_tsquery('english', %s)"
+        " OR store_product.name %% %s)",
+        (query, query),
+        output_field=BooleanField(),
+    )
+    rank = RawSQL(
+        "ts_rank(store_product.search_vector, websearch_to_tsquery('english', %s))"
+        " + similarity(store_product.name, %s)",
+        (query, query),
+        output_field=FloatField(),
+    )
+    return queryset.filter(match).annotate(search_rank=rank).order_by('-search_rank', '-id')
+
+
+def _search_sqlite(queryset, query):
+    fts_query = _fts5_query(query)
+    if not fts_query:
+        return queryset.none()
+
+    match = RawSQL(
+        "store_product.id IN (SELECT rowid FROM store_product_fts WHERE store_product_fts MATCH %s)",
+        (fts_query,),
+        output_field=BooleanField(),
+    )
+    # bm25() is lower-is-better, so negate it for a higher-is-better rank
+    rank = RawSQL(
+        "(SELECT -bm25(store_product_fts, %s, %s) FROM store_product_fts"
+        " WHERE store_product_fts MATCH %s AND rowid = store_product.id)",
+        (NAME_WEIGHT, DESCRIPTION_WEIGHT, fts_query),
+        output_field=FloatField(),
+    )
+    return queryset.filter(match).annotate(search_rank=rank).order_by('-search_rank', '-id')
+
+
+def _fts5_query(query):
+    """Turn free text into a safe FTS5 query of quoted prefix terms"""
+    terms = re.findall(r'\w+', query)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def index_product(product):
+    """Refresh a product's entry in the SQLite search index"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM store_product_fts WHERE rowid = %s", [product.pk])
+        cursor.execute(
+            "INSERT INTO store_product_fts (rowid, name, description) VALUES (%s, %s, %s)",
+            [product.pk, product.name, product.description],
+        )
+
+
+def unindex_product(product_id):
+    """Remove a product from the SQLite search index"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM store_product_fts WHERE rowid = %s", [product_id])
+
+
+def rebuild_index():
+    """Rebuild the SQLite search index from scratch.
+
+    Needed after bulk writes that bypass model signals. PostgreSQL keeps
+    its generated column current on its own, so this is a no-op there.
+    Returns the number of products indexed, or None if nothing was done.
+    """
+    if connection.vendor != 'sqlite':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM store_product_fts")
+        cursor.execute(
+            "INSERT INTO store_product_fts (rowid, name, description) "
+            "SELECT id, name, description FROM store_product"
+        )
+        cursor.execute("SELECT COUNT(*) FROM store_product_fts")
+        return cursor.fetchone()[0]
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
-from .models import Product, ProductImage, Customer, Order, OrderItem, ShippingAddress, Cart, CartItem, UserActivity
+from . import cart_batch, recommendations, translations
+from .models import Product, ProductImage, ProductReview, Customer, Order, OrderItem, ShippingAddress, Cart, CartItem, UserActivity
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -118,37 +119,95 @@ class AvatarUploadSerializer(serializers.ModelSerializer):
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
+    srcset = serializers.SerializerMethodField()
+    placeholder = serializers.SerializerMethodField()
+    
     class Meta:
         model = ProductImage
-        fields = ['id', 'image', 'alt_text', 'is_primary', 'order']
+        fields = ['id', 'image', 'alt_text', 'is_primary', 'order', 'srcset', 'placeholder']
+    
+    def get_srcset(self, obj):
+        return obj.get_srcset()
+    
+    def get_placeholder(self, obj):
+        return obj.placeholder if obj.has_current_variants() else None
+
+
+class TranslatedField(serializers.ReadOnlyField):
+    """Product text, replaced by the attached translation when it has one (see store.translations)"""
+    
+    def get_attribute(self, instance):
+        translation = getattr(instance, 'translation', None)
+        return getattr(translation, self.source, '') or super().get_attribute(instance)
 
 
 class ProductSerializer(serializers.ModelSerializer):
+    name = TranslatedField()
+    description = TranslatedField()
+    description_html = TranslatedField()
     images = ProductImageSerializer(many=True, read_only=True)
     
     class Meta:
         model = Product
-        fields = ['id', 'name', 'description', 'price', 'stock_quantity', 
+        fields = ['id', 'name', 'description', 'description_html', 'price', 'stock_quantity', 
                  'length', 'width', 'height', 'weight', 'slug', 'images',
-                 'created_at', 'updated_at', 'is_active']
+                 'rating_average', 'rating_count', 'created_at', 'updated_at', 'is_active']
         read_only_fields = ['slug', 'created_at', 'updated_at']
 
 
 class ProductListSerializer(serializers.ModelSerializer):
+    name = TranslatedField()
     primary_image = serializers.SerializerMethodField()
+    primary_image_srcset = serializers.SerializerMethodField()
+    primary_image_placeholder = serializers.SerializerMethodField()
     
     class Meta:
         model = Product
-        fields = ['id', 'name', 'price', 'slug', 'primary_image', 'stock_quantity']
+        fields = ['id', 'name', 'price', 'slug', 'primary_image', 'primary_image_srcset',
+                 'primary_image_placeholder', 'stock_quantity', 'rating_average', 'rating_count']
     
     def get_primary_image(self, obj):
-        primary_image = obj.images.filter(is_primary=True).first()
+        primary_image = obj.get_primary_image()
         if primary_image:
             return primary_image.image.url
-        first_image = obj.images.first()
-        if first_image:
-            return first_image.image.url
         return None
+    
+    def get_primary_image_srcset(self, obj):
+        primary_image = obj.get_primary_image()
+        if primary_image:
+            return primary_image.get_srcset()
+        return None
+    
+    def get_primary_image_placeholder(self, obj):
+        primary_image = obj.get_primary_image()
+        if primary_image and primary_image.has_current_variants():
+            return primary_image.placeholder
+        return None
+
+
+class ProductDetailSerializer(ProductSerializer):
+    frequently_bought_together = serializers.SerializerMethodField()
+    
+    class Meta(ProductSerializer.Meta):
+        fields = ProductSerializer.Meta.fields + ['frequently_bought_together']
+    
+    def get_frequently_bought_together(self, obj):
+        related = recommendations.frequently_bought_together(obj)
+        translations.attach(related, self.context.get('language', translations.DEFAULT_LANGUAGE))
+        return ProductListSerializer(related, many=True, context=self.context).data
+
+
+class ProductReviewSerializer(serializers.ModelSerializer):
+    reviewer = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ProductReview
+        fields = ['id', 'rating', 'title', 'body', 'reviewer', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
+    
+    def get_reviewer(self, obj):
+        user = obj.customer.user
+        return user.first_name or user.username
 
 
 class ShippingAddressSerializer(serializers.ModelSerializer):
@@ -229,6 +288,33 @@ class CartSerializer(serializers.ModelSerializer):
         fields = ['id', 'items', 'total_items', 'total_price', 'created_at', 'updated_at']
 
 
+class CartOperationSerializer(serializers.Serializer):
+    """One edit in a /api/cart/batch/ request"""
+    op = serializers.ChoiceField(choices=['add', 'set', 'remove'])
+    product_id = serializers.IntegerField(required=False)
+    item_id = serializers.IntegerField(required=False)
+    quantity = serializers.IntegerField(required=False, min_value=1)
+    
+    def validate(self, data):
+        if data['op'] == 'add':
+            if 'product_id' not in data:
+                raise serializers.ValidationError("add requires product_id")
+        elif ('item_id' in data) == ('product_id' in data):
+            raise serializers.ValidationError(f"{data['op']} requires either item_id or product_id")
+        if data['op'] != 'remove' and 'quantity' not in data:
+            raise serializers.ValidationError(f"{data['op']} requires quantity")
+        return data
+
+
+class CartBatchSerializer(serializers.Serializer):
+    operations = CartOperationSerializer(many=True, allow_empty=False)
+    
+    def validate_operations(self, value):
+        if len(value) > cart_batch.MAX_OPERATIONS:
+            raise serializers.ValidationError(f"At most {cart_batch.MAX_OPERATIONS} operations per batch")
+        return value
+
+
 class CheckoutSerializer(serializers.Serializer):
     shipping_address_id = serializers.IntegerField()
     shipping_rate_id = serializers.CharField(required=False, allow_blank=True)
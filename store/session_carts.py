@@ -0,0 +1,296 @@
+"""
+Anonymous shopping carts.
+
+Visitors who are not logged in keep their cart in the cache rather than
+in Cart/CartItem rows. With django-redis each cart is one hash
+(``cart:<session key>``: product id -> quantity, plus created/updated
+timestamps) whose TTL restarts on every change, so abandoned browse
+carts expire on their own. Other cache backends (local development,
+tests) store the same mapping under a plain cache key.
+
+Rows are only written once the visitor logs in or registers
+(login_view, register): materialize() moves the items into the
+customer's Cart and drops the cached copy once that has committed, so a
+failed merge leaves the visitor's cart where it was. Other
+authenticated requests never look at the cache. Cart rows still stored
+under the session key, from before anonymous carts moved to the cache,
+are merged and deleted at the same time. The merge is one INSERT ...
+ON CONFLICT that adds quantities to lines the customer already has,
+whatever the cart size.
+
+SessionCart carries the attributes CartSerializer reads, so anonymous
+and customer carts have the same response shape. Items of an anonymous
+cart are identified by their product id.
+
+Single edits are atomic in Redis (HINCRBY, HSET, HDEL). Edits that read
+the cart and write a new one, like cart batches, hold lock() so two of
+them on the same session cannot interleave.
+"""
+
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import Cart, CartItem, Customer, Product, primary_image_prefetch
+
+CART_KEY_PREFIX = 'cart'
+CREATED_FIELD = 'created_at'
+UPDATED_FIELD = 'updated_at'
+TIMESTAMP_FIELDS = (CREATED_FIELD, UPDATED_FIELD)
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 5
+
+# {incoming} is a SELECT of (product_id, quantity) rows; a product may repeat
+MERGE_SQL = """
+    WITH incoming (product_id, quantity) AS ({incoming})
+    INSERT INTO store_cartitem (cart_id, product_id, quantity, created_at, updated_at)
+    SELECT %s, incoming.product_id, SUM(incoming.quantity), %s, %s
+    FROM incoming JOIN store_product ON store_product.id = incoming.product_id
+    WHERE store_product.is_active
+    GROUP BY incoming.product_id
+    ON CONFLICT (cart_id, product_id) DO UPDATE
+    SET quantity = store_cartitem.quantity + excluded.quantity, updated_at = excluded.updated_at
+"""
+
+
+def get_cart_timeout():
+    return getattr(settings, 'ANONYMOUS_CART_TIMEOUT', 14 * 24 * 3600)
+
+
+class CartLocked(Exception):
+    """Another request held the cart's lock for longer than LOCK_WAIT"""
+
+
+class SessionCart:
+    """An anonymous cart read from the cache"""
+
+    id = None
+
+    def __init__(self, session_key):
+        self.session_key = session_key
+        self.reload()
+
+    def reload(self):
+        """Re-read the cart from the cache"""
+        fields = _read(self.session_key)
+        self.quantities = _quantities(fields)
+        self.created_at = _parse_timestamp(fields.get(CREATED_FIELD))
+        self.updated_at = _parse_timestamp(fields.get(UPDATED_FIELD))
+        self.__dict__.pop('items', None)
+
+    @cached_property
+    def items(self):
+        """Unsaved CartItems for active products, with products and images loaded"""
+        products = Product.objects.filter(pk__in=self.quantities, is_active=True).prefetch_related(
+            primary_image_prefetch()
+        ).in_bulk()
+        return [
+            CartItem(id=product_id, product=products[product_id], quantity=quantity)
+            for product_id, quantity in sorted(self.quantities.items())
+            if product_id in products
+        ]
+
+    @property
+    def total_items(self):
+        return sum(item.quantity for item in self.items)
+
+    @property
+    def total_price(self):
+        return sum((item.total_price for item in self.items), Decimal('0.00'))
+
+    def add(self, product_id, quantity):
+        self.quantities[product_id] = self.quantities.get(product_id, 0) + quantity
+        self._changed(increments={product_id: quantity})
+
+    def set(self, product_id, quantity):
+        self.quantities[product_id] = quantity
+        self._changed(quantities={product_id: quantity})
+
+    def remove(self, product_id):
+        self.quantities.pop(product_id, None)
+        self._changed(removed=[product_id])
+
+    def replace(self, quantities):
+        """Make the cart hold exactly ``quantities`` ({product id: quantity})"""
+        removed = [product_id for product_id in self.quantities if product_id not in quantities]
+        changed = {
+            product_id: quantity for product_id, quantity in quantities.items()
+            if self.quantities.get(product_id) != quantity
+        }
+        self.quantities = dict(quantities)
+        self._changed(quantities=changed, removed=removed)
+
+    def clear(self):
+        _delete(self.session_key)
+        self.quantities = {}
+        self.__dict__.pop('items', None)
+
+    def _changed(self, quantities=None, increments=None, removed=()):
+        now = timezone.now()
+        _write(self.session_key, quantities or {}, increments or {}, removed, now)
+        self.created_at = self.created_at or now
+        self.updated_at = now
+        self.__dict__.pop('items', None)
+
+
+def load(session_key):
+    return SessionCart(session_key)
+
+
+@contextmanager
+def lock(session_key):
+    """Hold the edit lock of a session's cart, waiting up to LOCK_WAIT seconds.
+
+    Raises CartLocked if it cannot be acquired. The lock expires after
+    LOCK_TIMEOUT seconds in case its holder dies.
+    """
+    key = f'{_key(session_key)}:lock'
+    client = _redis()
+    if client is None:
+        deadline = time.monotonic() + LOCK_WAIT
+        while not cache.add(key, 1, LOCK_TIMEOUT):
+            if time.monotonic() >= deadline:
+                raise CartLocked(session_key)
+            time.sleep(0.05)
+        try:
+            yield
+        finally:
+            cache.delete(key)
+        return
+
+    from redis.exceptions import LockError
+    redis_lock = client.lock(cache.make_key(key), timeout=LOCK_TIMEOUT, blocking_timeout=LOCK_WAIT)
+    if not redis_lock.acquire():
+        raise CartLocked(session_key)
+    try:
+        yield
+    finally:
+        try:
+            redis_lock.release()
+        except LockError:
+            # Expired and possibly taken by another request; it is theirs now
+            pass
+
+
+def materialize(session_key, customer):
+    """Move the anonymous carts for ``session_key`` into ``customer``'s Cart.
+
+    Quantities are added to any the customer already has; inactive
+    products are dropped. Returns the number of lines inserted or
+    updated; no Cart is created when there is nothing to move.
+    """
+    if not session_key:
+        return 0
+    with transaction.atomic():
+        # Serializes concurrent logins of the customer, so a cached cart is read
+        # by one of them and merged once
+        Customer.objects.select_for_update().filter(pk=customer.pk).first()
+        quantities = _quantities(_read(session_key))
+        stored = (
+            Cart.objects.select_for_update()
+            .filter(session_key=session_key, customer__isnull=True)
+            .values_list('id', flat=True)
+        )
+        stored = list(stored)
+        if not quantities and not stored:
+            return 0
+        cart, _ = Cart.objects.get_or_create(customer=customer)
+        merged = _merge(cart, quantities, stored)
+        if stored:
+            Cart.objects.filter(pk__in=stored).delete()
+        if quantities:
+            transaction.on_commit(lambda: _delete(session_key))
+    return merged
+
+
+def _merge(cart, quantities, stored_cart_ids):
+    """Upsert ``quantities`` and the lines of ``stored_cart_ids`` into ``cart``"""
+    sources, params = [], []
+    if quantities:
+        sources.append('VALUES ' + ', '.join(['(%s, %s)'] * len(quantities)))
+        params.extend(value for line in quantities.items() for value in line)
+    if stored_cart_ids:
+        placeholders = ', '.join(['%s'] * len(stored_cart_ids))
+        sources.append(f'SELECT product_id, quantity FROM store_cartitem WHERE cart_id IN ({placeholders})')
+        params.extend(stored_cart_ids)
+
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            MERGE_SQL.format(incoming=' UNION ALL '.join(sources)),
+            [*params, cart.pk, now, now],
+        )
+        return cursor.rowcount
+
+
+def _key(session_key):
+    return f'{CART_KEY_PREFIX}:{session_key}'
+
+
+def _redis():
+    """Raw Redis client when the default cache is django-redis, else None"""
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+    except (ImportError, NotImplementedError):
+        return None
+
+
+def _read(session_key):
+    client = _redis()
+    if client is None:
+        return cache.get(_key(session_key)) or {}
+    fields = client.hgetall(cache.make_key(_key(session_key)))
+    return {field.decode(): value.decode() for field, value in fields.items()}
+
+
+def _write(session_key, quantities, increments, removed, now):
+    """Set, increment and remove quantities, then restart the cart's TTL"""
+    timestamp = now.isoformat()
+    client = _redis()
+    if client is None:
+        fields = cache.get(_key(session_key)) or {}
+        fields.update({str(product_id): quantity for product_id, quantity in quantities.items()})
+        for product_id, delta in increments.items():
+            fields[str(product_id)] = int(fields.get(str(product_id), 0)) + delta
+        for product_id in removed:
+            fields.pop(str(product_id), None)
+        fields.setdefault(CREATED_FIELD, timestamp)
+        fields[UPDATED_FIELD] = timestamp
+        cache.set(_key(session_key), fields, get_cart_timeout())
+        return
+
+    key = cache.make_key(_key(session_key))
+    pipeline = client.pipeline()
+    for product_id, delta in increments.items():
+        # HINCRBY keeps concurrent adds from overwriting each other
+        pipeline.hincrby(key, product_id, delta)
+    pipeline.hset(key, mapping={**quantities, UPDATED_FIELD: timestamp})
+    if removed:
+        pipeline.hdel(key, *removed)
+    pipeline.hsetnx(key, CREATED_FIELD, timestamp)
+    pipeline.expire(key, get_cart_timeout())
+    pipeline.execute()
+
+
+def _delete(session_key):
+    client = _redis()
+    if client is None:
+        cache.delete(_key(session_key))
+    else:
+        client.delete(cache.make_key(_key(session_key)))
+
+
+def _quantities(fields):
+    """{product id: quantity} from a cart's stored fields"""
+    return {int(field): int(value) for field, value in fields.items() if field not in TIMESTAMP_FIELDS}
+
+
+def _parse_timestamp(value):
+    return datetime.fromisoformat(value) if value else None
@@ -0,0 +1,92 @@
+"""
+Signal handlers for the store app.
+
+Connected in StoreConfig.ready().
+"""
+
+from django.db import transaction
+from django.utils import timezone
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import catalog_cache, listing, reviews, sales, search, snapshot, stock
+from .models import Order, Product, ProductImage, ProductReview, ProductTranslation
+
+# Saves limited to these fields only move stock, which the storefront
+# reads live from /api/stock/ rather than from the static snapshot
+STOCK_FIELDS = frozenset({'stock_quantity', 'updated_at'})
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductTranslation)
+@receiver(post_delete, sender=ProductTranslation)
+def invalidate_catalog_cache(sender, update_fields=None, **kwargs):
+    """Bump the catalog version once the change is visible to readers"""
+    transaction.on_commit(catalog_cache.bump_catalog_version)
+    if not (update_fields and STOCK_FIELDS.issuperset(update_fields)):
+        transaction.on_commit(snapshot.mark_stale)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductTranslation)
+@receiver(post_delete, sender=ProductTranslation)
+def touch_product(sender, instance, **kwargs):
+    """Image and translation changes alter the product's list fragments (see fragments)"""
+    Product.objects.filter(pk=instance.product_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def update_product_listing(sender, instance, **kwargs):
+    listing.product_changed(instance.pk)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductTranslation)
+@receiver(post_delete, sender=ProductTranslation)
+def update_product_listing_related(sender, instance, **kwargs):
+    # Runs after touch_product, so the row picks up the new updated_at
+    listing.product_changed(instance.product_id)
+
+
+@receiver(post_save, sender=Product)
+def update_search_index(sender, instance, **kwargs):
+    search.index_product(instance)
+
+
+@receiver(post_delete, sender=Product)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.unindex_product(instance.pk)
+
+
+@receiver(post_save, sender=Product)
+def write_stock_level(sender, instance, **kwargs):
+    transaction.on_commit(lambda: stock.set_level(instance))
+
+
+@receiver(post_delete, sender=Product)
+def remove_stock_level(sender, instance, **kwargs):
+    product_id = instance.pk
+    transaction.on_commit(lambda: stock.remove(product_id))
+
+
+@receiver(post_save, sender=Order)
+def update_sales_counters(sender, instance, **kwargs):
+    """Count paid orders once their items are committed (see sales)"""
+    if sales.needs_sync(instance):
+        transaction.on_commit(lambda: sales.sync_order(instance))
+
+
+@receiver(post_save, sender=ProductReview)
+def add_review_rating(sender, instance, created, **kwargs):
+    reviews.review_saved(instance, created)
+
+
+@receiver(post_delete, sender=ProductReview)
+def remove_review_rating(sender, instance, **kwargs):
+    reviews.review_deleted(instance)
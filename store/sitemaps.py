@@ -0,0 +1,129 @@
+"""
+Static sitemaps for the public catalog.
+
+build_sitemaps() streams the slug and ``updated_at`` of every active
+product straight from the database into chunked sub-sitemaps under
+STATIC_ROOT/sitemaps/:
+
+    sitemap.xml                 sitemap index
+    sitemap-<n>.xml             up to SITEMAP_CHUNK_SIZE product URLs each
+
+with pre-compressed copies, so crawlers discover products from static
+files instead of paging through /api/products/. Builds are published by
+swapping a symlink, like the catalog snapshot (see store.snapshot).
+"""
+
+import shutil
+import uuid
+from datetime import timezone as dt_timezone
+from pathlib import Path
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Product
+from .snapshot import compress_tree, prune_builds, publish_build
+
+SITEMAP_DIR = 'sitemaps'
+BUILDS_DIR = 'sitemap-builds'
+INDEX_NAME = 'sitemap.xml'
+
+# Protocol limit on URLs per sitemap file
+MAX_CHUNK_SIZE = 50000
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def build_sitemaps(static_root=None, chunk_size=None):
+    """Write and publish the sitemap index and sub-sitemaps; returns a summary dict"""
+    static_root = Path(static_root or settings.STATIC_ROOT)
+    chunk_size = min(chunk_size or settings.SITEMAP_CHUNK_SIZE, MAX_CHUNK_SIZE)
+
+    target = static_root / BUILDS_DIR / f'{timezone.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}'
+    target.mkdir(parents=True)
+    try:
+        count, chunks = _write_chunks(target, chunk_size)
+        _write_index(target, chunks)
+        compress_tree(target)
+        publish_build(static_root, SITEMAP_DIR, target)
+    except Exception:
+        shutil.rmtree(target, ignore_errors=True)
+        raise
+
+    prune_builds(static_root / BUILDS_DIR, keep=target)
+    return {'products': count, 'sitemaps': len(chunks), 'path': str(target)}
+
+
+def product_url(slug):
+    return f"{settings.SITEMAP_SITE_URL.rstrip('/')}/products/{quote(slug)}"
+
+
+def sitemap_url(name):
+    return f"{settings.SITEMAP_SITE_URL.rstrip('/')}{settings.STATIC_URL}{SITEMAP_DIR}/{name}"
+
+
+def _write_chunks(target, chunk_size):
+    """Stream product URLs into sitemap-<n>.xml files.
+
+    Returns the URL count and a (filename, newest lastmod) pair per file.
+    """
+    rows = (
+        Product.objects.filter(is_active=True)
+        .order_by('id')
+        .values_list('slug', 'updated_at')
+        .iterator(chunk_size=2000)
+    )
+
+    count, chunks, handle = 0, [], None
+    try:
+        for slug, updated_at in rows:
+            if count % chunk_size == 0:
+                if handle is not None:
+                    _close_urlset(handle)
+                name = f'sitemap-{len(chunks) + 1}.xml'
+                handle = _open_urlset(target / name)
+                chunks.append([name, None])
+            handle.write(
+                f'<url><loc>{escape(product_url(slug))}</loc>'
+                f'<lastmod>{_lastmod(updated_at)}</lastmod></url>\n'
+            )
+            newest = chunks[-1][1]
+            chunks[-1][1] = updated_at if newest is None else max(newest, updated_at)
+            count += 1
+
+        if handle is None:
+            # Keep the index valid for an empty catalog
+            handle = _open_urlset(target / 'sitemap-1.xml')
+            chunks.append(['sitemap-1.xml', None])
+        _close_urlset(handle)
+    finally:
+        if handle is not None:
+            handle.close()
+
+    return count, chunks
+
+
+def _write_index(target, chunks):
+    with open(target / INDEX_NAME, 'w', encoding='utf-8') as handle:
+        handle.write(f'{XML_HEADER}<sitemapindex xmlns="{XMLNS}">\n')
+        for name, newest in chunks:
+            lastmod = f'<lastmod>{_lastmod(newest)}</lastmod>' if newest else ''
+            handle.write(f'<sitemap><loc>{escape(sitemap_url(name))}</loc>{lastmod}</sitemap>\n')
+        handle.write('</sitemapindex>\n')
+
+
+def _open_urlset(path):
+    handle = open(path, 'w', encoding='utf-8')
+    handle.write(f'{XML_HEADER}<urlset xmlns="{XMLNS}">\n')
+    return handle
+
+
+def _close_urlset(handle):
+    handle.write('</urlset>\n')
+    handle.close()
+
+
+def _lastmod(value):
+    return value.astimezone(dt_timezone.utc).isoformat(timespec='seconds')
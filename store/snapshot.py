@@ -0,0 +1,219 @@
+"""
+Pre-rendered static snapshot of the public catalog.
+
+build_snapshot() renders every active product into JSON files under
+STATIC_ROOT/catalog/:
+
+    index.json                  build metadata and page count
+    products/page-<n>.json      list pages (ProductListSerializer)
+    products/<slug>.json        product detail (ProductDetailSerializer)
+
+together with pre-compressed .gz (and .br when Brotli is installed)
+copies, so WhiteNoise or nginx serve the catalog with no Django view or
+database work per request.
+
+Each build is written to its own directory under catalog-builds/ and
+published by atomically repointing the ``catalog`` symlink, so readers
+never see a half-written snapshot. The previous build is kept for
+requests still reading it.
+
+Staleness is tracked with a stamp of its own rather than the catalog
+version: mark_stale() moves it for changes the snapshot renders, while
+stock-only saves and sales counters, which bump the catalog version on
+every checkout, leave it alone. Shoppers get live stock from /api/stock/.
+"""
+
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from whitenoise.compress import Compressor
+
+from . import catalog_cache
+from .background import DebouncedJob
+from .models import Product, primary_image_prefetch
+from .serializers import ProductDetailSerializer, ProductListSerializer
+
+SNAPSHOT_DIR = 'catalog'
+BUILDS_DIR = 'catalog-builds'
+KEEP_BUILDS = 2
+LOCK_KEY = 'catalog:snapshot:lock'
+LOCK_TIMEOUT = 600
+STAMP_KEY = 'catalog:snapshot:stamp'
+
+
+def build_snapshot(static_root=None, page_size=None):
+    """Render and publish a new snapshot; returns a summary dict"""
+    static_root = Path(static_root or settings.STATIC_ROOT)
+    page_size = page_size or settings.CATALOG_SNAPSHOT_PAGE_SIZE
+    version = catalog_cache.get_catalog_version()
+    # Read before rendering, so changes made during the build leave it stale
+    stamp = get_stamp()
+
+    build_id = f'{version}-{uuid.uuid4().hex[:8]}'
+    target = static_root / BUILDS_DIR / build_id
+    (target / 'products').mkdir(parents=True)
+    try:
+        count, pages = _render_products(target, page_size)
+        _write_json(target / 'index.json', {
+            'version': version,
+            'stamp': stamp,
+            'count': count,
+            'page_size': page_size,
+            'pages': pages,
+            'first_page': _page_url(1),
+        })
+        compress_tree(target)
+        publish_build(static_root, SNAPSHOT_DIR, target)
+    except Exception:
+        shutil.rmtree(target, ignore_errors=True)
+        raise
+
+    prune_builds(static_root / BUILDS_DIR, keep=target)
+    return {'version': version, 'products': count, 'pages': pages, 'path': str(target)}
+
+
+def get_published_version(static_root=None):
+    """Catalog version of the live snapshot, or None if there is none"""
+    return _published_index(static_root).get('version')
+
+
+def get_stamp():
+    """The current snapshot stamp, initialising it if needed"""
+    stamp = cache.get(STAMP_KEY)
+    if stamp is None:
+        # Seeded from the clock so a flushed cache never matches a published build
+        cache.add(STAMP_KEY, int(time.time() * 1000), timeout=None)
+        stamp = cache.get(STAMP_KEY)
+    return stamp
+
+
+def mark_stale():
+    """Record a change the snapshot renders and schedule a rebuild"""
+    try:
+        cache.incr(STAMP_KEY)
+    except ValueError:
+        get_stamp()
+    schedule_rebuild()
+
+
+def rebuild_if_stale(static_root=None, page_size=None):
+    """Build unless the live snapshot matches the snapshot stamp.
+
+    Only one process builds at a time. The builder re-checks the stamp
+    afterwards, so changes made while it was rendering are not missed.
+    Returns the summary of the last build, or None if nothing was built.
+    """
+    if not cache.add(LOCK_KEY, 1, timeout=LOCK_TIMEOUT):
+        return None
+    summary = None
+    try:
+        for _ in range(3):
+            if _published_index(static_root).get('stamp') == get_stamp():
+                break
+            summary = build_snapshot(static_root, page_size)
+    finally:
+        cache.delete(LOCK_KEY)
+    return summary
+
+
+def schedule_rebuild():
+    """Rebuild the snapshot shortly after a catalog change.
+
+    Bursts of changes (e.g. saving a product with several images) are
+    coalesced into a single background rebuild per process. Does nothing
+    unless CATALOG_SNAPSHOT_AUTO_REBUILD is enabled; production builds
+    from cron instead (build_catalog_snapshot --if-stale), keeping full
+    catalog renders out of web workers.
+    """
+    if getattr(settings, 'CATALOG_SNAPSHOT_AUTO_REBUILD', False):
+        _rebuild_job.trigger()
+
+
+_rebuild_job = DebouncedJob(rebuild_if_stale, lambda: settings.CATALOG_SNAPSHOT_DELAY)
+
+
+def _published_index(static_root):
+    index = Path(static_root or settings.STATIC_ROOT) / SNAPSHOT_DIR / 'index.json'
+    try:
+        with open(index, encoding='utf-8') as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def _render_products(target, page_size):
+    products = (
+        Product.objects.filter(is_active=True)
+        .order_by('-created_at', '-id')
+        .prefetch_related('images', primary_image_prefetch())
+        .iterator(chunk_size=page_size)
+    )
+
+    # A page is only written once the next one has started, so its
+    # "next" link is known without a separate count query
+    count, number, page = 0, 1, []
+    for product in products:
+        if len(page) == page_size:
+            _write_page(target, number, page, has_next=True)
+            number, page = number + 1, []
+        # The same payload as the API detail endpoint
+        _write_json(target / 'products' / f'{product.slug}.json', ProductDetailSerializer(product).data)
+        page.append(ProductListSerializer(product).data)
+        count += 1
+    _write_page(target, number, page, has_next=False)
+    return count, number
+
+
+def _write_page(target, number, results, has_next):
+    _write_json(target / 'products' / f'page-{number}.json', {
+        'page': number,
+        'next': _page_url(number + 1) if has_next else None,
+        'previous': _page_url(number - 1) if number > 1 else None,
+        'results': results,
+    })
+
+
+def _page_url(number):
+    return f'{settings.STATIC_URL}{SNAPSHOT_DIR}/products/page-{number}.json'
+
+
+def _write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(data, handle, cls=DjangoJSONEncoder, separators=(',', ':'))
+
+
+def compress_tree(target):
+    """Write .gz (and .br) copies next to every file under ``target``"""
+    compressor = Compressor(quiet=True)
+    for directory, _, filenames in os.walk(target):
+        for filename in filenames:
+            for _ in compressor.compress(os.path.join(directory, filename)):
+                pass
+
+
+def publish_build(static_root, name, target):
+    """Atomically point the ``name`` symlink under ``static_root`` at ``target``"""
+    link = static_root / name
+    temp_link = static_root / f'.{name}-{target.name}'
+    os.symlink(os.path.relpath(target, static_root), temp_link)
+    if link.is_dir() and not link.is_symlink():
+        # Plain directory left by an older deployment
+        shutil.rmtree(link)
+    os.replace(temp_link, link)
+
+
+def prune_builds(builds, keep):
+    """Delete old builds, keeping ``keep`` and the one before it"""
+    stale = sorted(
+        (build for build in builds.iterdir() if build != keep),
+        key=lambda build: build.stat().st_mtime,
+        reverse=True,
+    )
+    for build in stale[KEEP_BUILDS - 1:]:
+        shutil.rmtree(build, ignore_errors=True)
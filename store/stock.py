@@ -0,0 +1,126 @@
+"""
+Cached stock levels for the availability endpoint.
+
+Each product's level is its own cache key (``stock:level:<id>``) with
+its own STOCK_CACHE_TIMEOUT, so an entry that stops being written
+expires on schedule no matter how busy other products are. With
+django-redis a whole cart or product grid is read with one MGET and
+written with one pipeline.
+
+Levels are written through whenever a product is saved or deleted (see
+signals) and after bulk imports. Anything missing is read from the
+database and filled in only where no entry exists yet (SET NX), so a
+fill that raced with a write-through cannot overwrite the newer value.
+Inactive and unknown products are stored as -1 so repeated lookups for
+them do not reach the database either.
+"""
+
+import logging
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+STOCK_KEY_PREFIX = 'stock:level'
+UNAVAILABLE = -1
+
+
+def get_stock_timeout():
+    return getattr(settings, 'STOCK_CACHE_TIMEOUT', 3600)
+
+
+def get_levels(product_ids):
+    """Return {product id: quantity} for active products among ``product_ids``"""
+    product_ids = list(dict.fromkeys(product_ids))
+    levels = _read(product_ids)
+
+    missing = [product_id for product_id in product_ids if product_id not in levels]
+    if missing:
+        fresh = dict.fromkeys(missing, UNAVAILABLE)
+        fresh.update(
+            Product.objects.filter(pk__in=missing, is_active=True).values_list('id', 'stock_quantity')
+        )
+        _write(fresh, only_missing=True)
+        levels.update(fresh)
+
+    return {
+        product_id: levels[product_id]
+        for product_id in product_ids
+        if levels[product_id] != UNAVAILABLE
+    }
+
+
+def set_level(product):
+    """Write a product's current availability through to the cache"""
+    _write({product.pk: product.stock_quantity if product.is_active else UNAVAILABLE})
+
+
+def remove(product_id):
+    _write({product_id: UNAVAILABLE})
+
+
+def refresh(queryset):
+    """Re-read stock for many products at once, e.g. after a bulk update"""
+    _write({
+        product_id: quantity if is_active else UNAVAILABLE
+        for product_id, quantity, is_active in queryset.values_list('id', 'stock_quantity', 'is_active')
+    })
+
+
+def _redis():
+    """Raw Redis client when the default cache is django-redis, else None"""
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+    except (ImportError, NotImplementedError):
+        return None
+
+
+def _key(product_id):
+    return f'{STOCK_KEY_PREFIX}:{product_id}'
+
+
+def _read(product_ids):
+    if not product_ids:
+        return {}
+    client = _redis()
+    if client is None:
+        found = cache.get_many([_key(product_id) for product_id in product_ids])
+        return {int(key.rsplit(':', 1)[1]): value for key, value in found.items()}
+
+    try:
+        values = client.mget([cache.make_key(_key(product_id)) for product_id in product_ids])
+    except Exception as e:
+        # A cache outage degrades to database reads rather than failing
+        logger.warning(f"Failed to read stock levels from Redis: {e}")
+        return {}
+    return {
+        product_id: int(value)
+        for product_id, value in zip(product_ids, values)
+        if value is not None
+    }
+
+
+def _write(levels, only_missing=False):
+    """Store ``levels``; with ``only_missing``, keep any entry already cached"""
+    if not levels:
+        return
+    timeout = get_stock_timeout()
+    client = _redis()
+    if client is None:
+        if only_missing:
+            for product_id, quantity in levels.items():
+                cache.add(_key(product_id), quantity, timeout)
+        else:
+            cache.set_many({_key(product_id): quantity for product_id, quantity in levels.items()}, timeout)
+        return
+
+    try:
+        pipeline = client.pipeline()
+        for product_id, quantity in levels.items():
+            pipeline.set(cache.make_key(_key(product_id)), quantity, ex=timeout, nx=only_missing)
+        pipeline.execute()
+    except Exception as e:
+        logger.warning(f"Failed to write stock levels to Redis: {e}")
@@ -397,7 +397,7 @@ def _process_checkout_session_completed(event_data, webhook_event):
                         if product.stock_quantity >= order_item.quantity:
                             # Deduct stock
                             product.stock_quantity -= order_item.quantity
-                            product.save()
+                            product.save(update_fields=['stock_quantity', 'updated_at'])
                             logger.info(f"Deducted {order_item.quantity} units of {product.name} from stock. New stock: {product.stock_quantity}")
                         else:
                             # Not enough stock - this shouldn't happen if checkout validation worked
@@ -0,0 +1,321 @@
+"""
+Test cases for customer and anonymous carts
+"""
+
+import datetime
+import io
+from unittest import mock
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from store import cart_batch, session_carts
+from store.models import ProductImage, Customer, Cart, CartItem
+from store.tests.test_products import create_product
+
+
+class CartQueryBudgetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.products = []
+        for i in range(20):
+            product = create_product(f'Cart Product {i}', price=Decimal('2.50') + i)
+            ProductImage.objects.create(product=product, image=f'products/cart-{i}.jpg', is_primary=True)
+            self.products.append(product)
+
+    def cart_for(self, username, products):
+        user = User.objects.create_user(username=username, password='testpass123')
+        cart = Cart.objects.create(customer=Customer.objects.create(user=user))
+        for product in products:
+            CartItem.objects.create(cart=cart, product=product, quantity=2)
+        return user
+
+    def get_cart(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        client.get('/api/cart/')  # creates the session
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/cart/')
+        return response, len(queries)
+
+    def test_query_count_is_independent_of_cart_size(self):
+        small, small_queries = self.get_cart(self.cart_for('small', self.products[:1]))
+        large, large_queries = self.get_cart(self.cart_for('large', self.products))
+
+        # Customer, cart, items with products, images, totals; no session cart merge
+        self.assertEqual((small_queries, large_queries), (5, 5))
+        self.assertEqual(len(large.data['items']), 20)
+        self.assertTrue(large.data['items'][0]['product']['primary_image'].endswith('cart-0.jpg'))
+        self.assertEqual(large.data['total_items'], 40)
+        self.assertEqual(Decimal(large.data['total_price']), sum(p.price * 2 for p in self.products))
+        self.assertEqual(Decimal(small.data['total_price']), Decimal('5.00'))
+
+    def test_empty_cart_totals(self):
+        response, _ = self.get_cart(self.cart_for('empty', []))
+        self.assertEqual((response.data['total_items'], Decimal(response.data['total_price'])), (0, Decimal('0')))
+
+    def test_mutations_return_updated_cart(self):
+        self.client.force_authenticate(self.cart_for('shopper', self.products[:1]))
+        response = self.client.post('/api/cart/add/', {'product_id': self.products[1].id, 'quantity': 3})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['quantity'], response.data['cart']['total_items']), (3, 5))
+
+        response = self.client.delete(f"/api/cart/remove/{response.data['id']}/")
+        self.assertEqual(response.data['cart']['total_items'], 2)
+
+
+class AnonymousCartTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.lamp = create_product('Cart Lamp', price=Decimal('12.50'), stock_quantity=5)
+        self.vase = create_product('Cart Vase', price=Decimal('4.00'))
+        self.user = User.objects.create_user(username='shopper', password='testpass123')
+        self.customer = Customer.objects.create(user=self.user)
+
+    def add(self, product, quantity):
+        return self.client.post('/api/cart/add/', {'product_id': product.id, 'quantity': quantity})
+
+    def test_anonymous_cart_lives_in_cache(self):
+        self.assertEqual(self.add(self.lamp, 2).status_code, 201)
+        response = self.add(self.lamp, 1)
+        self.assertEqual((response.data['id'], response.data['quantity']), (self.lamp.id, 3))
+        self.add(self.vase, 1)
+
+        cart = self.client.get('/api/cart/').data
+        self.assertEqual([item['product']['id'] for item in cart['items']], [self.lamp.id, self.vase.id])
+        self.assertEqual((cart['total_items'], Decimal(cart['total_price'])), (4, Decimal('41.50')))
+        self.assertIsNotNone(cart['updated_at'])
+
+        self.assertEqual(self.add(self.lamp, 3).status_code, 400)
+        response = self.client.put(f'/api/cart/update/{self.lamp.id}/', {'quantity': 1})
+        self.assertEqual(response.data['cart']['total_items'], 2)
+        response = self.client.delete(f'/api/cart/remove/{self.vase.id}/')
+        self.assertEqual(response.data['cart']['total_items'], 1)
+        self.assertEqual(self.client.delete(f'/api/cart/remove/{self.vase.id}/').status_code, 404)
+
+        self.assertFalse(Cart.objects.exists())
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_login_moves_cart_into_database(self):
+        self.add(self.lamp, 2)
+        CartItem.objects.create(cart=Cart.objects.create(customer=self.customer), product=self.lamp, quantity=1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/login/', {'username': 'shopper', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(CartItem.objects.get(cart__customer=self.customer, product=self.lamp).quantity, 3)
+
+        self.client.force_authenticate(self.user)
+        cart = self.client.get('/api/cart/').data
+        self.assertEqual(cart['total_items'], 3)
+
+    def test_every_login_merges_stored_session_cart(self):
+        self.client.get('/api/cart/')
+        session_key = self.client.session.session_key
+        stored = Cart.objects.create(session_key=session_key)
+        CartItem.objects.create(cart=stored, product=self.lamp, quantity=1)
+        CartItem.objects.create(cart=stored, product=self.vase, quantity=2)
+        self.add(self.lamp, 2)
+        customer_cart = Cart.objects.create(customer=self.customer)
+        CartItem.objects.create(cart=customer_cart, product=self.lamp, quantity=1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/login/', {'username': 'shopper', 'password': 'testpass123'})
+        self.assertEqual(
+            dict(customer_cart.items.values_list('product_id', 'quantity')),
+            {self.lamp.id: 4, self.vase.id: 2},
+        )
+        self.assertFalse(Cart.objects.filter(pk=stored.pk).exists())
+        self.assertFalse(CartItem.objects.filter(cart_id=stored.pk).exists())
+
+    def test_merge_query_count_is_independent_of_cart_size(self):
+        products = [create_product(f'Merge {i}') for i in range(10)]
+        products.append(create_product('Merge Hidden', is_active=False))
+        Cart.objects.create(customer=self.customer)
+
+        def merge(session_key, items):
+            cart = session_carts.load(session_key)
+            for product in items:
+                cart.add(product.id, 1)
+            with CaptureQueriesContext(connection) as queries:
+                session_carts.materialize(session_key, self.customer)
+            return len(queries)
+
+        self.assertEqual(merge('small', products[:1]), merge('large', products))
+        self.assertEqual(self.customer.cart.items.count(), 10)
+        self.assertEqual(self.customer.cart.items.get(product=products[0]).quantity, 2)
+
+    def test_failed_merge_keeps_cached_cart(self):
+        self.add(self.lamp, 2)
+        session_key = self.client.session.session_key
+
+        with mock.patch.object(session_carts, '_merge', side_effect=DatabaseError('merge failed')):
+            with self.captureOnCommitCallbacks(execute=True), self.assertRaises(DatabaseError):
+                session_carts.materialize(session_key, self.customer)
+        self.assertEqual(session_carts.load(session_key).quantities, {self.lamp.id: 2})
+        self.assertFalse(Cart.objects.filter(customer=self.customer).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            session_carts.materialize(session_key, self.customer)
+        self.assertEqual(session_carts.load(session_key).quantities, {})
+        self.assertEqual(self.customer.cart.items.get().quantity, 2)
+
+    def test_register_claims_session_cart(self):
+        self.add(self.vase, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/register/', {'username': 'newcomer', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, 201)
+
+        cart = Cart.objects.get(customer__user__username='newcomer')
+        self.assertEqual(dict(cart.items.values_list('product_id', 'quantity')), {self.vase.id: 2})
+        self.assertEqual(self.client.get('/api/cart/').data['total_items'], 0)
+
+    def test_authenticated_requests_leave_session_cart_alone(self):
+        self.add(self.vase, 2)
+        self.client.force_authenticate(self.user)
+        cart = self.client.get('/api/cart/').data
+        self.assertEqual(cart['total_items'], 0)
+        self.assertEqual(session_carts.load(self.client.session.session_key).quantities, {self.vase.id: 2})
+
+
+class CartBatchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.lamp = create_product('Batch Lamp', price=Decimal('10.00'), stock_quantity=5)
+        self.vase = create_product('Batch Vase', price=Decimal('3.00'))
+        self.stand = create_product('Batch Stand', price=Decimal('1.00'))
+        self.user = User.objects.create_user(username='batcher', password='testpass123')
+        self.cart = Cart.objects.create(customer=Customer.objects.create(user=self.user))
+        self.lamp_item = CartItem.objects.create(cart=self.cart, product=self.lamp, quantity=1)
+        self.vase_item = CartItem.objects.create(cart=self.cart, product=self.vase, quantity=2)
+
+    def batch(self, *operations):
+        return self.client.post('/api/cart/batch/', {'operations': list(operations)}, format='json')
+
+    def test_operations_apply_in_order(self):
+        self.client.force_authenticate(self.user)
+        response = self.batch(
+            {'op': 'add', 'product_id': self.stand.id, 'quantity': 2},
+            {'op': 'add', 'product_id': self.lamp.id, 'quantity': 1},
+            {'op': 'set', 'item_id': self.lamp_item.id, 'quantity': 4},
+            {'op': 'remove', 'item_id': self.vase_item.id},
+            {'op': 'set', 'product_id': self.stand.id, 'quantity': 3},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {item['product']['id']: item['quantity'] for item in response.data['items']},
+            {self.lamp.id: 4, self.stand.id: 3},
+        )
+        self.assertEqual(Decimal(response.data['total_price']), Decimal('43.00'))
+        self.assertEqual(CartItem.objects.get(pk=self.lamp_item.pk).quantity, 4)
+
+    def test_failing_operation_rejects_batch(self):
+        self.client.force_authenticate(self.user)
+        response = self.batch(
+            {'op': 'remove', 'item_id': self.vase_item.id},
+            {'op': 'add', 'product_id': self.lamp.id, 'quantity': 5},
+        )
+        self.assertEqual((response.status_code, response.data['operation']), (400, 1))
+        self.assertEqual(self.cart.items.count(), 2)
+
+        response = self.batch({'op': 'set', 'item_id': 999999, 'quantity': 1})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.batch({'op': 'set', 'item_id': self.lamp_item.id}).status_code, 400)
+        self.assertEqual(self.batch().status_code, 400)
+
+    def test_query_count_is_independent_of_batch_size(self):
+        self.client.force_authenticate(self.user)
+        self.client.get('/api/cart/')
+        products = [create_product(f'Batch Extra {i}') for i in range(10)]
+        with CaptureQueriesContext(connection) as small:
+            self.batch(
+                {'op': 'set', 'item_id': self.lamp_item.id, 'quantity': 2},
+                {'op': 'add', 'product_id': products[0].id, 'quantity': 1},
+            )
+        with CaptureQueriesContext(connection) as large:
+            self.batch(
+                {'op': 'set', 'item_id': self.lamp_item.id, 'quantity': 3},
+                {'op': 'set', 'item_id': self.vase_item.id, 'quantity': 3},
+                *[{'op': 'add', 'product_id': product.id, 'quantity': 1} for product in products[1:]],
+            )
+        self.assertEqual(len(small), len(large))
+
+    def test_anonymous_batch(self):
+        response = self.batch(
+            {'op': 'add', 'product_id': self.lamp.id, 'quantity': 2},
+            {'op': 'add', 'product_id': self.vase.id, 'quantity': 1},
+            {'op': 'remove', 'item_id': self.lamp.id},
+        )
+        self.assertEqual(response.data['total_items'], 1, response.data)
+        self.assertEqual(self.client.get('/api/cart/').data['items'][0]['product']['id'], self.vase.id)
+        self.assertEqual(CartItem.objects.filter(cart__customer__isnull=True).count(), 0)
+
+    def test_anonymous_batch_rereads_cart_under_lock(self):
+        self.client.get('/api/cart/')
+        session_key = self.client.session.session_key
+        cart = session_carts.load(session_key)
+        session_carts.load(session_key).add(self.vase.id, 2)  # another request, after cart was read
+
+        cart_batch.apply(cart, [{'op': 'add', 'product_id': self.lamp.id, 'quantity': 1}])
+        self.assertEqual(session_carts.load(session_key).quantities, {self.vase.id: 2, self.lamp.id: 1})
+
+        with mock.patch.object(session_carts, 'LOCK_WAIT', 0), session_carts.lock(session_key):
+            response = self.batch({'op': 'add', 'product_id': self.lamp.id, 'quantity': 1})
+        self.assertEqual((response.status_code, response.data['operation']), (409, None))
+        self.assertEqual(session_carts.load(session_key).quantities[self.lamp.id], 1)
+
+
+class PurgeStaleCartsTest(TestCase):
+    def setUp(self):
+        self.lamp = create_product('Purge Lamp')
+        long_ago = timezone.now() - datetime.timedelta(days=40)
+        self.stale = [Cart.objects.create(session_key=f'stale{i}') for i in range(3)]
+        CartItem.objects.create(cart=self.stale[0], product=self.lamp, quantity=1)
+        self.item_touched = Cart.objects.create(session_key='touched')
+        CartItem.objects.create(cart=self.item_touched, product=self.lamp, quantity=1)
+        self.fresh = Cart.objects.create(session_key='fresh')
+        user = User.objects.create_user(username='purger', password='testpass123')
+        self.customer_cart = Cart.objects.create(customer=Customer.objects.create(user=user))
+        Cart.objects.exclude(pk=self.fresh.pk).update(updated_at=long_ago)
+        CartItem.objects.filter(cart=self.stale[0]).update(updated_at=long_ago)
+
+        Session.objects.create(session_key='expired', session_data='', expire_date=long_ago)
+        Session.objects.create(
+            session_key='live', session_data='', expire_date=timezone.now() + datetime.timedelta(days=1)
+        )
+
+    def purge(self, *args):
+        out = io.StringIO()
+        call_command('purge_stale_carts', '--batch-size', '2', '--sleep', '0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_reports_without_deleting(self):
+        output = self.purge('--dry-run')
+        self.assertIn('Would delete 3 anonymous carts', output)
+        self.assertIn('Would delete 1 expired sessions', output)
+        self.assertEqual(Cart.objects.count(), 6)
+
+    def test_deletes_only_stale_anonymous_carts(self):
+        self.assertIn('Deleted 3 anonymous carts and 1 expired sessions', self.purge())
+        self.assertEqual(
+            set(Cart.objects.values_list('pk', flat=True)),
+            {self.item_touched.pk, self.fresh.pk, self.customer_cart.pk},
+        )
+        self.assertFalse(CartItem.objects.filter(cart_id=self.stale[0].pk).exists())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['live'])
+
+    def test_rejects_non_positive_sizes(self):
+        for args in (['--batch-size', '0'], ['--days', '0'], ['--days', '-5']):
+            with self.assertRaises(CommandError):
+                call_command('purge_stale_carts', *args, stdout=io.StringIO())
+        self.assertEqual(Cart.objects.count(), 6)
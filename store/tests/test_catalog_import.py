@@ -0,0 +1,113 @@
+"""
+Test cases for catalog import and export
+"""
+
+import io
+import json
+import os
+from decimal import Decimal
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from store.models import Product
+from store.tests.test_products import create_product
+
+
+class CatalogImportExportTest(TestCase):
+    def setUp(self):
+        import tempfile
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.media = os.path.join(self.tempdir.name, 'media')
+        self.images = os.path.join(self.tempdir.name, 'images')
+        os.makedirs(self.images)
+        with open(os.path.join(self.images, 'vase.jpg'), 'wb') as handle:
+            handle.write(b'not really a jpeg')
+
+    def write(self, name, content):
+        path = os.path.join(self.tempdir.name, name)
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(content)
+        return path
+
+    def import_catalog(self, path, **options):
+        out = io.StringIO()
+        with override_settings(MEDIA_ROOT=self.media):
+            call_command('import_catalog', path, images_dir=self.images, stdout=out, **options)
+        return out.getvalue()
+
+    def test_csv_import_creates_updates_and_allocates_slugs(self):
+        existing = create_product('Existing Vase', stock_quantity=3)
+        path = self.write('catalog.csv', (
+            'slug,name,price,length,width,height,weight,stock_quantity,images\n'
+            ',Desk Lamp,12.50,1,2,3,4,5,vase.jpg\n'
+            ',Desk Lamp,13.50,1,2,3,4,6,\n'
+            f'{existing.slug},Existing Vase,30.00,1,2,3,4,8,\n'
+            ',Broken,abc,1,2,3,4,5,\n'
+        ))
+
+        output = self.import_catalog(path, chunk_size=2)
+
+        self.assertIn('2 created, 1 updated', output)
+        self.assertIn('1 rows skipped', output)
+        lamps = Product.objects.filter(name='Desk Lamp').order_by('slug')
+        self.assertEqual([lamp.slug for lamp in lamps], ['desk-lamp', 'desk-lamp-2'])
+        self.assertEqual(lamps[0].images.get().image.name, 'products/vase.jpg')
+        existing.refresh_from_db()
+        self.assertEqual((existing.price, existing.stock_quantity), (Decimal('30.00'), 8))
+
+    def test_same_named_images_are_not_mixed_up(self):
+        for folder, content in (('red', b'red image 1'), ('blue', b'blue image')):
+            os.makedirs(os.path.join(self.images, folder))
+            with open(os.path.join(self.images, folder, '1.jpg'), 'wb') as handle:
+                handle.write(content)
+        with open(os.path.join(self.tempdir.name, 'secret.jpg'), 'wb') as handle:
+            handle.write(b'outside')
+        path = self.write('catalog.csv', (
+            'slug,name,price,length,width,height,weight,images\n'
+            'red-print,Red Print,5,1,1,1,1,red/1.jpg\n'
+            'blue-print,Blue Print,5,1,1,1,1,blue/1.jpg\n'
+            'sneaky-print,Sneaky Print,5,1,1,1,1,../secret.jpg\n'
+        ))
+
+        output = self.import_catalog(path)
+
+        def image_of(slug):
+            image = Product.objects.get(slug=slug).images.get().image
+            with override_settings(MEDIA_ROOT=self.media), image.storage.open(image.name, 'rb') as handle:
+                return image.name, handle.read()
+
+        red_name, red = image_of('red-print')
+        blue_name, blue = image_of('blue-print')
+        self.assertNotEqual(red_name, blue_name)
+        self.assertEqual((red, blue), (b'red image 1', b'blue image'))
+        self.assertFalse(Product.objects.get(slug='sneaky-print').images.exists())
+        self.assertIn('outside the images directory', output)
+
+        # Unchanged images are neither copied again nor replaced
+        self.import_catalog(path)
+        self.assertEqual(image_of('red-print')[0], red_name)
+        self.assertEqual(len(os.listdir(os.path.join(self.media, 'products'))), 2)
+
+    def test_partial_jsonl_rows_only_update_given_columns(self):
+        product = create_product('Stock Feed Product', price=Decimal('9.99'))
+        path = self.write('stock.jsonl', json.dumps({'slug': product.slug, 'stock_quantity': 42}) + '\n')
+
+        self.import_catalog(path)
+
+        product.refresh_from_db()
+        self.assertEqual((product.stock_quantity, product.price), (42, Decimal('9.99')))
+
+    def test_export_round_trips_through_import(self):
+        create_product('Round Trip Product', price=Decimal('5.25'))
+        path = os.path.join(self.tempdir.name, 'export.jsonl')
+        call_command('export_catalog', path, stdout=io.StringIO())
+
+        with open(path, encoding='utf-8') as handle:
+            rows = [json.loads(line) for line in handle]
+        self.assertEqual(rows[0]['slug'], 'round-trip-product')
+        self.assertEqual(rows[0]['price'], '5.25')
+
+        Product.objects.all().delete()
+        self.import_catalog(path)
+        self.assertEqual(Product.objects.get().price, Decimal('5.25'))
@@ -0,0 +1,94 @@
+"""
+Test cases for keyset (cursor) pagination
+"""
+
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from store.models import Product, Customer, Order, UserActivity
+from store.tests.test_products import create_product
+
+
+class ProductKeysetPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        for i in range(7):
+            create_product(f'Keyset Product {i}')
+        # Ties on created_at must be broken by id
+        Product.objects.update(created_at=timezone.now())
+        self.expected = list(Product.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def walk(self, url, params=None):
+        ids = []
+        pages = 0
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['id'] for item in response.data['results'])
+            url, params = response.data['next'], None
+            pages += 1
+        return ids, pages
+
+    def test_forward_walk_visits_every_product_once(self):
+        ids, pages = self.walk('/api/products/', {'cursor': '', 'page_size': 3})
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(pages, 3)
+
+    def test_previous_link_returns_preceding_page(self):
+        first = self.client.get('/api/products/', {'cursor': '', 'page_size': 3})
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        previous = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [item['id'] for item in previous.data['results']],
+            [item['id'] for item in first.data['results']],
+        )
+
+    def test_count_can_be_skipped(self):
+        response = self.client.get('/api/products/', {'cursor': ''})
+        self.assertEqual(response.data['count'], 7)
+        response = self.client.get('/api/products/', {'cursor': '', 'count': 'false'})
+        self.assertNotIn('count', response.data)
+
+    def test_page_number_mode_still_supported(self):
+        response = self.client.get('/api/products/', {'page': 2, 'page_size': 3})
+        self.assertEqual([item['id'] for item in response.data['results']], self.expected[3:6])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get('/api/products/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class OrderAndActivityKeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='pager', password='testpass123')
+        self.customer = Customer.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_orders_walk(self):
+        for _ in range(5):
+            Order.objects.create(customer=self.customer, total_price=Decimal('10.00'))
+        expected = list(Order.objects.order_by('-order_date', '-id').values_list('id', flat=True))
+
+        first = self.client.get('/api/orders/', {'cursor': '', 'page_size': 3})
+        second = self.client.get(first.data['next'])
+        ids = [order['id'] for order in first.data['results'] + second.data['results']]
+        self.assertEqual(ids, expected)
+        self.assertIsNone(second.data['next'])
+
+    def test_activities_cursor_and_legacy_modes(self):
+        for i in range(4):
+            UserActivity.log_activity(self.user, 'login', description=f'Login {i}')
+
+        legacy = self.client.get('/api/customers/activities/')
+        self.assertEqual(len(legacy.data), 4)
+
+        page = self.client.get('/api/customers/activities/', {'cursor': '', 'page_size': 3})
+        self.assertEqual(len(page.data['results']), 3)
+        self.assertIsNotNone(page.data['next'])
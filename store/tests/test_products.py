@@ -0,0 +1,708 @@
+"""
+Test cases for the public product catalog API
+"""
+
+import io
+import json
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from store import catalog_cache
+from store.models import Product, ProductAssociation, ProductImage, ProductListing, Customer, Order, OrderItem
+
+
+def create_product(name, **kwargs):
+    """Create an active product with sensible defaults"""
+    defaults = {
+        'description': f'{name} description',
+        'price': Decimal('19.99'),
+        'stock_quantity': 10,
+        'length': Decimal('10.0'),
+        'width': Decimal('10.0'),
+        'height': Decimal('10.0'),
+        'weight': Decimal('100.0'),
+        'is_active': True,
+    }
+    defaults.update(kwargs)
+    return Product.objects.create(name=name, **defaults)
+
+
+class ProductListQueryBudgetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        for i in range(30):
+            product = create_product(f'Product {i}')
+            ProductImage.objects.create(product=product, image=f'products/{i}-a.jpg', order=0)
+            ProductImage.objects.create(product=product, image=f'products/{i}-b.jpg', order=1, is_primary=True)
+
+    def test_query_count_is_independent_of_page_size(self):
+        """A list page costs count + products + one image prefetch"""
+        with self.assertNumQueries(3):
+            small_page = self.client.get('/api/products/', {'page_size': 2})
+        with self.assertNumQueries(3):
+            large_page = self.client.get('/api/products/', {'page_size': 30})
+
+        self.assertEqual(small_page.status_code, 200)
+        self.assertEqual(len(large_page.data['results']), 30)
+
+    def test_primary_image_preferred_over_first_image(self):
+        response = self.client.get('/api/products/', {'page_size': 30})
+        for item in response.data['results']:
+            self.assertTrue(item['primary_image'].endswith('-b.jpg'))
+
+    def test_first_image_used_when_no_primary(self):
+        product = create_product('No Primary')
+        ProductImage.objects.create(product=product, image='products/second.jpg', order=2)
+        ProductImage.objects.create(product=product, image='products/first.jpg', order=1)
+
+        response = self.client.get('/api/products/', {'page_size': 1})
+        self.assertEqual(response.data['results'][0]['slug'], product.slug)
+        self.assertTrue(response.data['results'][0]['primary_image'].endswith('first.jpg'))
+
+
+class CatalogCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.product = create_product('Cached Vase')
+
+    def test_list_served_from_cache(self):
+        self.client.get('/api/products/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/products/')
+        self.assertEqual(response.data['results'][0]['name'], 'Cached Vase')
+        self.assertEqual(catalog_cache.get_stats()['hits'], 1)
+        self.assertEqual(catalog_cache.get_stats()['misses'], 1)
+
+    def test_detail_served_from_cache(self):
+        self.client.get(f'/api/products/{self.product.slug}/')
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/api/products/{self.product.slug}/')
+        self.assertEqual(response.data['id'], self.product.id)
+
+    def test_product_change_invalidates_cache(self):
+        self.client.get(f'/api/products/{self.product.slug}/')
+        version = catalog_cache.get_catalog_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Renamed Vase'
+            self.product.save()
+
+        self.assertEqual(catalog_cache.get_catalog_version(), version + 1)
+        response = self.client.get(f'/api/products/{self.product.slug}/')
+        self.assertEqual(response.data['name'], 'Renamed Vase')
+
+    def test_image_change_invalidates_cache(self):
+        version = catalog_cache.get_catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductImage.objects.create(product=self.product, image='products/new.jpg')
+        self.assertEqual(catalog_cache.get_catalog_version(), version + 1)
+
+
+class ConditionalCatalogRequestTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.product = create_product('Conditional Lamp')
+
+    def test_catalog_responses_are_publicly_cacheable(self):
+        response = self.client.get('/api/products/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertTrue(response['ETag'].startswith('"'))
+
+    def test_matching_etag_returns_not_modified_without_queries(self):
+        etag = self.client.get(f'/api/products/{self.product.slug}/')['ETag']
+        # A 304 must not depend on the payload being cached
+        cache.delete(catalog_cache.detail_key(self.product.slug))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/api/products/{self.product.slug}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_etag_changes_with_catalog(self):
+        etag = self.client.get('/api/products/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            create_product('Another Lamp')
+
+        response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_differs_per_query(self):
+        first = self.client.get('/api/products/', {'page_size': 1})['ETag']
+        second = self.client.get('/api/products/', {'page_size': 2})['ETag']
+        self.assertNotEqual(first, second)
+
+    def test_private_endpoints_keep_no_store(self):
+        response = self.client.get('/api/cart/')
+        self.assertIn('no-store', response['Cache-Control'])
+
+
+class ProductSearchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.vase = create_product('Geometric Vase', description='A faceted planter for succulents')
+        self.planter = create_product('Spiral Planter', description='Pairs well with a geometric vase')
+        self.stand = create_product('Phone Stand', description='Adjustable desk stand')
+        self.hidden = create_product('Hidden Vase', is_active=False)
+
+    def search(self, query, **params):
+        return self.client.get('/api/products/search/', {'q': query, **params})
+
+    def test_name_matches_rank_above_description_matches(self):
+        response = self.search('geometric vase')
+        self.assertEqual(response.status_code, 200)
+        slugs = [item['slug'] for item in response.data['results']]
+        self.assertEqual(slugs, [self.vase.slug, self.planter.slug])
+
+    def test_inactive_products_are_excluded(self):
+        response = self.search('hidden')
+        self.assertEqual(response.data['count'], 0)
+
+    def test_index_follows_product_updates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.stand.name = 'Tablet Stand'
+            self.stand.save()
+        self.assertEqual(self.search('tablet').data['results'][0]['id'], self.stand.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.stand.delete()
+        self.assertEqual(self.search('tablet').data['count'], 0)
+
+    def test_prefix_and_punctuation_are_handled(self):
+        response = self.search('geom" (*')
+        self.assertEqual(response.data['count'], 2)
+
+    def test_missing_query_is_rejected(self):
+        self.assertEqual(self.search('').status_code, 400)
+
+
+@override_settings(AUTOCOMPLETE_VERSION_CHECK_INTERVAL=0)
+
+
+class ProductAutocompleteTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.vase = create_product('Geometric Vase')
+        self.gear = create_product('Gear Keychain')
+        self.lamp = create_product('Moon Lamp')
+        create_product('Geode Bookend', is_active=False)
+
+        user = User.objects.create_user(username='buyer', password='testpass123')
+        order = Order.objects.create(customer=Customer.objects.create(user=user), total_price=Decimal('50.00'))
+        OrderItem.objects.create(order=order, product=self.gear, quantity=3, price=Decimal('10.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = 'processing'
+            order.save()
+
+    def suggest(self, prefix, **params):
+        return self.client.get('/api/products/autocomplete/', {'q': prefix, **params}).data['results']
+
+    def test_matches_word_prefixes_by_popularity(self):
+        results = self.suggest('ge')
+        self.assertEqual([item['id'] for item in results], [self.gear.id, self.vase.id])
+
+    def test_matches_later_words_and_limit(self):
+        self.assertEqual(self.suggest('VAS')[0]['slug'], self.vase.slug)
+        self.assertEqual(len(self.suggest('g', limit=1)), 1)
+
+    def test_hot_path_does_not_touch_database(self):
+        self.suggest('moon')
+        with self.assertNumQueries(0):
+            results = self.suggest('moo')
+        self.assertEqual(results[0]['id'], self.lamp.id)
+
+    def test_index_rebuilt_when_catalog_version_changes(self):
+        self.assertEqual(self.suggest('tile'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            tile = create_product('Tile Coaster')
+        self.assertEqual(self.suggest('tile')[0]['id'], tile.id)
+
+
+class ProductFilterTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.cheap = create_product('Cheap Clip', price=Decimal('5.00'), weight=Decimal('20.0'))
+        self.mid = create_product('Mid Vase', price=Decimal('30.00'), weight=Decimal('300.0'))
+        self.pricey = create_product('Chess Set', price=Decimal('120.00'), weight=Decimal('1200.0'), stock_quantity=0)
+
+    def ids(self, **params):
+        response = self.client.get('/api/products/', params)
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']]
+
+    def test_price_and_stock_filters(self):
+        self.assertEqual(set(self.ids(min_price='10')), {self.mid.id, self.pricey.id})
+        self.assertEqual(self.ids(min_price='10', in_stock='true'), [self.mid.id])
+        self.assertEqual(self.ids(max_weight='100'), [self.cheap.id])
+
+    def test_sorting(self):
+        self.assertEqual(self.ids(ordering='price'), [self.cheap.id, self.mid.id, self.pricey.id])
+        self.assertEqual(self.ids(ordering='-price'), [self.pricey.id, self.mid.id, self.cheap.id])
+        self.assertEqual(self.ids(ordering='stock')[-1], self.pricey.id)
+
+    def test_sorting_with_keyset_pagination(self):
+        first = self.client.get('/api/products/', {'ordering': 'price', 'cursor': '', 'page_size': 2})
+        second = self.client.get(first.data['next'])
+        self.assertEqual(
+            [item['id'] for item in first.data['results'] + second.data['results']],
+            [self.cheap.id, self.mid.id, self.pricey.id],
+        )
+
+    def test_invalid_parameters_rejected(self):
+        self.assertEqual(self.client.get('/api/products/', {'min_price': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/products/', {'ordering': 'name'}).status_code, 400)
+
+    def test_facet_counts_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/products/facets/', {'in_stock': 'true', 'min_price': '10'})
+        self.assertEqual(response.data['count'], 1)
+
+        price = {bucket['key']: bucket['count'] for bucket in response.data['facets']['price']}
+        # The price facet ignores its own filter but honours in_stock
+        self.assertEqual(price['0-10'], 1)
+        self.assertEqual(price['25-50'], 1)
+        self.assertEqual(price['100+'], 0)
+
+        stock = {bucket['key']: bucket['count'] for bucket in response.data['facets']['in_stock']}
+        self.assertEqual(stock, {'true': 1, 'false': 1})
+
+    def test_facet_bounds_reproduce_bucket_counts(self):
+        create_product('Edge Ten', price=Decimal('10.00'))
+        create_product('Edge Below', price=Decimal('9.99'))
+        buckets = self.client.get('/api/products/facets/').data['facets']['price']
+        self.assertEqual([(bucket['key'], bucket['count']) for bucket in buckets[:2]], [('0-10', 2), ('10-25', 1)])
+
+        for bucket in buckets:
+            params = {f'{bound}_price': str(bucket[bound]) for bound in ('min', 'max') if bucket[bound] is not None}
+            self.assertEqual(len(self.ids(**params)), bucket['count'], bucket)
+
+
+class ProductImageVariantTest(TestCase):
+    def test_render_variants_skips_upscaling(self):
+        import io
+        from PIL import Image
+        from store.images import render_variants
+
+        buffer = io.BytesIO()
+        Image.new('RGBA', (500, 250), (200, 10, 10, 128)).save(buffer, 'PNG')
+        size, renditions, placeholder = render_variants(buffer.getvalue(), [320, 640])
+
+        self.assertEqual(size, (500, 250))
+        self.assertEqual(sorted(renditions), [('jpeg', 320), ('jpeg', 500), ('webp', 320), ('webp', 500)])
+        self.assertTrue(placeholder.startswith('data:image/jpeg;base64,'))
+
+    def test_srcset_only_for_current_source(self):
+        product = create_product('Variant Product')
+        image = ProductImage.objects.create(
+            product=product,
+            image='products/variant.jpg',
+            placeholder='data:image/jpeg;base64,AAAA',
+            variants={
+                'source': 'products/variant.jpg',
+                'webp': {'640': 'products/variants/1/640.webp', '320': 'products/variants/1/320.webp'},
+                'jpeg': {'320': 'products/variants/1/320.jpg'},
+            },
+        )
+        srcset = image.get_srcset()
+        self.assertEqual(
+            srcset['webp'],
+            '/media/products/variants/1/320.webp 320w, /media/products/variants/1/640.webp 640w',
+        )
+
+        image.image = 'products/replaced.jpg'
+        self.assertIsNone(image.get_srcset())
+
+
+class ProductBatchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.products = [create_product(f'Batch Product {i}') for i in range(5)]
+        for product in self.products:
+            ProductImage.objects.create(product=product, image=f'products/{product.slug}-a.jpg', order=0)
+            ProductImage.objects.create(product=product, image=f'products/{product.slug}-b.jpg', order=1)
+        self.inactive = create_product('Hidden Batch Product', is_active=False)
+
+    def test_batch_uses_two_queries_then_cache(self):
+        ids = ','.join(str(product.id) for product in reversed(self.products))
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/products/batch/', {'ids': ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            [product.id for product in reversed(self.products)],
+        )
+        self.assertEqual(len(response.data['results'][0]['images']), 2)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/products/batch/', {'ids': ids})
+        self.assertEqual(cached.data, response.data)
+
+    def test_ids_and_slugs_via_post(self):
+        response = self.client.post('/api/products/batch/', {
+            'ids': [self.products[0].id, self.inactive.id, 999999],
+            'slugs': [self.products[1].slug, self.products[0].slug, 'no-such-product'],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            [self.products[0].id, self.products[1].id],
+        )
+        self.assertEqual(response.data['not_found'], {
+            'ids': [self.inactive.id, 999999],
+            'slugs': ['no-such-product'],
+        })
+
+    def test_invalid_and_oversized_requests(self):
+        self.assertEqual(self.client.get('/api/products/batch/').status_code, 400)
+        self.assertEqual(self.client.get('/api/products/batch/', {'ids': 'abc'}).status_code, 400)
+        too_many = ','.join(str(i) for i in range(1, 302))
+        self.assertEqual(self.client.get('/api/products/batch/', {'ids': too_many}).status_code, 400)
+
+
+class FrequentlyBoughtTogetherTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        user = User.objects.create_user(username='shopper', password='testpass123')
+        self.customer = Customer.objects.create(user=user)
+        self.lamp, self.bulb, self.shade, self.stand = (
+            create_product(name) for name in ('Lamp', 'Bulb', 'Shade', 'Stand')
+        )
+
+    def order(self, *products, status='delivered'):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(customer=self.customer, total_price=Decimal('10.00'))
+            for product in products:
+                OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+            self.set_status(order, status)
+        return order
+
+    def set_status(self, order, status):
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = status
+            order.save()
+
+    def build(self):
+        call_command('build_recommendations', settle_minutes=0, stdout=io.StringIO())
+
+    def scores(self, product):
+        return dict(ProductAssociation.objects.filter(product=product).values_list('related__name', 'score'))
+
+    def test_counts_are_incremental(self):
+        self.order(self.lamp, self.bulb, self.shade)
+        self.order(self.lamp, self.bulb)
+        self.order(self.lamp, self.stand, status='cancelled')
+        self.order(self.lamp, self.stand, status='pending')
+        self.build()
+        self.assertEqual(self.scores(self.lamp), {'Bulb': 2, 'Shade': 1})
+
+        self.order(self.lamp, self.shade)
+        self.build()
+        self.assertEqual(self.scores(self.lamp), {'Bulb': 2, 'Shade': 2})
+        self.assertEqual(self.scores(self.shade), {'Lamp': 2, 'Bulb': 1})
+
+        self.build()
+        self.assertEqual(self.scores(self.lamp), {'Bulb': 2, 'Shade': 2})
+
+    def test_late_payments_and_cancellations_are_reflected(self):
+        pending = self.order(self.lamp, self.bulb, status='pending')
+        paid = self.order(self.lamp, self.shade)
+        self.build()
+        self.assertEqual(self.scores(self.lamp), {'Shade': 1})
+
+        # Paid after the watermark passed its order id
+        self.set_status(pending, 'processing')
+        self.set_status(paid, 'cancelled')
+        self.assertEqual(self.scores(self.lamp), {})
+        self.build()
+        self.assertEqual(self.scores(self.lamp), {'Bulb': 1})
+        self.assertEqual(self.scores(self.bulb), {'Lamp': 1})
+
+        call_command('build_recommendations', '--full', settle_minutes=0, stdout=io.StringIO())
+        self.assertEqual(self.scores(self.lamp), {'Bulb': 1})
+
+    def test_detail_lists_top_related_products(self):
+        self.order(self.lamp, self.bulb, self.shade)
+        self.order(self.lamp, self.bulb)
+        self.build()
+
+        response = self.client.get(f'/api/products/{self.lamp.slug}/')
+        self.assertEqual(
+            [item['name'] for item in response.data['frequently_bought_together']],
+            ['Bulb', 'Shade'],
+        )
+
+
+class ProductFragmentTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.products = [create_product(f'Fragment Product {i}') for i in range(3)]
+        for product in self.products:
+            ProductImage.objects.create(product=product, image=f'products/{product.slug}.jpg')
+
+    def test_page_matches_serializer_output(self):
+        from store.serializers import ProductListSerializer
+
+        response = self.client.get('/api/products/')
+        expected = ProductListSerializer(Product.objects.order_by('-created_at', '-id'), many=True).data
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content)['results'], json.loads(json.dumps(expected)))
+        self.assertEqual(response.data['count'], 3)
+
+    def test_fragments_survive_catalog_invalidation(self):
+        self.client.get('/api/products/')
+        catalog_cache.bump_catalog_version()
+        # count + page rows; no image prefetch or serialization
+        with self.assertNumQueries(2):
+            self.client.get('/api/products/')
+
+    def test_image_change_regenerates_fragment(self):
+        self.client.get('/api/products/')
+        product = self.products[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductImage.objects.create(product=product, image='products/new-primary.jpg', is_primary=True)
+
+        response = self.client.get('/api/products/')
+        item = next(item for item in response.data['results'] if item['id'] == product.id)
+        self.assertTrue(item['primary_image'].endswith('new-primary.jpg'))
+
+
+class ProductListingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.product = create_product('Listing Product', stock_quantity=0)
+
+    def test_row_follows_product_changes(self):
+        row = ProductListing.objects.get(pk=self.product.pk)
+        self.assertFalse(row.in_stock)
+
+        self.product.stock_quantity = 4
+        self.product.price = Decimal('7.50')
+        self.product.save()
+        row = ProductListing.objects.get(pk=self.product.pk)
+        self.assertTrue(row.in_stock)
+        self.assertEqual(row.price, Decimal('7.50'))
+
+        self.product.is_active = False
+        self.product.save()
+        self.assertFalse(ProductListing.objects.filter(pk=self.product.pk).exists())
+
+        self.product.is_active = True
+        self.product.save()
+        self.assertTrue(ProductListing.objects.filter(pk=self.product.pk).exists())
+        product_id = self.product.pk
+        self.product.delete()
+        self.assertFalse(ProductListing.objects.filter(pk=product_id).exists())
+
+    def test_primary_image_follows_image_changes(self):
+        ProductImage.objects.create(product=self.product, image='products/second.jpg', order=1)
+        primary = ProductImage.objects.create(product=self.product, image='products/primary.jpg', is_primary=True)
+        self.assertEqual(ProductListing.objects.get(pk=self.product.pk).primary_image_id, primary.id)
+
+        primary.delete()
+        row = ProductListing.objects.get(pk=self.product.pk)
+        self.assertTrue(row.primary_image.image.name.endswith('second.jpg'))
+
+    def test_list_reads_listing(self):
+        Product.objects.filter(pk=self.product.pk).update(name='Changed Behind The Listing')
+        response = self.client.get('/api/products/')
+        self.assertEqual(response.data['results'][0]['name'], 'Listing Product')
+
+        call_command('refresh_product_listing', stdout=io.StringIO())
+        cache.clear()
+        response = self.client.get('/api/products/')
+        self.assertEqual(response.data['results'][0]['name'], 'Changed Behind The Listing')
+
+
+class SalesCounterTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.lamp = create_product('Sales Lamp')
+        self.vase = create_product('Sales Vase')
+        self.customer = Customer.objects.create(user=User.objects.create_user(username='seller', password='x'))
+
+    def place_order(self, items, status='processing'):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(customer=self.customer, total_price=Decimal('10.00'))
+            for product, quantity in items:
+                OrderItem.objects.create(order=order, product=product, quantity=quantity, price=product.price)
+            order.status = status
+            order.save()
+        return order
+
+    def counters(self, product):
+        product.refresh_from_db()
+        return product.units_sold, product.units_sold_30d
+
+    def test_paid_orders_counted_once_and_cancellation_reverts(self):
+        order = self.place_order([(self.lamp, 2), (self.vase, 1)])
+        self.assertEqual(self.counters(self.lamp), (2, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = 'shipped'
+            order.save()
+        self.assertEqual(self.counters(self.lamp), (2, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = 'cancelled'
+            order.save()
+        self.assertEqual(self.counters(self.lamp), (0, 0))
+        self.assertEqual(self.counters(self.vase), (0, 0))
+
+    def test_pending_orders_not_counted(self):
+        self.place_order([(self.lamp, 4)], status='pending')
+        self.assertEqual(self.counters(self.lamp), (0, 0))
+
+    def test_expiry_and_backfill(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from store import sales
+
+        self.place_order([(self.lamp, 3)])
+        sales.expire_recent(now=timezone.now() + timedelta(days=31))
+        self.assertEqual(self.counters(self.lamp), (3, 0))
+
+        # Counting is idempotent when run again over the same window
+        sales.expire_recent(now=timezone.now() + timedelta(days=31))
+        self.assertEqual(self.counters(self.lamp), (3, 0))
+
+        Product.objects.update(units_sold=0, units_sold_30d=0)
+        call_command('refresh_sales_counters', '--backfill', stdout=io.StringIO())
+        self.assertEqual(self.counters(self.lamp), (3, 3))
+
+    def test_admin_action_counts_orders_under_status_filter(self):
+        order = self.place_order([(self.lamp, 2)], status='pending')
+        admin_user = User.objects.create_superuser(username='admin', password='x')
+        self.client.force_login(admin_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/admin/store/order/?status__exact=pending', {
+                'action': 'mark_as_processing',
+                '_selected_action': [order.pk],
+            })
+        self.assertEqual(response.status_code, 302)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'processing')
+        self.assertEqual(self.counters(self.lamp), (2, 2))
+
+    def test_best_selling_ordering(self):
+        self.place_order([(self.vase, 5)])
+        response = self.client.get('/api/products/', {'ordering': 'best_selling'})
+        self.assertEqual([item['id'] for item in response.data['results']], [self.vase.id, self.lamp.id])
+
+        response = self.client.get('/api/products/', {'ordering': 'best_selling', 'page_size': 1})
+        self.assertEqual(response.data['results'][0]['id'], self.vase.id)
+        second = self.client.get(response.data['next'])
+        self.assertEqual(second.data['results'][0]['id'], self.lamp.id)
+
+
+class ProductTranslationTest(TestCase):
+    def setUp(self):
+        from store.models import ProductTranslation
+
+        cache.clear()
+        self.client = APIClient()
+        self.lamp = create_product('Moon Lamp')
+        self.vase = create_product('Spiral Vase')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.translation = ProductTranslation.objects.create(
+                product=self.lamp, language='es', name='Lámpara Luna', description='Una lámpara'
+            )
+        ProductTranslation.objects.create(product=self.lamp, language='fr', name='Lampe Lune')
+
+    def names(self, response):
+        return {item['id']: item['name'] for item in response.data['results']}
+
+    def test_accept_language_selects_translation_with_english_fallback(self):
+        response = self.client.get('/api/products/', HTTP_ACCEPT_LANGUAGE='es-MX,es;q=0.9,en;q=0.5')
+        self.assertEqual(self.names(response), {self.lamp.id: 'Lámpara Luna', self.vase.id: 'Spiral Vase'})
+        self.assertIn('Accept-Language', response['Vary'])
+
+        detail = self.client.get(f'/api/products/{self.lamp.slug}/', HTTP_ACCEPT_LANGUAGE='es')
+        self.assertEqual(detail.data['description'], 'Una lámpara')
+        # Blank translated fields fall back too
+        detail = self.client.get(f'/api/products/{self.lamp.slug}/', HTTP_ACCEPT_LANGUAGE='fr')
+        self.assertEqual(detail.data['description'], 'Moon Lamp description')
+
+    def test_languages_cached_and_tagged_separately(self):
+        english = self.client.get('/api/products/')
+        spanish = self.client.get('/api/products/', HTTP_ACCEPT_LANGUAGE='es')
+        self.assertNotEqual(english['ETag'], spanish['ETag'])
+        self.assertEqual(self.names(english)[self.lamp.id], 'Moon Lamp')
+
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/products/', HTTP_ACCEPT_LANGUAGE='es')
+        self.assertEqual(self.names(cached)[self.lamp.id], 'Lámpara Luna')
+
+        # Unsupported languages share the English entries
+        with self.assertNumQueries(0):
+            self.client.get('/api/products/', HTTP_ACCEPT_LANGUAGE='ja')
+
+    def test_customer_preference_wins(self):
+        user = User.objects.create_user(username='francophone', password='testpass123')
+        Customer.objects.create(user=user, preferred_language='fr')
+        self.client.force_authenticate(user)
+        response = self.client.get('/api/products/', HTTP_ACCEPT_LANGUAGE='es')
+        self.assertEqual(self.names(response)[self.lamp.id], 'Lampe Lune')
+
+    def test_translation_change_invalidates_cached_pages(self):
+        self.client.get('/api/products/', HTTP_ACCEPT_LANGUAGE='es')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.translation.name = 'Lámpara Lunar'
+            self.translation.save()
+        response = self.client.get('/api/products/', HTTP_ACCEPT_LANGUAGE='es')
+        self.assertEqual(self.names(response)[self.lamp.id], 'Lámpara Lunar')
+
+
+class ProductDescriptionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_markdown_rendered_and_sanitized_on_save(self):
+        product = create_product(
+            'Markdown Product',
+            description='**Bold** [link](https://example.com) <script>alert(1)</script> [x](javascript:alert(1))',
+        )
+        self.assertIn('<strong>Bold</strong>', product.description_html)
+        self.assertIn('rel="noopener noreferrer nofollow"', product.description_html)
+        self.assertNotIn('<script', product.description_html)
+        self.assertNotIn('javascript:', product.description_html)
+
+        product.description = '## Title'
+        product.save(update_fields=['description'])
+        product.refresh_from_db()
+        self.assertEqual(product.description_html, '<h2>Title</h2>')
+
+        response = self.client.get(f'/api/products/{product.slug}/')
+        self.assertEqual(response.data['description_html'], product.description_html)
+
+    def test_command_renders_stale_rows_only(self):
+        product = create_product('Stale Product', description='*old renderer*')
+        Product.objects.filter(pk=product.pk).update(description_html='', description_renderer='')
+        current = create_product('Current Product', description='*current*')
+
+        out = io.StringIO()
+        call_command('render_descriptions', stdout=out)
+        self.assertIn('Rendered 1 descriptions', out.getvalue())
+        product.refresh_from_db()
+        self.assertEqual(product.description_html, '<p><em>old renderer</em></p>')
+
+        out = io.StringIO()
+        call_command('render_descriptions', '--all', stdout=out)
+        self.assertIn('Rendered 2 descriptions', out.getvalue())
+        self.assertTrue(Product.objects.get(pk=current.pk).description_html)
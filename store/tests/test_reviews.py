@@ -0,0 +1,90 @@
+"""
+Test cases for product reviews and rating aggregates
+"""
+
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from store.models import ProductReview, Customer, Order, OrderItem
+from store.tests.test_products import create_product
+
+
+class ProductReviewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.lamp = create_product('Review Lamp')
+        self.vase = create_product('Review Vase')
+        self.buyers = []
+        for i in range(3):
+            user = User.objects.create_user(username=f'reviewer{i}', password='testpass123')
+            customer = Customer.objects.create(user=user)
+            order = Order.objects.create(customer=customer, total_price=Decimal('20.00'), status='delivered')
+            OrderItem.objects.create(order=order, product=self.lamp, quantity=1, price=self.lamp.price)
+            self.buyers.append(user)
+
+    def review(self, user, rating, product=None):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/products/{(product or self.lamp).slug}/reviews/', {'rating': rating, 'title': 'Nice'}
+            )
+        self.client.force_authenticate(None)
+        return response
+
+    def test_only_buyers_review_once(self):
+        self.assertEqual(self.review(self.buyers[0], 5).status_code, 201)
+        self.assertEqual(self.review(self.buyers[0], 4).status_code, 400)
+        self.assertEqual(self.review(self.buyers[0], 4, product=self.vase).status_code, 403)
+        self.assertEqual(self.review(self.buyers[1], 6).status_code, 400)
+        self.assertEqual(self.client.post(f'/api/products/{self.lamp.slug}/reviews/', {'rating': 5}).status_code, 401)
+
+    def test_aggregates_follow_reviews(self):
+        self.review(self.buyers[0], 5)
+        self.review(self.buyers[1], 4)
+        self.lamp.refresh_from_db()
+        self.assertEqual((self.lamp.rating_count, self.lamp.rating_sum, self.lamp.rating_average),
+                         (2, 9, Decimal('4.50')))
+
+        review = ProductReview.objects.get(customer__user=self.buyers[1])
+        review.rating = 1
+        review.save()
+        self.lamp.refresh_from_db()
+        self.assertEqual((self.lamp.rating_sum, self.lamp.rating_average), (6, Decimal('3.00')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            review.delete()
+        response = self.client.get(f'/api/products/{self.lamp.slug}/')
+        self.assertEqual((response.data['rating_count'], response.data['rating_average']), (1, '5.00'))
+
+    def test_text_edit_refreshes_cached_reviews(self):
+        self.review(self.buyers[0], 5)
+        url = f'/api/products/{self.lamp.slug}/reviews/'
+        self.assertEqual(self.client.get(url).data['results'][0]['title'], 'Nice')
+
+        review = ProductReview.objects.get()
+        review.title = 'Even nicer'
+        with self.captureOnCommitCallbacks(execute=True):
+            review.save()
+        self.assertEqual(self.client.get(url).data['results'][0]['title'], 'Even nicer')
+
+    def test_top_rated_ordering_reads_stored_average(self):
+        self.review(self.buyers[0], 3)
+        response = self.client.get('/api/products/', {'ordering': 'top_rated'})
+        results = response.data['results']
+        self.assertEqual([item['id'] for item in results], [self.lamp.id, self.vase.id])
+        self.assertEqual(results[0]['rating_average'], '3.00')
+
+    def test_reviews_paged_by_cursor(self):
+        for rating, user in zip((5, 4, 3), self.buyers):
+            self.review(user, rating)
+        url = f'/api/products/{self.lamp.slug}/reviews/'
+        first = self.client.get(url, {'page_size': 2})
+        self.assertEqual([item['rating'] for item in first.data['results']], [3, 4])
+        self.assertIn('cursor=', first.data['next'])
+        second = self.client.get(first.data['next'])
+        self.assertEqual([item['rating'] for item in second.data['results']], [5])
+        self.assertIsNone(second.data['next'])
@@ -0,0 +1,57 @@
+"""
+Test cases for sitemap generation
+"""
+
+import io
+import os
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from store import sitemaps
+from store.models import Product
+from store.tests.test_products import create_product
+
+
+class SitemapTest(TestCase):
+    def setUp(self):
+        import tempfile
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        self.static_root = tempdir.name
+        for i in range(5):
+            create_product(f'Sitemap Product {i}')
+        create_product('Hidden Sitemap Product', is_active=False)
+
+    def read(self, name):
+        with open(os.path.join(self.static_root, 'sitemaps', name), encoding='utf-8') as handle:
+            return handle.read()
+
+    @override_settings(SITEMAP_SITE_URL='https://shop.example/')
+    def test_build_writes_index_and_chunks(self):
+        summary = sitemaps.build_sitemaps(self.static_root, chunk_size=2)
+
+        self.assertEqual((summary['products'], summary['sitemaps']), (5, 3))
+        index = self.read('sitemap.xml')
+        self.assertEqual(index.count('<sitemap>'), 3)
+        self.assertIn('<loc>https://shop.example/static/sitemaps/sitemap-3.xml</loc>', index)
+        urls = ''.join(self.read(f'sitemap-{n}.xml') for n in (1, 2, 3))
+        self.assertEqual(urls.count('<url>'), 5)
+        self.assertIn('<loc>https://shop.example/products/sitemap-product-0</loc>', urls)
+        self.assertNotIn('hidden-sitemap-product', urls)
+        product = Product.objects.get(slug='sitemap-product-0')
+        self.assertIn(f"<lastmod>{product.updated_at.isoformat(timespec='seconds')}</lastmod>", urls)
+        self.assertTrue(os.path.exists(os.path.join(self.static_root, 'sitemaps', 'sitemap.xml.gz')))
+
+    def test_empty_catalog_builds_valid_index(self):
+        Product.objects.all().delete()
+        sitemaps.build_sitemaps(self.static_root)
+        self.assertIn('sitemap-1.xml', self.read('sitemap.xml'))
+        self.assertIn('<urlset', self.read('sitemap-1.xml'))
+
+    def test_sitemap_served_by_static_middleware(self):
+        with override_settings(STATIC_ROOT=self.static_root):
+            from django.test import Client
+            call_command('build_sitemaps', stdout=io.StringIO())
+            response = Client().get('/static/sitemaps/sitemap.xml', HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Encoding'], 'gzip')
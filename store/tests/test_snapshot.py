@@ -0,0 +1,109 @@
+"""
+Test cases for the static catalog snapshot
+"""
+
+import json
+import os
+from unittest import mock
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from store import catalog_cache, snapshot
+from store.models import Product, ProductImage
+from store.tests.test_products import create_product
+
+
+class CatalogSnapshotTest(TestCase):
+    def setUp(self):
+        import tempfile
+        cache.clear()
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        self.static_root = tempdir.name
+        for i in range(5):
+            product = create_product(f'Snapshot Product {i}')
+            ProductImage.objects.create(product=product, image=f'products/snapshot-{i}.jpg')
+        create_product('Hidden Snapshot Product', is_active=False)
+
+    def read(self, *parts):
+        with open(os.path.join(self.static_root, 'catalog', *parts), encoding='utf-8') as handle:
+            return json.load(handle)
+
+    def test_build_writes_pages_details_and_compressed_copies(self):
+        summary = snapshot.build_snapshot(self.static_root, page_size=2)
+
+        self.assertEqual((summary['products'], summary['pages']), (5, 3))
+        index = self.read('index.json')
+        self.assertEqual(index['version'], catalog_cache.get_catalog_version())
+        first = self.read('products', 'page-1.json')
+        self.assertEqual(first['next'], '/static/catalog/products/page-2.json')
+        self.assertIsNone(self.read('products', 'page-3.json')['next'])
+        detail = self.read('products', 'snapshot-product-0.json')
+        self.assertEqual(detail['images'][0]['image'], '/media/products/snapshot-0.jpg')
+        self.assertFalse(os.path.exists(os.path.join(self.static_root, 'catalog', 'products',
+                                                     'hidden-snapshot-product.json')))
+        self.assertTrue(os.path.exists(os.path.join(self.static_root, 'catalog', 'products', 'page-1.json.gz')))
+
+    def test_rebuild_swaps_link_and_skips_when_current(self):
+        snapshot.build_snapshot(self.static_root)
+        self.assertIsNone(snapshot.rebuild_if_stale(self.static_root))
+
+        snapshot.mark_stale()
+        summary = snapshot.rebuild_if_stale(self.static_root)
+        self.assertEqual(self.read('index.json')['version'], summary['version'])
+        self.assertTrue(os.path.islink(os.path.join(self.static_root, 'catalog')))
+        self.assertEqual(len(os.listdir(os.path.join(self.static_root, 'catalog-builds'))), 2)
+
+    def test_snapshot_served_by_static_middleware(self):
+        with override_settings(STATIC_ROOT=self.static_root):
+            from django.test import Client
+            client = Client()
+            snapshot.build_snapshot(page_size=2)
+            response = client.get('/static/catalog/products/page-1.json', HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+
+            # Builds published after startup are picked up too
+            catalog_cache.bump_catalog_version()
+            snapshot.build_snapshot()
+            index = json.loads(b''.join(client.get('/static/catalog/index.json').streaming_content))
+            self.assertEqual(index['version'], catalog_cache.get_catalog_version())
+
+    def test_stock_only_changes_leave_snapshot_current(self):
+        snapshot.build_snapshot(self.static_root)
+        product = Product.objects.get(slug='snapshot-product-0')
+        product.stock_quantity -= 1
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save(update_fields=['stock_quantity', 'updated_at'])
+        self.assertIsNone(snapshot.rebuild_if_stale(self.static_root))
+
+        product.price = Decimal('12.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        summary = snapshot.rebuild_if_stale(self.static_root, page_size=2)
+        self.assertEqual(summary['pages'], 3)
+        self.assertEqual(self.read('products', 'snapshot-product-0.json')['price'], '12.00')
+
+    def test_detail_matches_api_payload(self):
+        snapshot.build_snapshot(self.static_root)
+        from rest_framework.test import APIClient
+        response = APIClient().get('/api/products/snapshot-product-1/')
+        detail = self.read('products', 'snapshot-product-1.json')
+        # Image URLs are site-relative in the snapshot, so compare the shape
+        self.assertEqual(set(detail), set(response.data))
+        self.assertIn('frequently_bought_together', detail)
+
+    @override_settings(CATALOG_SNAPSHOT_AUTO_REBUILD=True)
+    def test_stock_only_saves_do_not_schedule_rebuild(self):
+        product = Product.objects.get(slug='snapshot-product-0')
+        with mock.patch.object(snapshot._rebuild_job, 'trigger') as trigger:
+            product.stock_quantity -= 1
+            with self.captureOnCommitCallbacks(execute=True):
+                product.save(update_fields=['stock_quantity', 'updated_at'])
+            trigger.assert_not_called()
+
+            product.price = Decimal('12.00')
+            with self.captureOnCommitCallbacks(execute=True):
+                product.save()
+            trigger.assert_called_once()
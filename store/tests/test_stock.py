@@ -0,0 +1,68 @@
+"""
+Test cases for cached stock levels
+"""
+
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from store import stock
+from store.models import Product
+from store.tests.test_products import create_product
+
+
+class StockLevelTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.product = create_product('Stock Product', stock_quantity=7)
+        self.sold_out = create_product('Sold Out Product', stock_quantity=0)
+        self.hidden = create_product('Hidden Stock Product', is_active=False)
+        cache.clear()
+
+    def test_levels_cached_after_first_lookup(self):
+        ids = f'{self.product.id},{self.sold_out.id},{self.hidden.id},999999'
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/stock/', {'ids': ids})
+        self.assertEqual(response.data['stock'], {str(self.product.id): 7, str(self.sold_out.id): 0})
+
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/stock/', {'ids': ids})
+        self.assertEqual(cached.data, response.data)
+
+    def test_stock_changes_are_written_through(self):
+        self.client.get('/api/stock/', {'ids': self.product.id})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.stock_quantity = 2
+            self.product.save()
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/stock/', {'ids': self.product.id})
+        self.assertEqual(response.data['stock'], {str(self.product.id): 2})
+
+    @override_settings(STOCK_CACHE_TIMEOUT=60)
+    def test_entries_expire_individually(self):
+        stock.get_levels([self.product.id])
+        # Bypasses the write-through hooks
+        Product.objects.filter(pk=self.product.pk).update(stock_quantity=3)
+        self.assertEqual(stock.get_levels([self.product.id]), {self.product.id: 7})
+
+        later = time.time() + 61
+        with mock.patch('time.time', return_value=later):
+            # Writes for other products do not keep the stale entry alive
+            stock.set_level(self.sold_out)
+            self.assertEqual(stock.get_levels([self.product.id]), {self.product.id: 3})
+            self.assertEqual(stock.get_levels([self.sold_out.id]), {self.sold_out.id: 0})
+
+    def test_fill_does_not_overwrite_newer_level(self):
+        # A miss that raced with a write-through: the database read is older
+        stock.set_level(Product(pk=self.product.pk, stock_quantity=9, is_active=True))
+        with mock.patch.object(stock, '_read', return_value={}):
+            stock.get_levels([self.product.id])
+        self.assertEqual(stock.get_levels([self.product.id]), {self.product.id: 9})
+
+    def test_invalid_ids(self):
+        self.assertEqual(self.client.get('/api/stock/').status_code, 400)
+        self.assertEqual(self.client.get('/api/stock/', {'ids': 'x'}).status_code, 400)
@@ -0,0 +1,71 @@
+"""
+Per-language product content.
+
+English lives on Product itself; other languages are ProductTranslation
+rows. The language of a catalog request is the authenticated customer's
+preferred_language, else the best supported match in Accept-Language,
+else English.
+
+attach() loads the translations for a batch of products in one query
+and sets ``product.translation`` (None when missing), so serializers
+fall back to English without further queries. Catalog cache keys,
+ETags and list fragments include the language, so each language is
+built once per catalog version like the English catalog.
+"""
+
+from django.utils.translation.trans_real import parse_accept_lang_header
+
+from .models import LANGUAGE_CHOICES, Customer, ProductTranslation
+
+DEFAULT_LANGUAGE = 'en'
+SUPPORTED_LANGUAGES = [code for code, _ in LANGUAGE_CHOICES]
+
+
+def get_language(request):
+    """Resolve and remember the content language for a request"""
+    language = getattr(request, '_product_language', None)
+    if language is None:
+        language = _preferred_language(request) or _accepted_language(request) or DEFAULT_LANGUAGE
+        request._product_language = language
+    return language
+
+
+def vary_headers(request):
+    """Request headers that select the language of a response"""
+    headers = ['Accept-Language']
+    if 'HTTP_AUTHORIZATION' in request.META:
+        headers.append('Authorization')
+    return headers
+
+
+def attach(products, language):
+    """Set ``translation`` on each product for ``language``; returns the list"""
+    products = list(products)
+    found = {}
+    if language != DEFAULT_LANGUAGE and products:
+        found = {
+            translation.product_id: translation
+            for translation in ProductTranslation.objects.filter(
+                product_id__in=[product.pk for product in products], language=language
+            )
+        }
+    for product in products:
+        product.translation = found.get(product.pk)
+    return products
+
+
+def _preferred_language(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return None
+    language = Customer.objects.filter(user=user).values_list('preferred_language', flat=True).first()
+    return language if language in SUPPORTED_LANGUAGES else None
+
+
+def _accepted_language(request):
+    header = request.META.get('HTTP_ACCEPT_LANGUAGE', '')
+    for code, _ in parse_accept_lang_header(header):
+        language = code.split('-')[0].lower()
+        if language in SUPPORTED_LANGUAGES:
+            return language
+    return None
@@ -33,12 +33,16 @@ urlpatterns = [
     # Dashboard
     path('api/dashboard/', views.dashboard_stats, name='dashboard_stats'),
     
+    # Stock availability
+    path('api/stock/', views.stock_levels, name='stock_levels'),
+    
     # Cart
     path('api/cart/', views.cart_view, name='cart'),
     path('api/cart/add/', views.add_to_cart, name='add_to_cart'),
     path('api/cart/update/<int:item_id>/', views.update_cart_item, name='update_cart_item'),
     path('api/cart/remove/<int:item_id>/', views.remove_from_cart, name='remove_from_cart'),
     path('api/cart/clear/', views.clear_cart, name='clear_cart'),
+    path('api/cart/batch/', views.batch_cart, name='batch_cart'),
     
     # Stripe/Payment
     path('api/checkout/', stripe_views.create_checkout_session, name='create_checkout_session'),
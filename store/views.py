@@ -1,27 +1,32 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.models import User
 from django.contrib.auth import login, logout
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.utils import timezone
-from django.db.models import Q, Count, Sum
-from django.http import HttpResponse
+from django.db.models import Q, Count, Sum, Prefetch, prefetch_related_objects
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
 # CSRF exemption handled by DRF authentication_classes=[]
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action, api_view, permission_classes, authentication_classes
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.parsers import MultiPartParser, FormParser
 import csv
 import datetime
+from . import autocomplete, cart_batch, catalog_cache, fragments, reviews, search, session_carts, stock, translations
+from .filters import ProductFilterBackend
+from .pagination import ProductPagination, OrderPagination, ActivityPagination, ReviewPagination, SearchPagination
 from .permissions import IsCustomerOwner, IsActivityOwner, IsShippingAddressOwner, IsOrderOwner
-from .models import Product, Customer, Order, OrderItem, ShippingAddress, Cart, CartItem, UserActivity
+from .models import Product, ProductListing, ProductReview, Customer, Order, OrderItem, ShippingAddress, Cart, CartItem, UserActivity
 from .serializers import (
     UserSerializer, LoginSerializer, CustomerSerializer, CustomerUpdateSerializer,
     CustomerNotificationPreferencesSerializer, UserActivitySerializer, AvatarUploadSerializer,
-    ProductSerializer, ProductListSerializer, OrderSerializer, ShippingAddressSerializer,
-    CartSerializer, CartItemSerializer, CheckoutSerializer, DashboardStatsSerializer,
+    ProductSerializer, ProductListSerializer, ProductDetailSerializer, ProductReviewSerializer, OrderSerializer,
+    ShippingAddressSerializer,
+    CartSerializer, CartItemSerializer, CartBatchSerializer, CheckoutSerializer, DashboardStatsSerializer,
     BulkOrderOperationSerializer
 )
 
@@ -41,23 +46,243 @@ def get_user_agent(request):
     return request.META.get('HTTP_USER_AGENT', '')
 
 
-class ProductPagination(PageNumberPagination):
-    page_size = 12
-    page_size_query_param = 'page_size'
-    max_page_size = 100
-
-
 class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Product.objects.filter(is_active=True)
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
     pagination_class = ProductPagination
+    filter_backends = [ProductFilterBackend]
     lookup_field = 'slug'
+    batch_max_items = 300
+    
+    def get_queryset(self):
+        if self.action == 'list':
+            # Denormalized read model: no joins or stock evaluation per request
+            return ProductListing.objects.all()
+        return super().get_queryset()
+    
+    def get_permissions(self):
+        if self.action == 'reviews' and self.request.method == 'POST':
+            return [IsAuthenticated()]
+        return super().get_permissions()
     
     def get_serializer_class(self):
         if self.action == 'list':
             return ProductListSerializer
+        if self.action == 'retrieve':
+            return ProductDetailSerializer
         return ProductSerializer
+    
+    def get_keyset_ordering(self):
+        return ProductFilterBackend().get_ordering(self.request)
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['language'] = translations.get_language(self.request)
+        return context
+    
+    def list(self, request, *args, **kwargs):
+        language = translations.get_language(request)
+        
+        def build():
+            page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+            envelope = self.paginator.get_paginated_response([]).data
+            return fragments.render_page(envelope, fragments.get_fragments(page, language, prefetch='primary_image'))
+        
+        return self.cached_response(request, catalog_cache.list_key(request, language), build, localized=True)
+    
+    def retrieve(self, request, *args, **kwargs):
+        language = translations.get_language(request)
+        
+        def build():
+            instance = translations.attach([self.get_object()], language)[0]
+            return self.get_serializer(instance).data
+        
+        return self.cached_response(
+            request, catalog_cache.detail_key(kwargs[self.lookup_field], language), build, localized=True
+        )
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked full-text search over active products: /api/products/search/?q="""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'Search query (q) is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        language = translations.get_language(request)
+        
+        def build():
+            queryset = search.search_products(self.get_queryset(), query)
+            paginator = SearchPagination()
+            page = paginator.paginate_queryset(queryset, request, view=self)
+            envelope = paginator.get_paginated_response([]).data
+            return fragments.render_page(envelope, fragments.get_fragments(page, language))
+        
+        return self.cached_response(request, catalog_cache.list_key(request, language), build, localized=True)
+    
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Bucket counts for every catalog filter, honouring the active filters"""
+        return self.cached_response(
+            request,
+            catalog_cache.list_key(request),
+            lambda: ProductFilterBackend().get_facet_counts(request, self.get_queryset())
+        )
+    
+    @action(detail=True, methods=['get', 'post'])
+    def reviews(self, request, slug=None):
+        """A product's reviews, newest first, paged by cursor; buyers POST to add theirs"""
+        if request.method == 'POST':
+            return self.add_review(request)
+        
+        def build():
+            queryset = ProductReview.objects.filter(product=self.get_object()).select_related('customer__user')
+            paginator = ReviewPagination()
+            # No view: the product sort options do not apply to reviews
+            page = paginator.paginate_queryset(queryset, request)
+            return paginator.get_paginated_response(ProductReviewSerializer(page, many=True).data).data
+        
+        return self.cached_response(request, catalog_cache.list_key(request), build)
+    
+    def add_review(self, request):
+        product = self.get_object()
+        customer = Customer.objects.filter(user=request.user).first()
+        order_item = customer and reviews.find_reviewable_item(customer, product)
+        if not order_item:
+            return Response(
+                {'error': 'Only customers who bought this product can review it'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = ProductReviewSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            # The rating aggregates are updated in the same transaction (see reviews)
+            with transaction.atomic():
+                review = serializer.save(order_item=order_item, product=product, customer=customer)
+        except IntegrityError:
+            return Response({'error': 'You have already reviewed this product'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ProductReviewSerializer(review).data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['get'], authentication_classes=[])
+    def autocomplete(self, request):
+        """Search-as-you-type suggestions served from an in-memory index.
+        
+        Authentication is skipped so the hot path never reaches the
+        database; the response does not depend on the caller.
+        """
+        prefix = request.query_params.get('q', '')
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            return Response({'error': 'Invalid limit'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': autocomplete.suggest(prefix, limit)})
+    
+    @action(detail=False, methods=['get', 'post'], authentication_classes=[])
+    def batch(self, request):
+        """Full product payloads for many ids and/or slugs in one request.
+        
+        GET /api/products/batch/?ids=1,2&slugs=a,b or POST {"ids": [...], "slugs": [...]}.
+        Results follow the requested order; unknown or inactive entries are
+        listed under not_found. Each product is cached individually so
+        overlapping carts and wishlists share entries, and all misses are
+        loaded with one product query plus one image prefetch.
+        """
+        source = request.data if request.method == 'POST' else request.query_params
+        try:
+            ids = [int(value) for value in self._batch_values(source, 'ids')]
+            slugs = self._batch_values(source, 'slugs')
+        except (TypeError, ValueError):
+            return Response({'error': 'ids must be integers and slugs strings'}, status=status.HTTP_400_BAD_REQUEST)
+    
+        requested = list(dict.fromkeys([('id', value) for value in ids] + [('slug', value) for value in slugs]))
+        if not requested:
+            return Response({'error': 'Provide ids or slugs'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(requested) > self.batch_max_items:
+            return Response(
+                {'error': f'At most {self.batch_max_items} products per batch'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    
+        # Image URLs are absolute, so entries are per host like list pages
+        version = catalog_cache.get_catalog_version()
+        host = request.get_host()
+        language = translations.get_language(request)
+        keys = {
+            lookup: catalog_cache.make_key('item', host, language, *lookup, version=version)
+            for lookup in requested
+        }
+        cached = catalog_cache.lookup_many(list(keys.values()))
+        payloads = {lookup: cached[key] for lookup, key in keys.items() if key in cached}
+    
+        missing = [lookup for lookup in requested if lookup not in payloads]
+        if missing:
+            missing_ids = [value for kind, value in missing if kind == 'id']
+            missing_slugs = [value for kind, value in missing if kind == 'slug']
+            products = translations.attach(
+                self.get_queryset().filter(Q(pk__in=missing_ids) | Q(slug__in=missing_slugs)).prefetch_related('images'),
+                language,
+            )
+            serializer = ProductSerializer(products, many=True, context=self.get_serializer_context())
+    
+            fresh = {}
+            for data in serializer.data:
+                for lookup in (('id', data['id']), ('slug', data['slug'])):
+                    payloads[lookup] = data
+                    fresh[catalog_cache.make_key('item', host, language, *lookup, version=version)] = data
+            catalog_cache.store_many(fresh)
+    
+        results, seen, not_found = [], set(), {'ids': [], 'slugs': []}
+        for lookup in requested:
+            data = payloads.get(lookup)
+            if data is None:
+                not_found[lookup[0] + 's'].append(lookup[1])
+            elif data['id'] not in seen:
+                seen.add(data['id'])
+                results.append(data)
+        response = Response({'results': results, 'not_found': not_found})
+        patch_vary_headers(response, translations.vary_headers(request))
+        return response
+    
+    @staticmethod
+    def _batch_values(source, name):
+        """Read a list parameter given as a JSON list or comma-separated values"""
+        if hasattr(source, 'getlist'):
+            values = [value for raw in source.getlist(name) for value in raw.split(',')]
+        else:
+            values = source.get(name) or []
+            if not isinstance(values, list):
+                raise TypeError(name)
+        values = [str(value).strip() for value in values]
+        return [value for value in values if value]
+    
+    def cached_response(self, request, cache_key, build, localized=False):
+        """Serve a catalog payload with validators, doing as little work as possible.
+        
+        Conditional requests matching the current catalog version get a 304
+        before anything is serialized; otherwise the payload (data or
+        encoded bytes) comes from the catalog cache, falling back to build().
+        Localized payloads must have the language in ``cache_key``, which
+        also keys the ETag.
+        """
+        etag = catalog_cache.etag(cache_key)
+        last_modified = catalog_cache.get_last_modified()
+        
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            data = catalog_cache.lookup(cache_key)
+            if data is None:
+                data = build()
+                catalog_cache.store(cache_key, data)
+            # List pages are cached pre-encoded (see store.fragments)
+            response = fragments.PreEncodedResponse(data) if isinstance(data, bytes) else Response(data)
+        
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        if localized:
+            patch_vary_headers(response, translations.vary_headers(request))
+        return response
 
 
 class CustomerViewSet(viewsets.ModelViewSet):
@@ -250,11 +475,21 @@ class CustomerViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def activities(self, request):
-        """Get current user's activity log"""
+        """Get current user's activity log
+        
+        Returns the last 50 activities, or keyset pages when ``cursor`` is given.
+        """
         try:
             customer = Customer.objects.select_related('user').get(user=request.user)
-            activities = UserActivity.objects.filter(user=customer.user)[:50]  # Last 50 activities
-            serializer = UserActivitySerializer(activities, many=True)
+            activities = UserActivity.objects.filter(user=customer.user)
+            
+            paginator = ActivityPagination()
+            if paginator.cursor_query_param in request.query_params:
+                page = paginator.paginate_queryset(activities, request, view=self)
+                serializer = UserActivitySerializer(page, many=True)
+                return paginator.get_paginated_response(serializer.data)
+            
+            serializer = UserActivitySerializer(activities[:50], many=True)  # Last 50 activities
             return Response(serializer.data)
         except Customer.DoesNotExist:
             return Response({'error': 'Customer profile not found'}, status=404)
@@ -310,6 +545,7 @@ class OrderViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated, IsOrderOwner]
+    pagination_class = OrderPagination
     
     def get_queryset(self):
         customer = get_object_or_404(Customer, user=self.request.user)
@@ -462,6 +698,7 @@ def register(request):
         user = serializer.save()
         customer = Customer.objects.create(user=user)
         token, created = Token.objects.get_or_create(user=user)
+        session_carts.materialize(request.session.session_key, customer)
         
         # Log registration activity
         UserActivity.log_activity(
@@ -488,6 +725,8 @@ def login_view(request):
     if serializer.is_valid():
         user = serializer.validated_data['user']
         token, created = Token.objects.get_or_create(user=user)
+        # login() rotates the session key the anonymous cart is stored under
+        anonymous_session_key = request.session.session_key
         login(request, user)
         
         # Update customer's last login and log activity
@@ -495,6 +734,7 @@ def login_view(request):
             customer = Customer.objects.get(user=user)
             customer.last_login = timezone.now()
             customer.save(update_fields=['last_login'])
+            session_carts.materialize(anonymous_session_key, customer)
             
             # Log login activity
             UserActivity.log_activity(
@@ -513,6 +753,7 @@ def login_view(request):
         except Customer.DoesNotExist:
             # Create customer if doesn't exist
             customer = Customer.objects.create(user=user, last_login=timezone.now())
+            session_carts.materialize(anonymous_session_key, customer)
             return Response({
                 'user': UserSerializer(user).data,
                 'customer': CustomerSerializer(customer).data,
@@ -566,28 +807,70 @@ def user_profile(request):
         })
 
 
+STOCK_MAX_IDS = 500
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@authentication_classes([])  # Response does not depend on the caller
+def stock_levels(request):
+    """Availability for many products: /api/stock/?ids=1,2,3
+    
+    Returns {"stock": {"<id>": quantity}} for active products; unknown and
+    inactive ids are omitted. Served from the stock cache (see store.stock).
+    """
+    try:
+        ids = [int(value) for raw in request.query_params.getlist('ids') for value in raw.split(',') if value.strip()]
+    except ValueError:
+        return Response({'error': 'ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    if not ids:
+        return Response({'error': 'Provide ids'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(ids) > STOCK_MAX_IDS:
+        return Response({'error': f'At most {STOCK_MAX_IDS} ids per request'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    levels = stock.get_levels(ids)
+    return Response({'stock': {str(product_id): quantity for product_id, quantity in levels.items()}})
+
+
 def get_or_create_cart(user, session_key):
+    """The customer's Cart, or a SessionCart from the cache for anonymous visitors"""
     if user.is_authenticated:
         customer = get_object_or_404(Customer, user=user)
         cart, created = Cart.objects.get_or_create(customer=customer)
-        if created and session_key:
-            session_cart = Cart.objects.filter(session_key=session_key).first()
-            if session_cart:
-                for item in session_cart.items.all():
-                    cart_item, created = CartItem.objects.get_or_create(
-                        cart=cart, 
-                        product=item.product,
-                        defaults={'quantity': item.quantity}
-                    )
-                    if not created:
-                        cart_item.quantity += item.quantity
-                        cart_item.save()
-                session_cart.delete()
     else:
-        cart, created = Cart.objects.get_or_create(session_key=session_key)
+        cart = session_carts.load(session_key)
     return cart
 
 
+def serialize_cart(cart):
+    """Cart payload in a constant number of queries, however many items it holds.
+
+    Items come with their products and primary images from one prefetch
+    (see CartItem.objects.for_display) and totals are summed in SQL.
+    Anonymous carts load their products the same way (see SessionCart).
+    """
+    if isinstance(cart, Cart):
+        prefetch_related_objects([cart], Prefetch('items', queryset=CartItem.objects.for_display()))
+    return CartSerializer(cart).data
+
+
+def cart_item_response(cart, item_id, status_code=status.HTTP_200_OK):
+    """The changed item as before, plus the whole cart so clients need not refetch it"""
+    cart_data = serialize_cart(cart)
+    item_data = next(item for item in cart_data['items'] if item['id'] == item_id)
+    return Response({**item_data, 'cart': cart_data}, status=status_code)
+
+
+def get_cart_item(cart, item_id):
+    """A cart line by id; anonymous carts identify lines by product id"""
+    if isinstance(cart, session_carts.SessionCart):
+        cart_item = next((item for item in cart.items if item.id == item_id), None)
+        if cart_item is None:
+            raise Http404('No CartItem matches the given query.')
+        return cart_item
+    return get_object_or_404(CartItem, id=item_id, cart=cart)
+
+
 @api_view(['GET', 'HEAD'])
 @permission_classes([AllowAny])
 def cart_view(request):
@@ -601,8 +884,7 @@ def cart_view(request):
         session_key = request.session.session_key
     
     cart = get_or_create_cart(request.user, session_key)
-    serializer = CartSerializer(cart)
-    return Response(serializer.data)
+    return Response(serialize_cart(cart))
 
 
 @api_view(['POST'])
@@ -627,6 +909,14 @@ def add_to_cart(request):
                 'error': 'Not enough stock available'
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        if isinstance(cart, session_carts.SessionCart):
+            if cart.quantities.get(product.id, 0) + quantity > product.stock_quantity:
+                return Response({
+                    'error': 'Not enough stock available'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            cart.add(product.id, quantity)
+            return cart_item_response(cart, product.id, status.HTTP_201_CREATED)
+        
         cart_item, created = CartItem.objects.get_or_create(
             cart=cart,
             product=product,
@@ -641,7 +931,7 @@ def add_to_cart(request):
                 }, status=status.HTTP_400_BAD_REQUEST)
             cart_item.save()
         
-        return Response(CartItemSerializer(cart_item).data, status=status.HTTP_201_CREATED)
+        return cart_item_response(cart, cart_item.id, status.HTTP_201_CREATED)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -655,7 +945,7 @@ def update_cart_item(request, item_id):
         session_key = request.session.session_key
     
     cart = get_or_create_cart(request.user, session_key)
-    cart_item = get_object_or_404(CartItem, id=item_id, cart=cart)
+    cart_item = get_cart_item(cart, item_id)
     
     quantity = request.data.get('quantity')
     try:
@@ -671,10 +961,13 @@ def update_cart_item(request, item_id):
             'error': 'Not enough stock available'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    cart_item.quantity = quantity
-    cart_item.save()
+    if isinstance(cart, session_carts.SessionCart):
+        cart.set(item_id, quantity)
+    else:
+        cart_item.quantity = quantity
+        cart_item.save()
     
-    return Response(CartItemSerializer(cart_item).data)
+    return cart_item_response(cart, item_id)
 
 
 @api_view(['DELETE'])
@@ -686,10 +979,13 @@ def remove_from_cart(request, item_id):
         session_key = request.session.session_key
     
     cart = get_or_create_cart(request.user, session_key)
-    cart_item = get_object_or_404(CartItem, id=item_id, cart=cart)
-    cart_item.delete()
+    cart_item = get_cart_item(cart, item_id)
+    if isinstance(cart, session_carts.SessionCart):
+        cart.remove(item_id)
+    else:
+        cart_item.delete()
     
-    return Response({'message': 'Item removed from cart'})
+    return Response({'message': 'Item removed from cart', 'cart': serialize_cart(cart)})
 
 
 @api_view(['DELETE'])
@@ -701,9 +997,41 @@ def clear_cart(request):
         session_key = request.session.session_key
     
     cart = get_or_create_cart(request.user, session_key)
-    cart.items.all().delete()
+    if isinstance(cart, session_carts.SessionCart):
+        cart.clear()
+    else:
+        cart.items.all().delete()
+    
+    return Response({'message': 'Cart cleared', 'cart': serialize_cart(cart)})
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def batch_cart(request):
+    """Apply several cart edits in one request: POST {"operations": [...]}
+    
+    Operations run in order, all or none:
+    {"op": "add", "product_id", "quantity"},
+    {"op": "set", "item_id" or "product_id", "quantity"},
+    {"op": "remove", "item_id" or "product_id"}.
+    Returns the resulting cart; errors name the failing operation's index.
+    """
+    session_key = request.session.session_key
+    if not session_key:
+        request.session.create()
+        session_key = request.session.session_key
+    
+    serializer = CartBatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    cart = get_or_create_cart(request.user, session_key)
+    try:
+        cart_batch.apply(cart, serializer.validated_data['operations'])
+    except cart_batch.CartBatchError as e:
+        return Response({'error': str(e), 'operation': e.index}, status=e.status_code)
     
-    return Response({'message': 'Cart cleared'})
+    return Response(serialize_cart(cart))
 
 
 @api_view(['GET'])
@@ -732,6 +1060,7 @@ def api_info(request):
                 'stats': '/api/customers/{id}/stats/',
             },
             'cart': '/api/cart/',
+            'stock': '/api/stock/?ids=',
             'orders': '/api/orders/',
             'shipping': '/api/shipping-addresses/',
             'dashboard': '/api/dashboard/',